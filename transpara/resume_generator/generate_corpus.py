@@ -0,0 +1,65 @@
+# python generate_corpus.py --count 10000 --seed 42 --format jsonl
+import os
+import json
+import argparse
+from utils.file_utils import ensure_dir_exists
+from utils.synthetic_cv import CVComponentPool, GENDER_STYLES, SECTION_HEADINGS, generate_corpus, cv_to_text
+
+DATA_PATH = "data/cv_data.json"
+OUTPUT_DIR = "output/synthetic"
+
+def parse_gender_mix(value: str) -> dict:
+    # "neutral=0.5,masculine=0.25,feminine=0.25"
+    mix = {}
+    for part in value.split(","):
+        style, weight = part.split("=")
+        if style not in GENDER_STYLES:
+            raise argparse.ArgumentTypeError(f"Unknown gender style: {style}")
+        mix[style] = float(weight)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic CV corpus for load testing")
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', type=int, default=0, help="Index of the first CV, to extend or shard a corpus")
+    parser.add_argument('--format', choices=["jsonl", "txt"], default="jsonl")
+    parser.add_argument('--pdf', action='store_true', help="Also render every CV as a PDF")
+    parser.add_argument('--workers', type=int, default=None, help="PDF rendering processes (default: CPU count)")
+    parser.add_argument('--languages', nargs='+', choices=list(SECTION_HEADINGS), default=["en"])
+    parser.add_argument('--gender_mix', type=parse_gender_mix, default=None)
+    parser.add_argument('--data_path', type=str, default=DATA_PATH)
+    parser.add_argument('--output_dir', type=str, default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    ensure_dir_exists(args.output_dir)
+    pool = CVComponentPool.from_file(args.data_path)
+    corpus_options = dict(seed=args.seed, start=args.start, gender_mix=args.gender_mix, languages=args.languages)
+
+    jsonl_path = os.path.join(args.output_dir, f"corpus_seed{args.seed}_{args.start}-{args.start + args.count}.jsonl")
+    jsonl_file = open(jsonl_path, "w", encoding="utf-8") if args.format == "jsonl" else None
+    try:
+        for generated, entry in enumerate(generate_corpus(pool, args.count, **corpus_options), start=1):
+            text = cv_to_text(entry)
+            if jsonl_file:
+                jsonl_file.write(json.dumps({**entry, "text": text}, ensure_ascii=False) + "\n")
+            else:
+                with open(os.path.join(args.output_dir, entry["filename"].replace(".pdf", ".txt")), "w", encoding="utf-8") as f:
+                    f.write(text)
+            if generated % 1000 == 0:
+                print(f"Generated {generated}/{args.count} CVs")
+    finally:
+        if jsonl_file:
+            jsonl_file.close()
+
+    if args.pdf:
+        from templates.pdf_generator import render_cv_pdfs
+
+        # Regenerating is cheaper than holding the corpus in memory, and yields the same CVs
+        render_cv_pdfs(generate_corpus(pool, args.count, **corpus_options), args.output_dir,
+                       workers=args.workers, total=args.count, progress_every=1000)
+
+    print(f"✅ Generated {args.count} CVs (seed {args.seed}) in {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
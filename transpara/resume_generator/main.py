@@ -1,21 +1,25 @@
 import json
 import os
+import argparse
 from datetime import datetime
-from templates.pdf_generator import generate_cv_pdf
+from templates.pdf_generator import render_cv_pdfs
 from utils.file_utils import ensure_dir_exists
 
 DATA_PATH = "data/cv_data.json"
 OUTPUT_DIR = "output"
 
 def main():
+    parser = argparse.ArgumentParser(description="Render the CVs in data/cv_data.json as PDFs")
+    parser.add_argument('--workers', type=int, default=None, help="Rendering processes (default: CPU count)")
+    args = parser.parse_args()
+
     ensure_dir_exists(OUTPUT_DIR)
 
     with open(DATA_PATH, "r", encoding="utf-8") as f:
         cv_entries = json.load(f)
 
-    for entry in cv_entries:
-        generate_cv_pdf(entry, OUTPUT_DIR)
-        print(f"Generated CV: {entry['filename']} in {OUTPUT_DIR}")
+    render_cv_pdfs(cv_entries, OUTPUT_DIR, workers=args.workers)
+    print(f"Generated {len(cv_entries)} CVs in {OUTPUT_DIR}")
 
 if __name__ == "__main__":
     main()
@@ -1,25 +1,56 @@
+import fpdf
 from fpdf import FPDF
 import os
+import time
+from multiprocessing import Pool
+from typing import Dict, Iterable, Optional
+
+# Path to TTF font files
+FONT_DIR = os.path.join(os.path.dirname(__file__), "fonts")
+FONT_PATH_REGULAR = os.path.join(FONT_DIR, "DejaVuSans.ttf")
+FONT_PATH_BOLD = os.path.join(FONT_DIR, "DejaVuSans-Bold.ttf")
+FONTS = [("DejaVu", "", FONT_PATH_REGULAR), ("DejaVu", "B", FONT_PATH_BOLD)]
+
+# Font metrics parsed by the first CV rendered in this process, reused by the rest.
+# The cache copies PyFPDF 1.7's font dicts (pinned in requirements.txt); other
+# fpdf versions fall back to parsing the fonts for every CV.
+_font_cache: Dict[str, tuple] = {}
+_font_cache_warned = False
+FPDF_LIBRARY_VERSION = getattr(fpdf, "__version__", getattr(fpdf, "FPDF_VERSION", "unknown"))
+
+def _register_fonts(pdf: FPDF):
+    global _font_cache_warned
+    for family, style, path in FONTS:
+        fontkey = family.lower() + style
+        if fontkey in _font_cache:
+            font, font_file = _font_cache[fontkey]
+            # Glyph widths are shared; the subset of used glyphs is per document
+            pdf.fonts[fontkey] = dict(font, i=len(pdf.fonts) + 1, subset=list(font["subset"]))
+            pdf.font_files[fontkey] = dict(font_file)
+            pdf.font_files[path] = {"type": "TTF"}
+            continue
+
+        # Make sure font files exist
+        if not os.path.exists(FONT_PATH_REGULAR) or not os.path.exists(FONT_PATH_BOLD):
+            raise FileNotFoundError("Missing DejaVuSans fonts. Place DejaVuSans.ttf and DejaVuSans-Bold.ttf in the fonts folder.")
+
+        # Add UTF-8 font (parsed or loaded from the .pkl metrics cache)
+        pdf.add_font(family, style, path, uni=True)
+        font = pdf.fonts.get(fontkey)
+        if isinstance(font, dict) and "subset" in font:
+            # Cached metrics may carry the TTF path of the machine that wrote them
+            font["ttffile"] = pdf.font_files[fontkey]["ttffile"] = path
+            _font_cache[fontkey] = (dict(font, subset=list(font["subset"])), dict(pdf.font_files[fontkey]))
+        elif not _font_cache_warned:
+            _font_cache_warned = True
+            print(f"⚠️ fpdf {FPDF_LIBRARY_VERSION} does not expose PyFPDF 1.7 font metrics; fonts will be parsed for every CV. Install fpdf==1.7.2.")
 
 def generate_cv_pdf(data: dict, save_dir: str = "output"):
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
 
-    # Path to TTF font files
-    FONT_DIR = os.path.join(os.path.dirname(__file__), "fonts")
-    print(f"Font directory: {FONT_DIR}")
-    os.makedirs(FONT_DIR, exist_ok=True)
-    FONT_PATH_REGULAR = os.path.join(FONT_DIR, "DejaVuSans.ttf")
-    FONT_PATH_BOLD = os.path.join(FONT_DIR, "DejaVuSans-Bold.ttf")
-
-    # Make sure font files exist
-    if not os.path.exists(FONT_PATH_REGULAR) or not os.path.exists(FONT_PATH_BOLD):
-        raise FileNotFoundError("Missing DejaVuSans fonts. Place DejaVuSans.ttf and DejaVuSans-Bold.ttf in the fonts folder.")
-
-    # Add UTF-8 font with bold variant
-    pdf.add_font("DejaVu", "", FONT_PATH_REGULAR, uni=True)
-    pdf.add_font("DejaVu", "B", FONT_PATH_BOLD, uni=True)
+    _register_fonts(pdf)
     pdf.set_font("DejaVu", "B", 16)
 
     # Header
@@ -40,10 +71,58 @@ def generate_cv_pdf(data: dict, save_dir: str = "output"):
             pdf.multi_cell(0, 8, items)
         pdf.ln(5)
 
-    section("Education", data["education"])
-    section("Work Experience", data["experience"])
-    section("Skills", data["skills"])
-    section("Certificates", data["certificates"])
-    section("Awards", data["awards"])
+    headings = data.get("headings", {})
+    if data.get("summary"):
+        section(headings.get("summary", "Summary"), data["summary"])
+    section(headings.get("education", "Education"), data["education"])
+    section(headings.get("experience", "Work Experience"), data["experience"])
+    section(headings.get("skills", "Skills"), data["skills"])
+    section(headings.get("certificates", "Certificates"), data["certificates"])
+    section(headings.get("awards", "Awards"), data["awards"])
 
     pdf.output(f"{save_dir}/{data['filename']}")
+
+def _init_worker():
+    # Parse the fonts once per worker instead of once per CV
+    _register_fonts(FPDF())
+
+def _render_entry(task: tuple) -> str:
+    data, save_dir = task
+    generate_cv_pdf(data, save_dir)
+    return data["filename"]
+
+def render_cv_pdfs(entries: Iterable[dict], save_dir: str = "output", workers: Optional[int] = None,
+                   total: Optional[int] = None, progress_every: int = 100, chunksize: int = 16) -> int:
+    """
+    Renders CVs across a process pool (one process when workers == 1) and prints
+    progress every `progress_every` PDFs. Returns the number of PDFs written.
+    """
+    workers = workers or os.cpu_count() or 1
+    if total is None and hasattr(entries, "__len__"):
+        total = len(entries)
+    tasks = ((entry, save_dir) for entry in entries)
+
+    start = time.perf_counter()
+    rendered = 0
+
+    def report():
+        elapsed = time.perf_counter() - start
+        rate = rendered / elapsed if elapsed > 0 else 0.0
+        print(f"Rendered {rendered}/{total if total is not None else '?'} PDFs ({rate:.1f}/s)")
+
+    pool = Pool(workers, initializer=_init_worker) if workers > 1 else None
+    if pool is None:
+        _init_worker()
+    try:
+        results = pool.imap_unordered(_render_entry, tasks, chunksize=chunksize) if pool else map(_render_entry, tasks)
+        for _ in results:
+            rendered += 1
+            if rendered % progress_every == 0:
+                report()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if rendered % progress_every:
+        report()
+    return rendered
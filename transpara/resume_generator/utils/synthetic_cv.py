@@ -0,0 +1,181 @@
+import re
+import json
+import random
+from typing import Dict, Iterator, List, Optional
+
+GENDER_STYLES = ["neutral", "masculine", "feminine"]
+
+# Adjectives commonly reported as gender-coded in job ads and CVs
+CODED_ADJECTIVES = {
+    "neutral": ["experienced", "reliable", "analytical", "detail-oriented", "pragmatic", "curious"],
+    "masculine": ["competitive", "assertive", "decisive", "ambitious", "driven", "independent"],
+    "feminine": ["collaborative", "supportive", "empathetic", "dedicated", "compassionate", "considerate"]
+}
+
+PRONOUNS = {"masculine": ("He", "his"), "feminine": ("She", "her")}
+GENDERED_ROLES = {
+    "masculine": ["chairman of the student tech society", "team captain of the men's hackathon squad"],
+    "feminine": ["chairwoman of the student tech society", "mentor in the Women in Tech programme"]
+}
+
+SECTION_HEADINGS = {
+    "en": {"summary": "Summary", "education": "Education", "experience": "Work Experience",
+           "skills": "Skills", "certificates": "Certificates", "awards": "Awards"},
+    "de": {"summary": "Profil", "education": "Ausbildung", "experience": "Berufserfahrung",
+           "skills": "Kenntnisse", "certificates": "Zertifikate", "awards": "Auszeichnungen"},
+    "hu": {"summary": "Összefoglaló", "education": "Tanulmányok", "experience": "Szakmai tapasztalat",
+           "skills": "Készségek", "certificates": "Tanúsítványok", "awards": "Díjak"},
+    "es": {"summary": "Perfil", "education": "Formación", "experience": "Experiencia laboral",
+           "skills": "Habilidades", "certificates": "Certificados", "awards": "Premios"}
+}
+SPOKEN_LANGUAGES = {"en": "English", "de": "German", "hu": "Hungarian", "es": "Spanish"}
+LANGUAGE_LEVELS = ["B2", "C1", "C2", "Native"]
+
+SECTIONS = ["education", "experience", "skills", "certificates", "awards"]
+
+class CVComponentPool:
+    """
+    Sections of the hand-written CVs split into reusable parts: names, contact
+    blocks, education blocks, jobs (header + bullets), skills per category,
+    certificates and awards.
+    """
+
+    def __init__(self, cv_entries: List[Dict]):
+        self.first_names = sorted({entry["name"].split()[0] for entry in cv_entries})
+        self.last_names = sorted({entry["name"].split()[-1] for entry in cv_entries})
+        self.contacts = [(entry["location"], entry["phone"], entry["email"].split("@")[-1]) for entry in cv_entries]
+        self.education = [entry["education"] for entry in cv_entries]
+        self.jobs = [job for entry in cv_entries for job in _split_jobs(entry["experience"])]
+        self.skills: Dict[str, List[str]] = {}
+        for entry in cv_entries:
+            for category, items in _split_skills(entry["skills"]):
+                known = self.skills.setdefault(category, [])
+                known.extend(item for item in items if item not in known)
+        self.skill_layouts = [[category for category, _ in _split_skills(entry["skills"])] for entry in cv_entries]
+        self.certificates = sorted({line for entry in cv_entries for line in entry["certificates"]})
+        self.awards = sorted({line for entry in cv_entries for line in entry["awards"]})
+
+    @classmethod
+    def from_file(cls, data_path: str) -> "CVComponentPool":
+        with open(data_path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+def _split_jobs(experience: List[str]) -> List[List[str]]:
+    jobs = []
+    for line in experience:
+        if line.startswith("-") and jobs:
+            jobs[-1].append(line)
+        else:
+            jobs.append([line])
+    return jobs
+
+def _split_skills(skills: str) -> List[tuple]:
+    categories = []
+    for line in skills.split("\n"):
+        if ":" not in line:
+            continue
+        category, items = line.split(":", 1)
+        # Commas inside parentheses belong to the item, e.g. "AWS (Lambda, S3)"
+        parts = re.split(r",\s*(?![^()]*\))", items)
+        categories.append((category.strip(), [item.strip() for item in parts if item.strip()]))
+    return categories
+
+def _shift_years(lines: List[str], offset: int) -> List[str]:
+    return [re.sub(r"\b(19|20)\d{2}\b", lambda m: str(int(m.group(0)) + offset), line) for line in lines]
+
+def _mutate_job(rng: random.Random, job: List[str]) -> List[str]:
+    header, bullets = job[0], job[1:]
+    bullets = rng.sample(bullets, k=rng.randint(min(1, len(bullets)), len(bullets)))
+    bullets = [re.sub(r"\b\d{1,2}%", lambda _: f"{rng.randint(5, 60)}%", bullet) for bullet in bullets]
+    return [header] + bullets
+
+def _build_summary(rng: random.Random, gender_style: str, role: str, years: int, skills: List[str]) -> str:
+    adjectives = rng.sample(CODED_ADJECTIVES[gender_style], k=2)
+    focus = ", ".join(rng.sample(skills, k=min(3, len(skills)))) or "software development"
+    if gender_style == "neutral":
+        return f"{adjectives[0].capitalize()} and {adjectives[1]} {role} with {years}+ years of experience in {focus}."
+
+    subject, possessive = PRONOUNS[gender_style]
+    article = "an" if adjectives[0][0] in "aeiou" else "a"
+    return (
+        f"{subject} is {article} {adjectives[0]} and {adjectives[1]} {role} with {years}+ years of experience in {focus}. "
+        f"Outside {possessive} day job, {subject.lower()} served as {rng.choice(GENDERED_ROLES[gender_style])}."
+    )
+
+def generate_synthetic_cv(pool: CVComponentPool, seed: int, index: int,
+                          gender_mix: Optional[Dict[str, float]] = None,
+                          languages: Optional[List[str]] = None) -> Dict:
+    """
+    Builds one CV by recombining and mutating pool components. The result only
+    depends on (seed, index), so any slice of a corpus can be regenerated on its own.
+    """
+    rng = random.Random(f"{seed}:{index}")
+    gender_mix = gender_mix or {style: 1.0 for style in GENDER_STYLES}
+    languages = languages or ["en"]
+
+    first_name, last_name = rng.choice(pool.first_names), rng.choice(pool.last_names)
+    location, phone, email_domain = rng.choice(pool.contacts)
+    year_offset = rng.randint(-4, 0)
+
+    jobs = [_mutate_job(rng, job) for job in rng.sample(pool.jobs, k=rng.randint(1, 4))]
+    experience = _shift_years([line for job in jobs for line in job], year_offset)
+
+    skill_lines = []
+    all_skills = []
+    for category in rng.choice(pool.skill_layouts):
+        options = pool.skills[category]
+        chosen = rng.sample(options, k=rng.randint(1, min(7, len(options))))
+        all_skills.extend(chosen)
+        skill_lines.append(f"{category}: {', '.join(chosen)}")
+
+    language = rng.choice(languages)
+    spoken = ["English"] + ([SPOKEN_LANGUAGES[language]] if language != "en" else [])
+    spoken += rng.sample([name for name in SPOKEN_LANGUAGES.values() if name not in spoken], k=rng.randint(0, 1))
+    skill_lines.append("Spoken Languages: " + ", ".join(f"{name} ({rng.choice(LANGUAGE_LEVELS)})" for name in spoken))
+
+    gender_style = rng.choices(list(gender_mix), weights=list(gender_mix.values()))[0]
+    role = jobs[0][0].split("|")[0].strip()
+    summary = _build_summary(rng, gender_style, role, rng.randint(1, 12), all_skills)
+
+    return {
+        "filename": f"{first_name}_{last_name}_{index:06d}_CV.pdf",
+        "name": f"{first_name} {last_name}",
+        "location": location,
+        "email": f"{first_name.lower()}.{last_name.lower()}{index}@{email_domain}",
+        "phone": phone,
+        "linkedin": "LinkedIn",
+        "github": "GitHub",
+        "summary": summary,
+        "education": _shift_years(rng.choice(pool.education), year_offset),
+        "experience": experience,
+        "skills": "\n".join(skill_lines),
+        "certificates": rng.sample(pool.certificates, k=rng.randint(1, 4)),
+        "awards": rng.sample(pool.awards, k=rng.randint(1, 3)),
+        "language": language,
+        "headings": SECTION_HEADINGS[language],
+        "gender_style": gender_style,
+        "seed": seed,
+        "index": index
+    }
+
+def generate_corpus(pool: CVComponentPool, count: int, seed: int = 0, start: int = 0, **kwargs) -> Iterator[Dict]:
+    for index in range(start, start + count):
+        yield generate_synthetic_cv(pool, seed, index, **kwargs)
+
+def cv_to_text(data: Dict) -> str:
+    """
+    Plain-text rendering in the same order as the PDF template.
+    """
+    headings = data.get("headings", SECTION_HEADINGS["en"])
+    lines = [
+        data["name"],
+        data["location"],
+        f'{data["email"]} | {data["phone"]} | {data["linkedin"]} | {data["github"]}',
+        ""
+    ]
+    for section in (["summary"] if data.get("summary") else []) + SECTIONS:
+        content = data[section]
+        lines.append(headings[section])
+        lines.extend(content if isinstance(content, list) else content.split("\n"))
+        lines.append("")
+    return "\n".join(lines)
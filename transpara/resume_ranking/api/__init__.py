@@ -6,7 +6,16 @@ from api.explanation_service import (
     generate_chatgpt_explanation
 )
 
+from api.prompt_builder import (
+    build_explanation_prompt,
+    select_relevant_text,
+    estimate_token_count
+)
+
 __all__ = [
     'initialize_openai_client',
-    'generate_chatgpt_explanation'
+    'generate_chatgpt_explanation',
+    'build_explanation_prompt',
+    'select_relevant_text',
+    'estimate_token_count'
 ]
\ No newline at end of file
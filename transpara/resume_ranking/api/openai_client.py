@@ -1,14 +1,27 @@
 import os
 import logging
 import json
-from typing import Optional, Dict, Any, List
-from openai import OpenAI
-from dotenv import load_dotenv
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
 from config.settings import MODEL_SETTINGS
+from src.utils.metrics import track_time, increment
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
-def initialize_openai_client() -> Optional[OpenAI]:
+def record_gpt_usage(response: Any):
+    increment("gpt_calls")
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        increment("gpt_prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+        increment("gpt_completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+
+@track_time("gpt")
+def initialize_openai_client() -> Optional["OpenAI"]:
+    from openai import OpenAI
+    from dotenv import load_dotenv
+
     load_dotenv()
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if not openai_api_key:
@@ -28,8 +41,9 @@ def initialize_openai_client() -> Optional[OpenAI]:
         logger.error(f"Error initializing OpenAI client: {str(e)}")
         return None
 
+@track_time("gpt")
 def get_completion(
-    client: OpenAI,
+    client: "OpenAI",
     prompt: str,
     system_prompt: Optional[str] = None,
     model: Optional[str] = None,
@@ -104,6 +118,7 @@ def get_completion(
             functions=[function_def],
             function_call={"name": "generate_candidate_analysis"}
         )
+        record_gpt_usage(response)
 
         if response and response.choices:
             message = response.choices[0].message
@@ -0,0 +1,163 @@
+import re
+import math
+import logging
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Any
+from config.settings import MODEL_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.\-/]*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "of", "on", "or", "our", "that", "the", "their", "this", "to",
+    "we", "will", "with", "you", "your", "who", "what", "which", "can", "all", "also"
+}
+
+def format_contributors_for_prompt(contributors: List[Dict[str, Any]]) -> str:
+    if not contributors:
+        return "None"
+    formatted = []
+    for item in contributors:
+        feature = item.get('feature', 'Unknown')
+        impact = item.get('impact', 0.0)
+        formatted.append(f"{feature} ({impact:+.3f})")
+    return ", ".join(formatted)
+
+@lru_cache(maxsize=1)
+def get_token_encoding():
+    # Loaded on first use: get_encoding may download the BPE file
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def estimate_token_count(text: str) -> int:
+    if not text:
+        return 0
+    encoding = get_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Roughly four characters per token for English prose
+    return math.ceil(len(text) / 4)
+
+def truncate_to_tokens(text: str, token_budget: int) -> str:
+    encoding = get_token_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[:token_budget])
+    return text[: token_budget * 4]
+
+def extract_contributor_keywords(contributors: List[Dict[str, Any]]) -> List[str]:
+    keywords = []
+    for item in contributors:
+        feature = item.get('feature', '')
+        if feature.startswith("Skill: "):
+            keywords.append(feature[len("Skill: "):].lower())
+    return keywords
+
+def _content_terms(text: str) -> set:
+    return {term for term in _WORD_PATTERN.findall(text.lower()) if term not in _STOPWORDS and len(term) > 1}
+
+def _score_segment(segment: str, job_terms: set, keyword_patterns: List[re.Pattern]) -> float:
+    segment_lower = segment.lower()
+    keyword_hits = sum(1 for pattern in keyword_patterns if pattern.search(segment_lower))
+    terms = _content_terms(segment)
+    if not terms:
+        return 0.0
+    overlap = len(terms & job_terms) / math.sqrt(len(terms))
+    return 3.0 * keyword_hits + overlap
+
+def select_relevant_text(
+    text: str,
+    reference_text: str,
+    keywords: Optional[List[str]] = None,
+    token_budget: Optional[int] = None
+) -> str:
+    """
+    Keeps the lines of `text` most relevant to `reference_text` and `keywords`
+    within `token_budget`, preserving their original order.
+    """
+    text = text.strip()
+    if token_budget is None or estimate_token_count(text) <= token_budget:
+        return text
+
+    segments = [line.strip() for line in text.splitlines() if line.strip()]
+    job_terms = _content_terms(reference_text)
+    keyword_patterns = [
+        re.compile(r'\b' + re.escape(keyword.lower()) + r'\b')
+        for keyword in (keywords or []) if keyword
+    ]
+
+    scored = sorted(
+        ((idx, _score_segment(segment, job_terms, keyword_patterns)) for idx, segment in enumerate(segments)),
+        key=lambda item: (-item[1], item[0])
+    )
+
+    selected, used_tokens = set(), 0
+    for idx, score in scored:
+        if score <= 0:
+            break
+        cost = estimate_token_count(segments[idx]) + 1
+        if used_tokens + cost > token_budget:
+            continue
+        selected.add(idx)
+        used_tokens += cost
+
+    if not selected:
+        # Nothing matched: fall back to the head of the document
+        return truncate_to_tokens(text, token_budget)
+
+    output, previous = [], None
+    for idx in sorted(selected):
+        if previous is not None and idx != previous + 1:
+            output.append("...")
+        output.append(segments[idx])
+        previous = idx
+    return "\n".join(output)
+
+def build_explanation_prompt(
+    job_description: str,
+    candidate_text: str,
+    similarity_score: float,
+    shap_explanation: Dict[str, Any],
+    bias_score: float,
+    keywords: Optional[List[str]] = None,
+    cv_token_budget: Optional[int] = None,
+    job_token_budget: Optional[int] = None
+) -> str:
+    if cv_token_budget is None:
+        cv_token_budget = MODEL_SETTINGS['prompt_cv_token_budget']
+    if job_token_budget is None:
+        job_token_budget = MODEL_SETTINGS['prompt_job_token_budget']
+
+    top_positive = shap_explanation.get('top_positive', [])
+    top_negative = shap_explanation.get('top_negative', [])
+    evidence_keywords = list(keywords or []) + extract_contributor_keywords(top_positive + top_negative)
+
+    job_excerpt = select_relevant_text(job_description, candidate_text, evidence_keywords, job_token_budget)
+    resume_excerpt = select_relevant_text(candidate_text, job_description, evidence_keywords, cv_token_budget)
+
+    logger.info(
+        f"Prompt context reduced from {estimate_token_count(job_description) + estimate_token_count(candidate_text)} "
+        f"to {estimate_token_count(job_excerpt) + estimate_token_count(resume_excerpt)} tokens"
+    )
+
+    pos_contributors = format_contributors_for_prompt(top_positive)
+    neg_contributors = format_contributors_for_prompt(top_negative)
+
+    return f"""
+    Analyze this candidate's match for the job using the following details:
+
+    - Job Description: {job_excerpt}
+    - Resume Excerpt: {resume_excerpt}
+    - Similarity Score: {similarity_score:.2f} out of 1.00
+    - Gender Bias Score: {bias_score:.1f} out of 100 (lower is better)
+    - SHAP Analysis Results:
+        Positive Contributors: {pos_contributors}
+        Negative Contributors: {neg_contributors}
+
+    Provide a structured evaluation of the candidate.
+    Your responses must be complete under 550 words, avoid being cut off mid-sentence, and make sure you follow the provided JSON structure.
+    """
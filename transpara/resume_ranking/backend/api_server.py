@@ -1,34 +1,50 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from main import main as run_pipeline
-
+import re
 import json
+import queue
 import tempfile
+import subprocess
+import threading
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any
-from firebase_admin import credentials, initialize_app, storage, firestore
-from src.utils.firebase_init import initialize_firebase
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from uuid import uuid4
+from src.utils.firebase_utils import get_firestore_client, get_storage_bucket
+from src.data.vector_index import get_candidate_index, get_job_index, make_candidate_key
+from src.utils.metrics import merge_run_metrics, render_prometheus, track_time
+from backend.report_index import REPORTS, ReportIndex, select_analysis
+from backend.response_cache import CachedResponse, ResponseCache, choose_encoding, file_versions
 
 app = FastAPI()
 
-initialize_firebase()
 
-firestore_db = firestore.client()
-bucket = storage.bucket()
+def run_pipeline(*args, **kwargs):
+    # Imported on first use: main pulls in the whole ranking stack
+    from main import run_pipeline as _run_pipeline
+    return _run_pipeline(*args, **kwargs)
+
+# Firestore auto-generated ids and similar: safe as a path component and a CLI argument
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
 
 # --- Request Schema ---
 class AnalyzeRequest(BaseModel):
     jobId: str
 
+class BatchAnalyzeRequest(BaseModel):
+    jobIds: List[str]
+
+@track_time("firebase_io")
 def download_candidate_pdfs(job_id: str, local_folder: str) -> int:
     """
     Downloads all candidate PDFs for a given jobId from Firebase Storage to local folder.
     """
     prefix = f"applications/{job_id}/"
-    blobs = bucket.list_blobs(prefix=prefix)
+    blobs = get_storage_bucket().list_blobs(prefix=prefix)
     count = 0
 
     for blob in blobs:
@@ -41,11 +57,12 @@ def download_candidate_pdfs(job_id: str, local_folder: str) -> int:
     return count
 
 
+@track_time("firebase_io")
 def download_job_description(job_id: str, output_path: str) -> bool:
     """
     Downloads job description text from Firestore for a given jobId.
     """
-    job_ref = firestore_db.collection("jobs").document(job_id)
+    job_ref = get_firestore_client().collection("jobs").document(job_id)
     job_data = job_ref.get()
     if not job_data.exists:
         return False
@@ -67,12 +84,65 @@ def load_json_report(path: str) -> Dict[str, Any]:
         return json.load(f)
 
 
-# --- API Route ---
-@app.post("/api/analyze-candidates")
-def analyze_candidates(request: AnalyzeRequest):
-    job_id = request.jobId
+# Looked up at call time so patching load_json_report also covers the index
+report_index = ReportIndex(lambda path: load_json_report(path))
+response_cache = ResponseCache()
+
+
+def _split_param(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def get_analysis_response(
+    job_id: str,
+    reports: Optional[str] = None,
+    top_k: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    candidate_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    The job's reports, selected and paginated through the report index.
+    """
+    output_dir = os.path.join("output", "reports", job_id)
+    try:
+        response = select_analysis(
+            report_index, output_dir, reports=_split_param(reports), top_k=top_k,
+            offset=offset, limit=limit, fields=_split_param(fields), candidate_id=candidate_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if candidate_id is not None and not response["pagination"]["total"]:
+        raise HTTPException(status_code=404, detail="Candidate not found in the analysis.")
+    return response
+
+
+def cached_json_response(request: Request, cached: CachedResponse) -> Response:
+    """
+    304 when the client's validators still match, else the body in the best
+    encoding the client accepts.
+    """
+    headers = cached.headers()
+    if cached.is_not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=headers)
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"), len(cached.body))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=cached.encoded(encoding), media_type="application/json", headers=headers)
+
 
-    # Create temp data directory for this request
+def prepare_job_inputs(job_id: str) -> Tuple[str, str]:
+    """
+    Downloads the job description and candidate PDFs into data/{job_id}.
+    Returns the candidate directory and the job description path.
+    """
+    if not JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job id.")
     temp_data_dir = os.path.join("data", job_id)
     os.makedirs(temp_data_dir, exist_ok=True)
 
@@ -87,37 +157,220 @@ def analyze_candidates(request: AnalyzeRequest):
     if num_cvs == 0:
         raise HTTPException(status_code=404, detail="No candidate resumes found in Firebase Storage.")
 
+    return temp_data_dir, job_desc_path
+
+
+@lru_cache(maxsize=1)
+def get_embedding_model():
+    from src.data.embeddings import load_mbert_model
+    return load_mbert_model()
+
+
+def get_job_embedding(job_id: str):
+    """
+    Returns the indexed job description embedding, embedding and indexing the
+    description on first use for jobs that have not been analyzed yet.
+    """
+    job_index = get_job_index()
+    job_index.reload_if_changed()
+    embedding = job_index.get_vector(job_id)
+    if embedding is not None:
+        return embedding
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        job_desc_path = os.path.join(tmp_dir, "job_desc.txt")
+        if not download_job_description(job_id, job_desc_path):
+            raise HTTPException(status_code=404, detail="Job description not found in Firestore.")
+        with open(job_desc_path, "r", encoding="utf-8") as f:
+            job_text = f.read()
+
+    from src.data.embeddings import get_text_embedding
+    from src.models.linguistic_debiasing import mitigate_gender_bias
+    from src.utils.file_utils import clean_html
+
+    tokenizer, model = get_embedding_model()
+    embedding = get_text_embedding(mitigate_gender_bias(clean_html(job_text)), tokenizer, model).cpu().numpy()
+    job_index.add([job_id], embedding, [{"job_id": job_id}])
+    job_index.save()
+    return embedding
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def stream_pipeline_events(job_desc_path: str, candidates_dir: str, job_id: str) -> Iterator[str]:
+    """
+    Runs the pipeline in a worker thread and yields its progress as server-sent events.
+    """
+    events: queue.Queue = queue.Queue()
+
+    def worker():
+        try:
+            run_pipeline(
+                job_desc_path, candidates_dir, job_id,
+                progress_callback=lambda stage, payload: events.put((stage, payload))
+            )
+        except Exception as e:
+            events.put(("error", {"job_id": job_id, "detail": str(e)}))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    while True:
+        item = events.get()
+        if item is None:
+            break
+        stage, payload = item
+        yield format_sse_event(stage, payload)
+
+
+# --- API Route ---
+@app.post("/api/analyze-candidates")
+def analyze_candidates(
+    request: AnalyzeRequest,
+    reports: Optional[str] = None,
+    top_k: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    candidate_id: Optional[str] = None
+):
+    job_id = request.jobId
+    temp_data_dir, job_desc_path = prepare_job_inputs(job_id)
+
     # Run backend pipeline
     print(f"Running pipeline for Job ID: {job_id}")
     pipeline_path = os.path.abspath("main.py")
     os.system(f"python {pipeline_path} --job_description {job_desc_path} --candidates_dir {temp_data_dir} --job_id {job_id}")
 
     output_dir = os.path.join("output", "reports", job_id)
-    return {
-        "ranking_results": load_json_report(os.path.join(output_dir, "ranking_results.json")),
-        "shap_explanations": load_json_report(os.path.join(output_dir, "shap_explanations.json")),
-        "chatgpt_explanations": load_json_report(os.path.join(output_dir, "chatgpt_explanations.json")),
-        "gender_bias_report": load_json_report(os.path.join(output_dir, "gender_bias_analysis.json")),
-        "candidate_texts": load_json_report(os.path.join(output_dir, "candidate_texts.json"))
-    }
+    # The pipeline ran in a child process; fold its stage timings into /metrics
+    run_metrics = load_json_report(os.path.join(output_dir, "job_metadata.json")).get("last_run_metrics")
+    if run_metrics:
+        merge_run_metrics(run_metrics)
+
+    return get_analysis_response(job_id, reports, top_k, offset, limit, fields, candidate_id)
+
+@app.post("/api/analyze-candidates/batch")
+def analyze_candidates_batch(request: BatchAnalyzeRequest):
+    """
+    Analyses many jobs in one pipeline process so the models and per-CV
+    artifacts are loaded once. Returns a status (and run metrics) per job;
+    the reports are read per job through /api/get-analysis.
+    """
+    jobs: Dict[str, Any] = {}
+    prepared = []
+    for job_id in dict.fromkeys(request.jobIds):
+        try:
+            prepare_job_inputs(job_id)
+            prepared.append(job_id)
+        except HTTPException as e:
+            jobs[job_id] = {"status": "error", "detail": e.detail}
+
+    summary: Dict[str, Any] = {}
+    if prepared:
+        print(f"Running batch pipeline for {len(prepared)} jobs")
+        summary_path = os.path.join("output", "reports", f"batch_summary_{uuid4().hex}.json")
+        pipeline_path = os.path.abspath("main.py")
+        missing_detail = "Pipeline did not report a result."
+        try:
+            subprocess.run(
+                [sys.executable, pipeline_path, "--job_ids", *prepared, "--batch_summary", summary_path],
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Batch pipeline exited with status {e.returncode}")
+            missing_detail = f"Pipeline exited with status {e.returncode}."
+        summary = load_json_report(summary_path)
+        if os.path.exists(summary_path):
+            os.remove(summary_path)
+
+    for job_id in prepared:
+        result = summary.get("jobs", {}).get(job_id, {"status": "error", "detail": missing_detail})
+        if result.get("metrics"):
+            merge_run_metrics(result["metrics"])
+        jobs[job_id] = result
+
+    return {"jobs": jobs, "distinct_cvs": summary.get("distinct_cvs", 0)}
+
+@app.get("/api/analyze-candidates/{job_id}/stream")
+def analyze_candidates_stream(job_id: str):
+    temp_data_dir, job_desc_path = prepare_job_inputs(job_id)
+    print(f"Streaming pipeline for Job ID: {job_id}")
+    return StreamingResponse(
+        stream_pipeline_events(job_desc_path, temp_data_dir, job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/get-analysis/{job_id}")
-def get_analysis(job_id: str):
+def get_analysis(
+    request: Request,
+    job_id: str,
+    reports: Optional[str] = None,
+    top_k: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    candidate_id: Optional[str] = None
+):
+    """
+    Query parameters (all optional; without them every report is returned in full):
+    reports: comma-separated report names, top_k: only the K best ranked candidates,
+    offset/limit: a page of candidates in ranking order, fields: comma-separated
+    entry fields to keep, candidate_id: a single candidate.
+
+    Serialized responses are cached until a report file changes and carry
+    ETag/Last-Modified headers, so polling clients get 304 replies.
+    """
     output_dir = os.path.join("output", "reports", job_id)
-    return {
-        "ranking_results": load_json_report(os.path.join(output_dir, "ranking_results.json")),
-        "shap_explanations": load_json_report(os.path.join(output_dir, "shap_explanations.json")),
-        "chatgpt_explanations": load_json_report(os.path.join(output_dir, "chatgpt_explanations.json")),
-        "gender_bias_report": load_json_report(os.path.join(output_dir, "gender_bias_analysis.json")),
-        "candidate_texts": load_json_report(os.path.join(output_dir, "candidate_texts.json"))
-    }
+    versions = file_versions([os.path.join(output_dir, file_name) for file_name, _ in REPORTS.values()])
+    key = (job_id, reports, top_k, offset, limit, fields, candidate_id)
+
+    cached = response_cache.get(key, versions)
+    if cached is None:
+        content = get_analysis_response(job_id, reports, top_k, offset, limit, fields, candidate_id)
+        mtimes = [version[0] / 1e9 for version in versions if version is not None]
+        cached = CachedResponse(content, max(mtimes) if mtimes else None)
+        # Jobs without any report yet are not cached
+        if mtimes:
+            response_cache.put(key, versions, cached)
+    return cached_json_response(request, cached)
+
+@app.get("/api/best-applicants/{job_id}")
+def get_best_applicants(job_id: str, k: int = 10, include_own: bool = False):
+    """
+    Existing applicants from every job whose CVs are closest to this job description.
+    """
+    candidate_index = get_candidate_index()
+    candidate_index.reload_if_changed()
+    job_embedding = get_job_embedding(job_id)
+
+    exclude_job_ids = None if include_own else [job_id]
+    return {"job_id": job_id, "candidates": candidate_index.search(job_embedding, k=k, exclude_job_ids=exclude_job_ids)}
+
+@app.get("/api/similar-candidates/{job_id}/{user_id}")
+def get_similar_candidates(job_id: str, user_id: str, k: int = 10):
+    candidate_index = get_candidate_index()
+    candidate_index.reload_if_changed()
+    try:
+        similar = candidate_index.similar_to(make_candidate_key(job_id, user_id), k=k)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Candidate has not been indexed yet.")
+    return {"job_id": job_id, "user_id": user_id, "candidates": similar}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
 @app.get("/api/analysis-metadata/{job_id}")
 def get_analysis_metadata(job_id: str):
-    doc_ref = firestore_db.collection("jobs").document(job_id).collection("analysis_metadata").document("summary")
+    doc_ref = get_firestore_client().collection("jobs").document(job_id).collection("analysis_metadata").document("summary")
     doc = doc_ref.get()
     if doc.exists:
         return doc.to_dict()
@@ -0,0 +1,135 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Response key -> (report file, key of its per-candidate list)
+REPORTS = {
+    "ranking_results": ("ranking_results.json", "ranking"),
+    "shap_explanations": ("shap_explanations.json", "shap"),
+    "chatgpt_explanations": ("chatgpt_explanations.json", "explanations"),
+    "gender_bias_report": ("gender_bias_analysis.json", "candidate_analysis"),
+    "candidate_texts": ("candidate_texts.json", "texts")
+}
+
+class IndexedReport:
+    """
+    A loaded report with its per-candidate entries looked up by candidate id.
+    """
+
+    def __init__(self, report: Dict[str, Any], list_key: str):
+        self.report = report
+        self.list_key = list_key
+        entries = report.get(list_key) if isinstance(report, dict) else None
+        self.entries: List[Dict[str, Any]] = entries if isinstance(entries, list) else []
+        self.positions: Dict[str, int] = {}
+        for position, entry in enumerate(self.entries):
+            if isinstance(entry, dict) and "id" in entry:
+                self.positions.setdefault(entry["id"], position)
+        # Candidate ids by rank where the report has ranks, else in report order
+        ranked = sorted(self.positions.items(), key=lambda item: (self.entries[item[1]].get("rank", item[1]), item[1]))
+        self.order = [candidate_id for candidate_id, _ in ranked]
+
+    def select(self, candidate_ids: Optional[List[str]] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        if not isinstance(self.report, dict) or self.list_key not in self.report:
+            return self.report
+
+        if candidate_ids is None:
+            entries = self.entries
+        else:
+            entries = [self.entries[self.positions[candidate_id]] for candidate_id in candidate_ids if candidate_id in self.positions]
+        if fields:
+            keys = list(dict.fromkeys(["id"] + fields))
+            entries = [{key: entry[key] for key in keys if key in entry} for entry in entries]
+
+        return {key: (entries if key == self.list_key else value) for key, value in self.report.items()}
+
+class ReportIndex:
+    """
+    Indexed JSON reports keyed by path and reloaded when the file's mtime or
+    size changes. Missing files are never cached, so a report written by a
+    later pipeline run is picked up on the next request.
+    """
+
+    def __init__(self, loader: Callable[[str], Dict[str, Any]], max_reports: int = 256):
+        self._loader = loader
+        self.max_reports = max_reports
+        self._lock = threading.Lock()
+        self._reports: "OrderedDict[str, Tuple[Tuple[int, int], IndexedReport]]" = OrderedDict()
+
+    def get(self, path: str, list_key: str) -> IndexedReport:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return IndexedReport(self._loader(path), list_key)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._reports.get(path)
+            if cached is not None and cached[0] == version:
+                self._reports.move_to_end(path)
+                return cached[1]
+
+        indexed = IndexedReport(self._loader(path), list_key)
+        with self._lock:
+            self._reports[path] = (version, indexed)
+            self._reports.move_to_end(path)
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+        return indexed
+
+    def clear(self):
+        with self._lock:
+            self._reports.clear()
+
+def select_analysis(
+    index: ReportIndex,
+    output_dir: str,
+    reports: Optional[List[str]] = None,
+    top_k: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    candidate_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    The job's reports, optionally restricted to some reports, to the top-K
+    ranked candidates, to a page of candidates (in ranking order), to a single
+    candidate and to some fields of each per-candidate entry. Without any
+    selection the reports are returned in full, as stored.
+    """
+    names = list(REPORTS) if not reports else list(dict.fromkeys(reports))
+    unknown = [name for name in names if name not in REPORTS]
+    if unknown:
+        raise ValueError(f"Unknown reports: {', '.join(unknown)}. Available: {', '.join(REPORTS)}")
+    if offset < 0 or (limit is not None and limit < 0) or (top_k is not None and top_k < 0):
+        raise ValueError("top_k, offset and limit must not be negative.")
+
+    indexed = {name: index.get(os.path.join(output_dir, REPORTS[name][0]), REPORTS[name][1]) for name in names}
+    paginate = top_k is not None or offset > 0 or limit is not None or candidate_id is not None
+    if not paginate and not fields:
+        return {name: indexed[name].report for name in names}
+
+    response: Dict[str, Any] = {}
+    selected = None
+    if paginate:
+        ranking = indexed.get("ranking_results")
+        if ranking is None:
+            ranking = index.get(os.path.join(output_dir, REPORTS["ranking_results"][0]), REPORTS["ranking_results"][1])
+        # Ranked candidates first, then any only present in the other reports
+        order = list(dict.fromkeys(ranking.order + [cid for report in indexed.values() for cid in report.order]))
+        if top_k is not None:
+            order = order[:top_k]
+        if candidate_id is not None:
+            order = [cid for cid in order if cid == candidate_id]
+        selected = order[offset:] if limit is None else order[offset:offset + limit]
+        response["pagination"] = {
+            "total": len(order),
+            "offset": offset,
+            "limit": limit,
+            "returned": len(selected)
+        }
+
+    for name in names:
+        response[name] = indexed[name].select(selected, fields)
+    return response
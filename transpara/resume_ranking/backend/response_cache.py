@@ -0,0 +1,135 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+FileVersion = Optional[Tuple[int, int]]
+
+def file_versions(paths: List[str]) -> Tuple[FileVersion, ...]:
+    """
+    (mtime in ns, size) of each file, or None for missing files.
+    """
+    versions = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            versions.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            versions.append(None)
+    return tuple(versions)
+
+class CachedResponse:
+    """
+    A serialized JSON response with its validators and, built on first use,
+    its gzip and brotli encodings.
+    """
+
+    def __init__(self, content: Any, last_modified: Optional[float] = None):
+        # Same separators as FastAPI's JSONResponse
+        self.body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        # Weak: the compressed encodings share the tag
+        self.etag = 'W/"' + hashlib.md5(self.body).hexdigest() + '"'
+        self.last_modified = last_modified
+        self._encoded: Dict[str, bytes] = {"identity": self.body}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: str) -> bytes:
+        with self._lock:
+            if encoding not in self._encoded:
+                if encoding == "br":
+                    self._encoded[encoding] = brotli.compress(self.body, quality=5)
+                else:
+                    self._encoded[encoding] = gzip.compress(self.body, compresslevel=6)
+            return self._encoded[encoding]
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = formatdate(self.last_modified, usegmt=True)
+        return headers
+
+    def is_not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(_strip_weak(tag) == _strip_weak(self.etag) for tag in tags)
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.last_modified) <= since
+        return False
+
+def _strip_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+def choose_encoding(accept_encoding: Optional[str], body_size: int) -> str:
+    """
+    br (when the brotli package is installed) or gzip if the client accepts
+    them, else identity.
+    """
+    if not accept_encoding or body_size < MIN_COMPRESS_SIZE:
+        return "identity"
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    def accepts(encoding: str) -> bool:
+        return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and accepts("br"):
+        return "br"
+    if accepts("gzip"):
+        return "gzip"
+    return "identity"
+
+class ResponseCache:
+    """
+    LRU of serialized responses. An entry stays valid while the files it was
+    built from keep the (mtime, size) versions it was stored with.
+    """
+
+    def __init__(self, max_responses: int = 128):
+        self.max_responses = max_responses
+        self._lock = threading.Lock()
+        self._responses: "OrderedDict[Hashable, Tuple[Tuple[FileVersion, ...], CachedResponse]]" = OrderedDict()
+
+    def get(self, key: Hashable, versions: Tuple[FileVersion, ...]) -> Optional[CachedResponse]:
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is None or cached[0] != versions:
+                return None
+            self._responses.move_to_end(key)
+            return cached[1]
+
+    def put(self, key: Hashable, versions: Tuple[FileVersion, ...], response: CachedResponse):
+        with self._lock:
+            self._responses[key] = (versions, response)
+            self._responses.move_to_end(key)
+            while len(self._responses) > self.max_responses:
+                self._responses.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._responses.clear()
@@ -0,0 +1,300 @@
+# python -m benchmarks.run_benchmarks --limit 100
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from config.settings import DEFAULT_SKILLS, MODEL_SETTINGS
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_CORPUS_DIR = os.path.abspath(os.path.join(BENCHMARK_DIR, "..", "..", "resume_generator", "output"))
+DEFAULT_JOB_DESCRIPTION = os.path.abspath(os.path.join(BENCHMARK_DIR, "..", "data", "job_desc", "data.txt"))
+STAGES = [
+    "pdf_extraction", "neutralization", "keyword_matching", "embedding",
+    "feature_building", "training", "prediction", "shap"
+]
+TRAINING_MODES = ["grid", "fast"]
+
+def stub_external_services() -> ExitStack:
+    """
+    Replaces Firebase and OpenAI entry points with mocks so no stage can reach the network.
+    """
+    stack = ExitStack()
+    for target in [
+        "src.utils.firebase_utils.get_firestore_client",
+        "src.utils.firebase_utils.get_storage_bucket",
+        "src.utils.firebase_utils.upload_json_to_firebase",
+        "src.utils.firebase_utils.load_json_from_firebase",
+        "api.openai_client.initialize_openai_client",
+        "api.openai_client.get_completion"
+    ]:
+        stack.enter_context(mock.patch(target, mock.MagicMock(name=target)))
+    stack.enter_context(mock.patch.dict(os.environ, {"OPENAI_API_KEY": ""}))
+    return stack
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return round(max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024, 1)
+
+def measure_stage(
+    name: str, fn: Callable[[], Any], num_docs: int, repeat: int = 1, measure_memory: bool = True
+) -> (Dict[str, Any], Any):
+    """
+    Times `fn` (best of `repeat` runs) and then measures its peak traced memory in
+    a separate run, since tracemalloc slows down Python-heavy stages.
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    peak = None
+    if measure_memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    seconds = min(timings)
+    stats = {
+        "docs": num_docs,
+        "seconds": round(seconds, 4),
+        "docs_per_sec": round(num_docs / seconds, 2) if seconds > 0 else None,
+        "peak_traced_mb": round(peak / (1024 * 1024), 2) if peak is not None else None,
+        "max_rss_mb": _max_rss_mb()
+    }
+    memory = f", peak {stats['peak_traced_mb']} MB traced" if peak is not None else ""
+    print(f"- {name}: {stats['docs_per_sec']} docs/s{memory}")
+    return stats, result
+
+def run_benchmarks(
+    corpus_dir: str = DEFAULT_CORPUS_DIR,
+    job_description_path: str = DEFAULT_JOB_DESCRIPTION,
+    limit: Optional[int] = None,
+    stages: Optional[List[str]] = None,
+    repeat: int = 1,
+    measure_memory: bool = True,
+    training_modes: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Times each selected stage over the corpus. Training is timed once per mode in
+    `training_modes` (MODEL_SETTINGS['training_mode'] by default) and recorded as
+    "training_<mode>"; prediction and SHAP use the model of the first mode.
+    """
+    from src.data.document_extraction import extract_text_from_pdf
+    from src.utils.io_utils import load_job_description
+    from src.utils.text_utils import extract_matched_keywords
+
+    stages = stages or STAGES
+    training_modes = training_modes or [MODEL_SETTINGS['training_mode']]
+    pdf_files = sorted(os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir) if name.lower().endswith(".pdf"))
+    if limit:
+        pdf_files = pdf_files[:limit]
+    if not pdf_files:
+        raise FileNotFoundError(f"No PDFs found in {corpus_dir}")
+    job_text = load_job_description(job_description_path)
+    num_docs = len(pdf_files)
+    results: Dict[str, Any] = {}
+
+    print(f"Benchmarking {num_docs} CVs from {corpus_dir}")
+
+    # Every later stage needs the texts, so extraction always runs
+    if "pdf_extraction" in stages:
+        results["pdf_extraction"], texts = measure_stage(
+            "pdf_extraction", lambda: [extract_text_from_pdf(path) for path in pdf_files], num_docs, repeat, measure_memory
+        )
+    else:
+        texts = [extract_text_from_pdf(path) for path in pdf_files]
+
+    if "keyword_matching" in stages:
+        results["keyword_matching"], _ = measure_stage(
+            "keyword_matching", lambda: [extract_matched_keywords(text, DEFAULT_SKILLS) for text in texts], num_docs, repeat, measure_memory
+        )
+
+    if "neutralization" in stages:
+        from src.models.linguistic_debiasing import mitigate_gender_bias
+
+        mitigate_gender_bias(texts[0])  # load spaCy outside the timed region
+        results["neutralization"], _ = measure_stage(
+            "neutralization", lambda: [mitigate_gender_bias(text) for text in texts], num_docs, repeat, measure_memory
+        )
+
+    model_stages = [stage for stage in stages if stage in ("embedding", "feature_building", "training", "prediction", "shap")]
+    if not model_stages:
+        return results
+
+    from src.data.embeddings import (
+        load_mbert_model, get_text_embedding, create_feature_vectors_dataset, cosine_similarity_matrix, to_embedding_matrix
+    )
+    from src.models.embedding_debiasing import compute_gender_subspace
+
+    tokenizer, model = load_mbert_model()
+    gender_directions = compute_gender_subspace(tokenizer, model)
+
+    embed = lambda: to_embedding_matrix([get_text_embedding(text, tokenizer, model) for text in texts])
+    if "embedding" in stages:
+        results["embedding"], cv_embeddings = measure_stage("embedding", embed, num_docs, repeat, measure_memory)
+    else:
+        cv_embeddings = embed()
+    job_embedding = get_text_embedding(job_text, tokenizer, model)
+
+    keywords = sorted(set(DEFAULT_SKILLS))
+    ratios = np.array([len(extract_matched_keywords(text, keywords)) for text in texts]) / len(keywords)
+    cosine = cosine_similarity_matrix(cv_embeddings, job_embedding)[:, 0].astype(np.float64)
+    labels = (0.6 * cosine + 0.4 * ratios).tolist()
+
+    build = lambda: create_feature_vectors_dataset(
+        job_embedding, cv_embeddings, texts,
+        gender_directions=gender_directions,
+        skill_keywords=keywords,
+        similarity_scores=labels
+    )
+    if "feature_building" in stages:
+        results["feature_building"], features_df = measure_stage("feature_building", build, num_docs, repeat, measure_memory)
+    else:
+        features_df = build()
+
+    if not any(stage in stages for stage in ("training", "prediction", "shap")):
+        return results
+
+    from training.train_model import train_ranking_model
+    from src.models.ranking_model import predict_with_ranking_model
+    from src.analysis.shap_explanation import generate_model_explanations, load_tree_explainer
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_folders = {"models": tmp_dir, "reports": tmp_dir}
+        models = {}
+        for mode in training_modes if "training" in stages else training_modes[:1]:
+            path = os.path.join(tmp_dir, f"ranking_model_{mode}.joblib")
+            train = lambda: train_ranking_model(features_df, save_path=path, output_folders=output_folders, training_mode=mode)[0]
+            if "training" in stages:
+                # Labelled by mode so a baseline only compares like with like
+                results[f"training_{mode}"], models[mode] = measure_stage(f"training_{mode}", train, num_docs, measure_memory=measure_memory)
+            else:
+                models[mode] = train()
+        model_path = os.path.join(tmp_dir, f"ranking_model_{training_modes[0]}.joblib")
+        ranking_model = models[training_modes[0]]
+
+        X = features_df.drop(columns="target_score")
+        feature_names = list(X.columns)
+        if "prediction" in stages:
+            results["prediction"], _ = measure_stage(
+                "prediction", lambda: predict_with_ranking_model(ranking_model, X), num_docs, repeat, measure_memory
+            )
+        if "shap" in stages:
+            explainer = load_tree_explainer(ranking_model, model_path)
+            results["shap"], _ = measure_stage(
+                "shap", lambda: generate_model_explanations(ranking_model, feature_names, X, explainer=explainer), num_docs, repeat, measure_memory
+            )
+    return results
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Returns a description of every stage that got slower or used more memory than
+    the baseline by more than `threshold` (a fraction).
+    """
+    regressions = []
+    for stage, current in results.items():
+        reference = baseline.get("stages", {}).get(stage)
+        if not reference:
+            continue
+        if reference.get("docs_per_sec") and current.get("docs_per_sec") is not None:
+            if current["docs_per_sec"] < reference["docs_per_sec"] * (1 - threshold):
+                regressions.append(
+                    f"{stage}: {current['docs_per_sec']} docs/s vs baseline {reference['docs_per_sec']} docs/s"
+                )
+        if reference.get("peak_traced_mb") and current.get("peak_traced_mb") is not None \
+                and current["peak_traced_mb"] > reference["peak_traced_mb"] * (1 + threshold):
+            regressions.append(
+                f"{stage}: peak {current['peak_traced_mb']} MB vs baseline {reference['peak_traced_mb']} MB"
+            )
+    return regressions
+
+def _environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage-level benchmarks over the generated CV corpus")
+    parser.add_argument('--corpus_dir', type=str, default=DEFAULT_CORPUS_DIR)
+    parser.add_argument('--job_description', type=str, default=DEFAULT_JOB_DESCRIPTION)
+    parser.add_argument('--limit', type=int, default=None, help="Only use the first N PDFs")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=None)
+    parser.add_argument('--training_modes', nargs='+', choices=TRAINING_MODES, default=None,
+                        help="Training modes to time (default: MODEL_SETTINGS['training_mode'])")
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per stage; the fastest is kept")
+    parser.add_argument('--skip_memory', action='store_true', help="Skip the tracemalloc pass and only record timings")
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed regression as a fraction of the baseline")
+    parser.add_argument('--update_baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--output', type=str, default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with stub_external_services():
+        stages = run_benchmarks(
+            args.corpus_dir, args.job_description, args.limit, args.stages, args.repeat, not args.skip_memory,
+            args.training_modes
+        )
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "environment": _environment(),
+        "stages": stages
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}. Run with --update_baseline to record one.")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != report["environment"]:
+        print("⚠️ Baseline was recorded on a different environment; comparisons may be noisy.")
+
+    regressions = compare_to_baseline(stages, baseline, args.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} regressions beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"- {regression}")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,11 +9,17 @@ OUTPUT_PATHS = {
     'reports': os.path.join(OUTPUT_DIR, 'reports')
 }
 
+GLOBAL_MODEL_PATH = os.path.join(OUTPUT_DIR, "models", "global", "ranking_model.joblib")
+VECTOR_INDEX_DIR = os.path.join(OUTPUT_DIR, "vector_index")
+EMBEDDING_STORE_DIR = os.path.join(OUTPUT_DIR, "embedding_store")
+
 MODEL_SETTINGS = {
     'embedding_model': 'bert-base-multilingual-cased',
     'max_length': 512,
     'pooling': 'cls',
     'lambda_bias': 1.0,
+    # Rows per block in cosine_similarity_matrix; bounds temporary memory
+    'similarity_block_size': 4096,
     
     'gbm_params': {
         'n_estimators': [50, 100, 200],
@@ -21,17 +27,101 @@ MODEL_SETTINGS = {
         'max_depth': [3, 4, 5],
         'min_samples_split': [2, 5]
     },
-    
+
+    # 'grid' runs the exhaustive GridSearchCV above; 'fast' runs successive halving
+    # over HistGradientBoostingRegressor with early stopping and parallel folds
+    'training_mode': 'grid',
+    'fast_search_params': {
+        'learning_rate': [0.03, 0.05, 0.1, 0.2],
+        'max_depth': [3, 4, 5, None],
+        'max_leaf_nodes': [15, 31, 63],
+        'min_samples_leaf': [5, 10, 20],
+        'l2_regularization': [0.0, 0.1, 1.0]
+    },
+    'fast_search_candidates': 24,
+    'fast_search_max_iter': 500,
+    'training_n_jobs': -1,
+
+    # 'job' trains a model per job description; 'global' scores with the
+    # job-agnostic model at GLOBAL_MODEL_PATH and never trains on the request path
+    'ranking_mode': 'job',
+
+    # Reuse the previous job model when a job description is edited
+    'warm_start_retraining': True,
+    'warm_start_extra_estimators': 50,
+    # Chained warm starts stop adding trees here and refit from scratch instead
+    'warm_start_max_estimators': 400,
+
+    # Retrain in a detached worker process and keep ranking with the latest ready
+    # registry version (single-job runs only; batch runs train in-process);
+    # bump model_code_version when feature extraction changes
+    'background_training': True,
+    'model_code_version': '1',
+
+    # Two-stage ranking: above this many CVs, a cosine + keyword prefilter picks
+    # the shortlist that gets features, GBM scores, SHAP and reports (None disables)
+    'rerank_top_m': 500,
+
+    # Memory-mapped archive of training CV embeddings keyed by text hash;
+    # 'float32', 'float16' or 'int8' (per-row scale)
+    'embedding_store_dtype': 'float16',
+    'cache_training_embeddings': True,
+
+    # Cross-job candidate embedding index; 'auto' switches to hnswlib (if
+    # installed) once the index holds hnsw_min_size CVs
+    'vector_index_backend': 'auto',
+    # Storage dtype of the index; float32 rows are scored straight off the
+    # memory map, float16 rows are converted block by block first (about 5x
+    # slower exact search on CPUs), int8 sits in between
+    'vector_index_dtype': 'float32',
+    'vector_index_chunk_size': 4096,
+    'hnsw_min_size': 20000,
+    'hnsw_m': 16,
+    'hnsw_ef_construction': 200,
+    'hnsw_ef_search': 64,
+
+    # Streaming pipeline (--streaming): extraction, debiasing, embedding and
+    # featurization run as concurrent stages on micro-batches of this many CVs,
+    # with at most streaming_queue_size batches waiting between stages
+    'streaming_pipeline': False,
+    'streaming_batch_size': 16,
+    'streaming_queue_size': 4,
+
+    # Near-duplicate CVs (MinHash + LSH over word shingles): a CV whose estimated
+    # Jaccard similarity to an earlier one reaches dedup_threshold reuses its
+    # embedding, features, bias score and explanations
+    'dedup_enabled': True,
+    'dedup_threshold': 0.9,
+    'dedup_num_perm': 128,
+    'dedup_shingle_size': 5,
+
     'sample_dims': 50,
     
     'shap_nsamples': 500,
     'top_contributors': 10,
+    'plot_max_features': 20,
+    'plot_max_samples': 200,
     
     'gpt_model': 'gpt-4o-mini',
     'gpt_temperature': 0.2,
-    'gpt_max_tokens': 800
+    'gpt_max_tokens': 800,
+    'prompt_cv_token_budget': 600,
+    'prompt_job_token_budget': 400
 }
 
+# Cold-import budgets in seconds, checked by tests/test_import_time.py
+IMPORT_TIME_BUDGETS = {
+    'main': 1.5,
+    'backend.api_server': 2.5,
+    'tests.conftest': 3.0
+}
+
+# Modules that must only be imported on first use
+LAZY_MODULES = [
+    "torch", "transformers", "shap", "matplotlib", "spacy", "sklearn",
+    "firebase_admin", "openai", "pdfplumber", "pytesseract", "tiktoken"
+]
+
 DEFAULT_SKILLS = [
     # ─────────────────────────────── Programming Languages ───────────────────────────────
     "python", "java", "javascript", "typescript", "c", "c++", "c#", "go", "rust",
@@ -2,27 +2,255 @@ import os
 import argparse
 import json
 from src.data.embeddings import load_mbert_model
+from src.data.candidate_stream import stream_candidate_features
+from src.data.candidate_cache import CandidateArtifactCache, build_candidate_features
+from src.data.vector_index import index_job_embeddings
 from src.models.ranking_model import rank_candidates, display_ranking, load_ranking_model
+from src.models.embedding_debiasing import compute_embedding_associations
 from src.utils.io_utils import load_candidate_pdfs, load_job_description
 from src.analysis.chatgpt_explanation import generate_chatgpt_explanations
 from src.analysis.gender_analysis import analyze_gender_bias_distribution
 from src.analysis.shap_explanation import generate_shap_explanations
-from src.utils.file_utils import clean_html, load_from_json, save_to_json
+from src.utils.file_utils import clean_html, extract_user_id, load_from_json, save_to_json
 from src.utils.text_utils import compute_text_hash, extract_matched_keywords
 from src.utils.job_desc_keyword_extraction import extract_keywords_from_job_description
-from src.utils.firebase_utils import load_json_from_firebase
-from training.train_model import prepare_training_data, train_ranking_model
-from firebase_admin import firestore
+from src.utils.firebase_utils import load_json_from_firebase, get_firestore_client
+from src.utils.plot_renderer import wait_for_plots
+from src.utils.metrics import record_run, track_time
+from src.models.model_registry import (
+    compute_model_version, get_latest_ready_version, get_version_model_path,
+    keywords_from_model, publish_model_version, start_training_worker, training_lock
+)
+from config.settings import MODEL_SETTINGS, GLOBAL_MODEL_PATH
 from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+def _emit_progress(progress_callback: Optional[Callable[[str, Dict[str, Any]], None]], stage: str, payload: Dict[str, Any]):
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(stage, payload)
+    except Exception as e:
+        print(f"⚠️ Progress callback failed for stage '{stage}': {e}")
+
+class PipelineResources:
+    """
+    Everything that does not depend on the job, loaded once and shared by all
+    jobs of a batch run: the embedding model, the gender subspace, the training
+    corpus and per-CV artifacts.
+    """
+
+    def __init__(self):
+        from src.models.embedding_debiasing import compute_gender_subspace
+
+        self.tokenizer, self.model = load_mbert_model()
+        self.gender_directions = compute_gender_subspace(self.tokenizer, self.model)
+        self.candidates = CandidateArtifactCache(self.tokenizer, self.model)
+        self._training_texts: Optional[List[str]] = None
+
+    def training_texts(self) -> List[str]:
+        # Loaded by the first job that retrains, then shared by the rest of the batch
+        if self._training_texts is None:
+            print(f"Loading training data from: {_training_data_dir()}")
+            _, self._training_texts = load_candidate_pdfs(_training_data_dir())
+        return self._training_texts
+
+    def candidate_features(self, candidates_dir: str, job_description_text: str, keywords: List[str], feature_schema: str) -> Dict[str, Any]:
+        return build_candidate_features(
+            self.candidates, candidates_dir, job_description_text, keywords, feature_schema, self.gender_directions
+        )
+
+def _training_data_dir() -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(script_dir, ".."))
+    return os.path.join(project_root, "resume_generator", "output")
+
+def _load_or_extract_keywords(job_id: str, job_description_text: str, keywords_path: str, refresh: bool) -> List[str]:
+    if not refresh:
+        try:
+            saved_keywords = load_json_from_firebase(job_id, "keywords.json").get("keywords", [])
+            print("☁️ Loaded GPT keywords from Firebase Storage.")
+            return sorted(saved_keywords)
+        except Exception as e:
+            print(f"⚠️ Failed to load keywords from Firebase Storage: {e}")
+            print("⏳ Re-extracting keywords using GPT...")
+    else:
+        print("Extracting keywords from job description using GPT...")
+
+    sorted_gpt_keywords = sorted(extract_keywords_from_job_description(job_description_text))
+    save_to_json({
+        "job_id": job_id,
+        "keywords": sorted_gpt_keywords
+    }, keywords_path, upload_to_firebase=True)
+    return sorted_gpt_keywords
+
+def _train_job_model_version(
+    job_description_text: str,
+    keywords: List[str],
+    tokenizer,
+    model,
+    output_folders: Dict[str, str],
+    job_hash: str,
+    previous_model_path: Optional[str] = None,
+    training_texts: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Trains the model for one job into its own registry version and publishes it.
+    Safe to run on a background thread: ranking keeps reading the previous version
+    until the `current.json` pointer is swapped.
+    """
+    from training.train_model import prepare_training_data, train_ranking_model, warm_start_ranking_model
+    from src.data.embedding_store import get_embedding_store
+
+    version = compute_model_version(job_hash, keywords)
+    version_model_path = get_version_model_path(output_folders["models"], version)
+    os.makedirs(os.path.dirname(version_model_path), exist_ok=True)
+
+    # Load full training CVs
+    if training_texts is None:
+        training_data_dir = _training_data_dir()
+        print(f"Loading training data from: {training_data_dir}")
+        training_files, training_texts = load_candidate_pdfs(training_data_dir)
+
+    print("Preparing training data using extracted keywords...")
+    training_df = prepare_training_data(
+        job_description_text=job_description_text,
+        candidate_texts=training_texts,
+        tokenizer=tokenizer,
+        model=model,
+        skill_keywords=keywords,
+        gender_directions=None,
+        synthetic=True,
+        embedding_store=get_embedding_store() if MODEL_SETTINGS['cache_training_embeddings'] else None
+    )
+
+    previous_model = None
+    if previous_model_path and MODEL_SETTINGS['warm_start_retraining']:
+        try:
+            previous_model = load_ranking_model(previous_model_path)
+        except Exception as e:
+            print(f"⚠️ Could not load previous model for warm start: {e}")
+
+    with track_time("training"):
+        if previous_model is not None:
+            print("Warm-starting ranking model from the previous job model...")
+            _, _, training_strategy = warm_start_ranking_model(
+                features_df=training_df,
+                previous_model=previous_model,
+                save_path=version_model_path,
+                output_folders=output_folders
+            )
+        else:
+            print("Training ranking model...")
+            train_ranking_model(
+                features_df=training_df,
+                save_path=version_model_path,
+                output_folders=output_folders
+            )
+            training_strategy = "full_search"
+
+    return publish_model_version(output_folders["models"], version, job_hash, keywords, training_strategy)
+
+def _rank_and_report(
+    job_description_text: str,
+    candidate_files: List[str],
+    candidate_texts: List[str],
+    tokenizer,
+    model,
+    output_folders: Dict[str, str],
+    job_id: str,
+    ranking_model: Any,
+    keywords: List[str],
+    model_path: str,
+    feature_schema: str = "job",
+    progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    rescore: bool = False,
+    precomputed: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    results = rank_candidates(
+        job_description_text,
+        candidate_texts,
+        candidate_files,
+        tokenizer,
+        model,
+        output_folders,
+        job_id,
+        custom_model=ranking_model,
+        custom_keywords=keywords,
+        progress_callback=lambda ranking: _emit_progress(progress_callback, "ranking", ranking),
+        feature_schema=feature_schema,
+        model_path=model_path,
+        replace_existing=rescore,
+        precomputed=precomputed
+    )
+
+    display_ranking(job_id)
+
+    print("\nRunning SHAP explanations...")
+    generate_shap_explanations(
+        candidate_files, results["explanations"], output_folders, job_id,
+        on_entry=lambda entry: _emit_progress(progress_callback, "shap", entry),
+        replace_existing=rescore
+    )
+    return results
+
+def run_pipeline(
+    job_description_path: str,
+    candidates_dir: str,
+    job_id: str,
+    progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ranking_mode: Optional[str] = None,
+    streaming: Optional[bool] = None,
+    resources: Optional[PipelineResources] = None
+):
+    with record_run(job_id) as run_metrics:
+        _run_pipeline(job_description_path, candidates_dir, job_id, progress_callback, ranking_mode, streaming, resources)
+
+    metrics = run_metrics.to_dict()
+    metadata_path = os.path.join("output", "reports", job_id, "job_metadata.json")
+    try:
+        metadata = load_from_json(metadata_path) if os.path.exists(metadata_path) else {"job_id": job_id}
+        metadata["last_run_metrics"] = metrics
+        save_to_json(metadata, metadata_path)
+    except Exception as e:
+        print(f"⚠️ Failed to save run metrics: {e}")
+
+    print("\n⏱️ Stage timings:")
+    for stage, entry in metrics["stages"].items():
+        print(f"- {stage}: {entry['total_seconds']:.2f}s over {entry['count']} calls")
+    _emit_progress(progress_callback, "metrics", metrics)
+    _emit_progress(progress_callback, "complete", {"job_id": job_id})
+    return metrics
+
+def _run_pipeline(
+    job_description_path: str,
+    candidates_dir: str,
+    job_id: str,
+    progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ranking_mode: Optional[str] = None,
+    streaming: Optional[bool] = None,
+    resources: Optional[PipelineResources] = None
+):
+    if ranking_mode is None:
+        ranking_mode = MODEL_SETTINGS['ranking_mode']
+    if streaming is None:
+        streaming = MODEL_SETTINGS['streaming_pipeline']
 
-def run_pipeline(job_description_path: str, candidates_dir: str, job_id: str):
     job_description_text = load_job_description(job_description_path)
     job_description_text = clean_html(job_description_text)
     print("\nJob description text:", job_description_text)
 
     current_hash = compute_text_hash(job_description_text)
-    candidate_files, candidate_texts = load_candidate_pdfs(candidates_dir)
-    tokenizer, model = load_mbert_model()
+    if streaming or resources is not None:
+        # Candidates are prepared once the keywords and model are known
+        candidate_files = candidate_texts = None
+    else:
+        candidate_files, candidate_texts = load_candidate_pdfs(candidates_dir)
+        _emit_progress(progress_callback, "extraction", {
+            "job_id": job_id,
+            "num_candidates": len(candidate_files)
+        })
+    tokenizer, model = (resources.tokenizer, resources.model) if resources is not None else load_mbert_model()
 
     output_folders = {
         "models": os.path.join("output", "models", job_id),
@@ -42,135 +270,282 @@ def run_pipeline(job_description_path: str, candidates_dir: str, job_id: str):
 
     retrain_required = current_hash != old_hash
     print(f"Job description hash changed? {retrain_required}")
+    keywords_path = os.path.join(output_folders["reports"], "keywords.json")
+    feature_schema = "job"
+    latest_version = get_latest_ready_version(output_folders["models"])
+    model_path = latest_version["model_path"] if latest_version else os.path.join(output_folders["models"], "ranking_model.joblib")
+    start_background_worker = False
 
-    if retrain_required:
-        print("Extracting keywords from job description using GPT...")
-        gpt_keywords = extract_keywords_from_job_description(job_description_text)
-        sorted_gpt_keywords = sorted(gpt_keywords)
-
-        # Save extracted keywords
-        keywords_path = os.path.join(output_folders["reports"], "keywords.json")
-        save_to_json({
-            "job_id": job_id,
-            "keywords": sorted_gpt_keywords
-        }, keywords_path, upload_to_firebase=True)
-
-        # Load full training CVs
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.abspath(os.path.join(script_dir, ".."))
-        training_data_dir = os.path.join(project_root, "resume_generator", "output")
-
-        print(f"Loading training data from: {training_data_dir}")
-        training_files, training_texts = load_candidate_pdfs(training_data_dir)
+    if ranking_mode == "global" and not os.path.exists(GLOBAL_MODEL_PATH):
+        print(f"⚠️ Global ranking model not found at {GLOBAL_MODEL_PATH}. Falling back to per-job training.")
+        ranking_mode = "job"
 
-        print("Preparing training data using extracted keywords...")
-        training_df = prepare_training_data(
-            job_description_text=job_description_text,
-            candidate_texts=training_texts,
-            tokenizer=tokenizer,
-            model=model,
-            skill_keywords=sorted_gpt_keywords,
-            gender_directions=None,
-            synthetic=True
+    if ranking_mode == "global":
+        print("Using the global ranking model. Skipping per-job training.")
+        sorted_gpt_keywords = _load_or_extract_keywords(
+            job_id, job_description_text, keywords_path,
+            refresh=old_metadata.get("keywords_hash") != current_hash
         )
+        save_to_json({**old_metadata, "job_id": job_id, "keywords_hash": current_hash}, metadata_path)
+        model_path = GLOBAL_MODEL_PATH
+        trained_model = load_ranking_model(model_path)
+        ranking_keywords = sorted_gpt_keywords
+        feature_schema = "global"
 
-        print("Training ranking model...")
-        model_path = os.path.join(output_folders["models"], "ranking_model.joblib")
-        trained_model, feature_names = train_ranking_model(
-            features_df=training_df,
-            save_path=model_path,
-            output_folders=output_folders
-        )
+    elif retrain_required:
+        sorted_gpt_keywords = _load_or_extract_keywords(job_id, job_description_text, keywords_path, refresh=True)
+        previous_model_path = latest_version["model_path"] if old_hash and latest_version else None
 
-        save_to_json({
-            "job_id": job_id,
-            "job_hash": current_hash
-        }, metadata_path)
+        # Batch runs train in-process with the shared model and training corpus rather
+        # than spawning a worker per job that would load and embed them all again
+        if latest_version is not None and MODEL_SETTINGS['background_training'] and resources is None:
+            # Serve a ranking from the last ready version; a detached worker trains,
+            # publishes and re-scores, so this run returns without waiting for it
+            print(f"Training a new model version in a background worker. Ranking with version {latest_version['version']} for now.")
+            start_background_worker = True
+            trained_model = load_ranking_model(model_path)
+            ranking_keywords = latest_version.get("keywords") or keywords_from_model(trained_model)
+        else:
+            manifest = _train_job_model_version(
+                job_description_text, sorted_gpt_keywords, tokenizer, model,
+                output_folders, current_hash, previous_model_path,
+                training_texts=resources.training_texts() if resources is not None else None
+            )
+            save_to_json({
+                "job_id": job_id,
+                "job_hash": current_hash,
+                "keywords_hash": current_hash,
+                "model_version": manifest["version"],
+                "training_strategy": manifest["training_strategy"]
+            }, metadata_path)
+            model_path = manifest["model_path"]
+            trained_model = load_ranking_model(model_path)
+            ranking_keywords = sorted_gpt_keywords
 
     else:
         print("Job description unchanged. Skipping model retraining.")
 
-        keywords_path = os.path.join(output_folders["reports"], "keywords.json")
-
-        try:
-            saved_keywords = load_json_from_firebase(job_id, "keywords.json").get("keywords", [])
-            sorted_gpt_keywords = sorted(saved_keywords)
-            print("☁️ Loaded GPT keywords from Firebase Storage.")
-        except Exception as e:
-            print(f"⚠️ Failed to load keywords from Firebase Storage: {e}")
-            print("⏳ Re-extracting keywords using GPT...")
-
-            sorted_gpt_keywords = extract_keywords_from_job_description(job_description_text)
+        sorted_gpt_keywords = _load_or_extract_keywords(job_id, job_description_text, keywords_path, refresh=False)
 
-            save_to_json({
-                "job_id": job_id,
-                "keywords": sorted_gpt_keywords
-            }, keywords_path, upload_to_firebase=True)
-
-        print("\n📌 Keyword Matches in Each Candidate CV:")
-        for candidate_file, text in zip(candidate_files, candidate_texts):
-            matched_keywords = extract_matched_keywords(text, sorted_gpt_keywords)
-            print(f"- {candidate_file}: {len(matched_keywords)} matched keywords")
-            print(f"  ➤ {matched_keywords}")
-        model_path = os.path.join(output_folders["models"], "ranking_model.joblib")
+        if candidate_texts is not None:
+            print("\n📌 Keyword Matches in Each Candidate CV:")
+            for candidate_file, text in zip(candidate_files, candidate_texts):
+                matched_keywords = extract_matched_keywords(text, sorted_gpt_keywords)
+                print(f"- {candidate_file}: {len(matched_keywords)} matched keywords")
+                print(f"  ➤ {matched_keywords}")
         trained_model = load_ranking_model(model_path)
+        ranking_keywords = sorted_gpt_keywords
+
+    precomputed = None
+    if resources is not None:
+        precomputed = resources.candidate_features(candidates_dir, job_description_text, ranking_keywords, feature_schema)
+    elif streaming:
+        print("Streaming candidates through extraction, debiasing, embedding and featurization...\n")
+        precomputed = stream_candidate_features(
+            candidates_dir, job_description_text, tokenizer, model, ranking_keywords, feature_schema
+        )
+    if precomputed is not None:
+        candidate_files, candidate_texts = precomputed["candidate_files"], precomputed["candidate_texts"]
+        _emit_progress(progress_callback, "extraction", {
+            "job_id": job_id,
+            "num_candidates": len(candidate_files)
+        })
 
-    # ✅ STEP 3: Run ranking pipeline with retrained model
+    # ✅ STEP 3: Run ranking pipeline with the latest ready model
     print("Running candidate ranking pipeline...\n")
-    results = rank_candidates(
-        job_description_text,
-        candidate_texts,
-        candidate_files,
-        tokenizer,
-        model,
-        output_folders,
-        job_id,
-        custom_model=trained_model,
-        custom_keywords=sorted_gpt_keywords
+    results = _rank_and_report(
+        job_description_text, candidate_files, candidate_texts, tokenizer, model,
+        output_folders, job_id, trained_model, ranking_keywords, model_path,
+        feature_schema=feature_schema,
+        progress_callback=progress_callback,
+        precomputed=precomputed
     )
 
-    display_ranking(job_id)
-
-    print("\nRunning SHAP explanations...")
-    generate_shap_explanations(candidate_files, results["explanations"], output_folders, job_id)
+    try:
+        user_ids = [extract_user_id(os.path.basename(candidate_file)) for candidate_file in candidate_files]
+        added = index_job_embeddings(job_id, user_ids, results["cv_embeddings"], results["job_embedding"])
+        print(f"Indexed {added} new CV embeddings for cross-job search.")
+    except Exception as e:
+        print(f"⚠️ Failed to update the candidate vector index: {e}")
 
     print("\nGenerating ChatGPT explanations...")
     generate_chatgpt_explanations(
-        results, job_description_text, candidate_files, candidate_texts, output_folders, job_id
+        results, job_description_text, candidate_files, candidate_texts, output_folders, job_id,
+        on_entry=lambda entry: _emit_progress(progress_callback, "chatgpt", entry)
     )
 
     print("\nRunning gender bias analysis...")
-    analyze_gender_bias_distribution(
+    try:
+        embedding_audit = compute_embedding_associations(results["cv_embeddings"], tokenizer, model)
+    except Exception as e:
+        print(f"⚠️ Embedding association audit failed: {e}")
+        embedding_audit = None
+    gender_analysis = analyze_gender_bias_distribution(
         candidate_texts,
         candidate_files,
         ranked_indices=results["ranked_indices"],
         output_folders=output_folders,
-        job_id=job_id
+        job_id=job_id,
+        canonical_indices=results.get("canonical_indices"),
+        embedding_audit=embedding_audit
     )
+    _emit_progress(progress_callback, "gender_bias", json.loads(gender_analysis["report"]))
+
+    if start_background_worker:
+        worker = start_training_worker([
+            os.path.abspath(__file__),
+            "--job_description", os.path.abspath(job_description_path),
+            "--candidates_dir", os.path.abspath(candidates_dir),
+            "--job_id", job_id,
+            "--train_worker"
+        ], os.path.join(output_folders["reports"], "training_worker.log"))
+        print(f"Started training worker (pid {worker.pid}). Reports will be re-scored once the new version is published.")
+        _emit_progress(progress_callback, "model_training", {
+            "job_id": job_id,
+            "model_version": compute_model_version(current_hash, sorted_gpt_keywords),
+            "serving_version": latest_version["version"]
+        })
 
     try:
-        firestore_db = firestore.client()
+        firestore_db = get_firestore_client()
         metadata_ref = firestore_db.collection("jobs").document(job_id).collection("analysis_metadata").document("summary")
 
         num_applicants = len(candidate_files)
-        metadata_ref.set({
-            "numApplicants": num_applicants,
-            "lastAnalyzedAt": datetime.utcnow().isoformat()
-        }, merge=True)
+        with track_time("firebase_io"):
+            metadata_ref.set({
+                "numApplicants": num_applicants,
+                "lastAnalyzedAt": datetime.utcnow().isoformat()
+            }, merge=True)
 
         print(f"✅ Analysis metadata updated: {num_applicants} applicants, {datetime.utcnow().isoformat()}")
 
     except Exception as e:
         print(f"⚠️ Failed to update analysis metadata in Firestore: {e}")
 
+def run_training_worker(job_description_path: str, candidates_dir: str, job_id: str):
+    """
+    Detached counterpart of a pipeline run that ranked with the previous model
+    version: trains the job's new version, publishes it and re-scores the
+    ranking and SHAP reports in place. Workers run one at a time.
+    """
+    output_folders = {
+        "models": os.path.join("output", "models", job_id),
+        "reports": os.path.join("output", "reports", job_id)
+    }
+    metadata_path = os.path.join(output_folders["reports"], "job_metadata.json")
+    keywords_path = os.path.join(output_folders["reports"], "keywords.json")
+
+    with training_lock(os.path.join("output", "models")):
+        job_description_text = clean_html(load_job_description(job_description_path))
+        current_hash = compute_text_hash(job_description_text)
+        metadata = load_from_json(metadata_path) if os.path.exists(metadata_path) else {}
+        if metadata.get("job_hash") == current_hash:
+            print(f"Model for job {job_id} is already up to date. Nothing to train.")
+            return
+
+        if os.path.exists(keywords_path):
+            keywords = sorted(load_from_json(keywords_path).get("keywords", []))
+        else:
+            keywords = _load_or_extract_keywords(job_id, job_description_text, keywords_path, refresh=False)
+        latest_version = get_latest_ready_version(output_folders["models"])
+        tokenizer, model = load_mbert_model()
+
+        manifest = _train_job_model_version(
+            job_description_text, keywords, tokenizer, model, output_folders, current_hash,
+            previous_model_path=latest_version["model_path"] if latest_version else None
+        )
+        save_to_json({
+            **metadata,
+            "job_id": job_id,
+            "job_hash": current_hash,
+            "keywords_hash": current_hash,
+            "model_version": manifest["version"],
+            "training_strategy": manifest["training_strategy"]
+        }, metadata_path)
+
+        print(f"Re-scoring candidates with model version {manifest['version']}...")
+        candidate_files, candidate_texts = load_candidate_pdfs(candidates_dir)
+        _rank_and_report(
+            job_description_text, candidate_files, candidate_texts, tokenizer, model,
+            output_folders, job_id, load_ranking_model(manifest["model_path"]),
+            keywords, manifest["model_path"],
+            rescore=True
+        )
+    wait_for_plots()
+
+def run_batch(
+    jobs: List[Dict[str, str]],
+    ranking_mode: Optional[str] = None,
+    summary_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Runs the pipeline for many jobs in one process, sharing one `PipelineResources`.
+    Each job is a dict with "job_id", "job_description" (path) and "candidates_dir".
+    A failing job is recorded in the summary and does not stop the batch.
+    """
+    resources = PipelineResources()
+    summary: Dict[str, Any] = {"started_at": datetime.utcnow().isoformat(), "jobs": {}}
+
+    for position, job in enumerate(jobs, start=1):
+        job_id = job["job_id"]
+        print(f"\n===== Job {position}/{len(jobs)}: {job_id} =====")
+        try:
+            metrics = run_pipeline(
+                job["job_description"], job["candidates_dir"], job_id,
+                ranking_mode=ranking_mode, resources=resources
+            )
+            summary["jobs"][job_id] = {"status": "ok", "metrics": metrics}
+        except Exception as e:
+            print(f"❌ Pipeline failed for job {job_id}: {e}")
+            summary["jobs"][job_id] = {"status": "error", "detail": str(e)}
+
+    summary["finished_at"] = datetime.utcnow().isoformat()
+    summary["distinct_cvs"] = len(resources.candidates)
+    print(f"\n✅ Batch finished: {len(jobs)} jobs, {summary['distinct_cvs']} distinct CVs embedded.")
+    if summary_path:
+        save_to_json(summary, summary_path)
+    return summary
+
 def main():
     parser = argparse.ArgumentParser(description="Candidate Ranking System")
-    parser.add_argument('--job_description', type=str, required=True)
-    parser.add_argument('--candidates_dir', type=str, required=True)
-    parser.add_argument('--job_id', type=str, required=True)
+    parser.add_argument('--job_description', type=str)
+    parser.add_argument('--candidates_dir', type=str)
+    parser.add_argument('--job_id', type=str)
+    parser.add_argument('--job_ids', nargs='+', default=None,
+                        help="Batch mode: analyse several jobs in one process from <data_dir>/<job_id>/")
+    parser.add_argument('--data_dir', type=str, default="data",
+                        help="Batch mode: folder holding job_desc.txt and the candidate PDFs of each job")
+    parser.add_argument('--batch_summary', type=str, default=os.path.join("output", "reports", "batch_summary.json"))
+    parser.add_argument('--ranking_mode', type=str, choices=['job', 'global'], default=None)
+    parser.add_argument('--streaming', action='store_true', default=None,
+                        help="Overlap extraction, debiasing, embedding and featurization on micro-batches")
+    parser.add_argument('--train_worker', action='store_true',
+                        help="Train, publish and re-score the job's new model version (started by a pipeline run)")
     args = parser.parse_args()
 
-    run_pipeline(args.job_description, args.candidates_dir, args.job_id)
+    if args.train_worker:
+        if not (args.job_description and args.candidates_dir and args.job_id):
+            parser.error("--train_worker requires --job_description, --candidates_dir and --job_id")
+        run_training_worker(args.job_description, args.candidates_dir, args.job_id)
+        return
+
+    if args.job_ids:
+        run_batch([
+            {
+                "job_id": job_id,
+                "job_description": os.path.join(args.data_dir, job_id, "job_desc.txt"),
+                "candidates_dir": os.path.join(args.data_dir, job_id)
+            }
+            for job_id in args.job_ids
+        ], ranking_mode=args.ranking_mode, summary_path=args.batch_summary)
+    elif args.job_description and args.candidates_dir and args.job_id:
+        run_pipeline(
+            args.job_description, args.candidates_dir, args.job_id,
+            ranking_mode=args.ranking_mode, streaming=args.streaming
+        )
+    else:
+        parser.error("either --job_ids or all of --job_description, --candidates_dir and --job_id are required")
+    wait_for_plots()
 
 if __name__ == "__main__":
     main()
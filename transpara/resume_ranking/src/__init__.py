@@ -7,8 +7,34 @@ from src.data.document_extraction import (
 from src.data.embeddings import (
     load_mbert_model,
     get_text_embedding,
+    get_text_embeddings,
     create_feature_vector,
-    create_feature_vectors_dataset
+    create_feature_vectors_dataset,
+    create_global_feature_vector,
+    create_global_feature_vectors_dataset
+)
+
+from src.data.vector_index import (
+    VectorIndex,
+    get_candidate_index,
+    get_job_index,
+    index_job_embeddings
+)
+
+from src.data.embedding_store import (
+    EmbeddingStore,
+    get_embedding_store,
+    embed_texts
+)
+
+from src.data.candidate_stream import (
+    iter_candidate_pdfs,
+    stream_candidate_features
+)
+
+from src.data.candidate_cache import (
+    CandidateArtifactCache,
+    build_candidate_features
 )
 
 __all__ = [
@@ -17,6 +43,20 @@ __all__ = [
     'extract_text_with_ocr',
     'load_mbert_model',
     'get_text_embedding',
+    'get_text_embeddings',
     'create_feature_vector',
-    'create_feature_vectors_dataset'
+    'create_feature_vectors_dataset',
+    'create_global_feature_vector',
+    'create_global_feature_vectors_dataset',
+    'VectorIndex',
+    'get_candidate_index',
+    'get_job_index',
+    'index_job_embeddings',
+    'EmbeddingStore',
+    'get_embedding_store',
+    'embed_texts',
+    'iter_candidate_pdfs',
+    'stream_candidate_features',
+    'CandidateArtifactCache',
+    'build_candidate_features'
 ]
\ No newline at end of file
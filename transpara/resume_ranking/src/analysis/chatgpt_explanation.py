@@ -1,6 +1,6 @@
 import os
 from uuid import uuid4
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 from src.models.linguistic_debiasing import compute_gender_bias_score
 from api.explanation_service import generate_chatgpt_explanation
 from src.utils.file_utils import save_to_json, load_from_json, extract_user_id
@@ -13,7 +13,8 @@ def generate_chatgpt_explanations(
     candidate_texts: List[str],
     output_folders: Dict[str, str],
     job_id: str,
-    top_n: int = 4
+    top_n: int = 4,
+    on_entry: Optional[Callable[[Dict[str, Any]], None]] = None
 ) -> str:
     report_path = os.path.join(output_folders["reports"], "chatgpt_explanations.json")
     
@@ -30,6 +31,10 @@ def generate_chatgpt_explanations(
         if entry.get("id") is not None
     }
 
+    # Near-duplicate CVs share one explanation and bias score
+    canonical_indices = results.get("canonical_indices")
+    generated: Dict[int, tuple] = {}
+
     for rank, idx in enumerate(results["ranked_indices"][:top_n], 1):
         candidate_file = candidate_files[idx]
         user_id = extract_user_id(candidate_file)
@@ -42,19 +47,25 @@ def generate_chatgpt_explanations(
         candidate_name = get_candidate_name_from_firestore(job_id, user_id)
         text = candidate_texts[idx]
         similarity = results["predictions"][idx]
-        bias = compute_gender_bias_score(text)
-        shap = results["explanations"][idx]
+        canonical = int(canonical_indices[idx]) if canonical_indices is not None else idx
+        if canonical in generated:
+            bias, explanation = generated[canonical]
+        else:
+            bias = compute_gender_bias_score(text)
+            shap = results["explanations"][idx]
 
-        explanation = generate_chatgpt_explanation(
-            job_description,
-            text,
-            similarity,
-            {
-                "top_positive": [c for c in shap["contributors"] if c.get("positive")],
-                "top_negative": [c for c in shap["contributors"] if not c.get("positive")],
-            },
-            bias
-        )
+            explanation = generate_chatgpt_explanation(
+                job_description,
+                text,
+                similarity,
+                {
+                    "top_positive": [c for c in shap["contributors"] if c.get("positive")],
+                    "top_negative": [c for c in shap["contributors"] if not c.get("positive")],
+                },
+                bias,
+                keywords=results.get("skill_keywords")
+            )
+            generated[canonical] = (bias, explanation)
 
         entry = {
             "id": candidate_id,
@@ -65,6 +76,8 @@ def generate_chatgpt_explanations(
             "chatgpt_explanation": explanation
         }
         existing_explanations["explanations"].append(entry)
+        if on_entry is not None:
+            on_entry(entry)
 
     save_to_json(existing_explanations, report_path, upload_to_firebase=True)
     print(f"\nChatGPT explanations generated and saved to {report_path}")
@@ -1,6 +1,5 @@
 import os
 import json
-import spacy
 import numpy as np
 
 from uuid import uuid4
@@ -8,24 +7,19 @@ from collections import Counter
 from typing import Dict, List, Optional, Any
 from src.utils.file_utils import save_to_json, load_from_json, extract_user_id
 from src.utils.firebase_utils import get_candidate_name_from_firestore, get_candidate_id_from_firestore
-
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("SpaCy model not found. Please run: python -m spacy download en_core_web_sm")
-    raise
+from src.models.gendered_language import scan_terms
+from src.utils.metrics import increment
 
 LOW_BIAS_THRESHOLD = 1.0
 MODERATE_BIAS_THRESHOLD = 3.0
 
+MALE_REPORT_TERMS = frozenset({"he", "his", "him", "man", "men", "male", "father",
+                               "son", "brother", "uncle", "husband", "gentleman"})
+FEMALE_REPORT_TERMS = frozenset({"she", "her", "hers", "woman", "women", "female", "mother",
+                                 "daughter", "sister", "aunt", "wife", "lady"})
+
 def _get_gendered_terms(text: str) -> Dict[str, List[str]]:
-    doc = nlp(text.lower())
-    male_terms = [token.text for token in doc if token.text in 
-                 {"he", "his", "him", "man", "men", "male", "father", 
-                  "son", "brother", "uncle", "husband", "gentleman"}]
-    female_terms = [token.text for token in doc if token.text in 
-                   {"she", "her", "hers", "woman", "women", "female", "mother", 
-                    "daughter", "sister", "aunt", "wife", "lady"}]
+    _, (male_terms, female_terms) = scan_terms(text, (MALE_REPORT_TERMS, FEMALE_REPORT_TERMS))
     return {
         'male_terms': male_terms,
         'female_terms': female_terms
@@ -34,20 +28,51 @@ def _get_gendered_terms(text: str) -> Dict[str, List[str]]:
 def _count_term_frequencies(terms: List[str]) -> Dict[str, int]:
     return dict(Counter(terms))
 
+def _summarize_embedding_audit(entries: List[Dict[str, Any]], weat_effect_size: float) -> Dict[str, Any]:
+    audited = [entry for entry in entries if "embedding_gender_association" in entry]
+    summary = {}
+    if audited:
+        gender = np.array([entry["embedding_gender_association"] for entry in audited])
+        career = np.array([entry["embedding_career_association"] for entry in audited])
+        summary = {
+            "average_gender_association": round(float(gender.mean()), 4),
+            "average_career_association": round(float(career.mean()), 4),
+            "most_male_associated_candidate": audited[int(np.argmax(gender))]["candidate_file"],
+            "most_female_associated_candidate": audited[int(np.argmin(gender))]["candidate_file"]
+        }
+        if len(audited) >= 3 and gender.std() > 0 and career.std() > 0:
+            summary["gender_career_correlation"] = round(float(np.corrcoef(gender, career)[0, 1]), 4)
+
+    return {
+        "description": (
+            "Embedding associations compare each CV embedding with word embeddings. The gender association "
+            "is the mean cosine similarity to male words minus that to female words; the career association "
+            "is the mean similarity to career words minus that to family words. A positive correlation "
+            "between the two means male-associated CVs also read as more career-oriented."
+        ),
+        "weat_effect_size": round(weat_effect_size, 4),
+        "summary": summary
+    }
+
 def generate_gender_bias_report(
     candidate_texts: List[str], 
     candidate_files: List[str], 
     bias_scores: List[float],
     job_id: str,
-    output_folders: Optional[Dict[str, str]] = None
+    output_folders: Optional[Dict[str, str]] = None,
+    embedding_audit: Optional[Dict[str, Any]] = None,
+    gendered_terms_by_candidate: Optional[List[Dict[str, List[str]]]] = None
 ) -> str:
     new_entries = []
-    for text, file, score in zip(candidate_texts, candidate_files, bias_scores):
+    for idx, (text, file, score) in enumerate(zip(candidate_texts, candidate_files, bias_scores)):
         user_id = extract_user_id(file)
         candidate_id = get_candidate_id_from_firestore(job_id, user_id)
         candidate_name = get_candidate_name_from_firestore(job_id, user_id)
 
-        gendered_terms = _get_gendered_terms(text)
+        if gendered_terms_by_candidate is not None:
+            gendered_terms = gendered_terms_by_candidate[idx]
+        else:
+            gendered_terms = _get_gendered_terms(text)
         male_terms = gendered_terms['male_terms']
         female_terms = gendered_terms['female_terms']
         male_freq = _count_term_frequencies(male_terms)
@@ -68,6 +93,9 @@ def generate_gender_bias_report(
             "female_terms": female_freq if female_freq else "none",
             "recommendation": recommendation
         }
+        if embedding_audit is not None:
+            candidate_report["embedding_gender_association"] = round(float(embedding_audit["gender_association"][idx]), 4)
+            candidate_report["embedding_career_association"] = round(float(embedding_audit["career_association"][idx]), 4)
         new_entries.append(candidate_report)
 
     report_path = None
@@ -120,6 +148,11 @@ def generate_gender_bias_report(
     else:
         existing_report["summary"] = {}
 
+    if embedding_audit is not None:
+        existing_report["embedding_audit"] = _summarize_embedding_audit(
+            existing_report["candidate_analysis"], embedding_audit["weat_effect_size"]
+        )
+
     if report_path:
         save_to_json(existing_report, report_path, upload_to_firebase=True)
         print(f"\nGender bias analysis generated and saved to {report_path}.")
@@ -131,13 +164,28 @@ def analyze_gender_bias_distribution(
     candidate_files: List[str],
     job_id: Optional[str] = None,
     ranked_indices: Optional[np.ndarray] = None,
-    output_folders: Optional[Dict[str, str]] = None
+    output_folders: Optional[Dict[str, str]] = None,
+    canonical_indices: Optional[np.ndarray] = None,
+    embedding_audit: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     from src.models.linguistic_debiasing import compute_gender_bias_score
 
-    bias_scores = [compute_gender_bias_score(text) for text in candidate_texts]
+    if canonical_indices is None:
+        bias_scores = [compute_gender_bias_score(text) for text in candidate_texts]
+        gendered_terms = None
+    else:
+        # Near-duplicate CVs take both the score and the terms of their canonical CV
+        unique = {
+            idx: (compute_gender_bias_score(candidate_texts[idx]), _get_gendered_terms(candidate_texts[idx]))
+            for idx in np.unique(canonical_indices)
+        }
+        bias_scores = [unique[idx][0] for idx in canonical_indices]
+        gendered_terms = [unique[idx][1] for idx in canonical_indices]
+        increment("bias_analyses_reused", len(candidate_texts) - len(unique))
 
-    report = generate_gender_bias_report(candidate_texts, candidate_files, bias_scores, job_id, output_folders)
+    report = generate_gender_bias_report(
+        candidate_texts, candidate_files, bias_scores, job_id, output_folders, embedding_audit, gendered_terms
+    )
 
     candidate_names = [os.path.splitext(os.path.basename(file))[0] for file in candidate_files]
     gender_data = []
@@ -1,24 +1,84 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import shap
 import os
+import joblib
 
-from typing import Dict, List, Tuple, Optional, Any, Union
+from typing import Dict, List, Tuple, Optional, Any, Union, Callable
 from uuid import uuid4
 from src.utils.file_utils import save_to_json, load_from_json, extract_user_id
 from src.utils.firebase_utils import get_candidate_name_from_firestore, get_candidate_id_from_firestore
 
 from config.settings import MODEL_SETTINGS
+from src.utils.metrics import track_time
 
+_explainer_cache: Dict[str, Tuple[Dict[str, Any], Any]] = {}
+
+def get_explainer_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + "_explainer.joblib"
+
+def _model_signature(model: Any, model_path: str) -> Dict[str, Any]:
+    stat = os.stat(model_path)
+    return {
+        "model_mtime_ns": stat.st_mtime_ns,
+        "model_size": stat.st_size,
+        "model_type": type(model).__name__,
+        "n_features": int(getattr(model, "n_features_in_", 0))
+    }
+
+def save_tree_explainer(model: Any, model_path: str) -> Any:
+    """
+    Builds a TreeExplainer for the model saved at `model_path` and stores it next to it.
+    """
+    import shap
+
+    explainer = shap.TreeExplainer(model)
+    signature = _model_signature(model, model_path)
+    explainer_path = get_explainer_path(model_path)
+    joblib.dump({"model_signature": signature, "explainer": explainer}, explainer_path)
+    _explainer_cache[explainer_path] = (signature, explainer)
+    print(f"SHAP explainer saved to {explainer_path}")
+    return explainer
+
+@track_time("shap")
+def load_tree_explainer(model: Any, model_path: Optional[str] = None) -> Any:
+    """
+    Returns the persisted explainer for `model_path`, rebuilding it when the model file has changed.
+    """
+    if model_path is None or not os.path.exists(model_path):
+        import shap
+        return shap.TreeExplainer(model)
+
+    explainer_path = get_explainer_path(model_path)
+    signature = _model_signature(model, model_path)
+
+    cached = _explainer_cache.get(explainer_path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    if os.path.exists(explainer_path):
+        try:
+            artifact = joblib.load(explainer_path)
+            if artifact.get("model_signature") == signature:
+                _explainer_cache[explainer_path] = (signature, artifact["explainer"])
+                return artifact["explainer"]
+            print("Ranking model changed since the SHAP explainer was saved. Rebuilding explainer...")
+        except Exception as e:
+            print(f"⚠️ Failed to load SHAP explainer from {explainer_path}: {e}")
+
+    return save_tree_explainer(model, model_path)
+
+@track_time("shap")
 def generate_model_explanations(
     model: Any,
     feature_names: List[str],
     X: pd.DataFrame,
-    skill_keywords: Optional[List[str]] = None
+    skill_keywords: Optional[List[str]] = None,
+    explainer: Optional[Any] = None
 ) -> Tuple[List[Dict[str, Any]], np.ndarray, pd.DataFrame]:
 
-    explainer = shap.TreeExplainer(model)
+    if explainer is None:
+        import shap
+        explainer = shap.TreeExplainer(model)
     shap_values = explainer.shap_values(X)
     base_value = explainer.expected_value
 
@@ -28,34 +88,50 @@ def generate_model_explanations(
         print(f"Using DataFrame columns as feature names ({len(feature_names)})")
 
     shap_df = pd.DataFrame(shap_values, columns=feature_names)
-    explanations = []
-
-    for idx, row in enumerate(shap_values):
-        sorted_idx = np.argsort(-np.abs(row))
-        top_contributors = []
-
-        for i in sorted_idx[:MODEL_SETTINGS['top_contributors']]:
-            feature_name = feature_names[i]
-            shap_value = row[i]
-            feature_value = X.iloc[idx, i]
-            display_name = _get_descriptive_feature_name(feature_name, skill_keywords)
-
-            top_contributors.append({
-                "feature": display_name,
-                "impact": float(shap_value),
-                "value": float(feature_value),
-                "positive": bool(shap_value > 0)
-            })
-
-        base_value_scalar = float(base_value[0]) if isinstance(base_value, np.ndarray) else float(base_value)
-        row_sum = float(np.sum(row))
-        final_prediction = base_value_scalar + row_sum
-
-        explanations.append({
+    shap_matrix = np.asarray(shap_values, dtype=float)
+    feature_matrix = np.asarray(X, dtype=float)
+    n_rows, n_features = shap_matrix.shape
+    top_k = min(MODEL_SETTINGS['top_contributors'], n_features)
+
+    # Display names depend only on the column, so resolve them once
+    display_names = np.array(
+        [_get_descriptive_feature_name(name, skill_keywords) for name in feature_names],
+        dtype=object
+    )
+
+    # Top-k by |SHAP| for every row at once, then order just those k columns
+    abs_shap = np.abs(shap_matrix)
+    if top_k < n_features:
+        top_idx = np.argpartition(-abs_shap, top_k - 1, axis=1)[:, :top_k]
+    else:
+        top_idx = np.tile(np.arange(n_features), (n_rows, 1))
+    row_idx = np.arange(n_rows)[:, None]
+    order = np.argsort(-abs_shap[row_idx, top_idx], axis=1, kind="stable")
+    top_idx = top_idx[row_idx, order]
+
+    top_names = display_names[top_idx].tolist()
+    top_impacts = shap_matrix[row_idx, top_idx].tolist()
+    top_values = feature_matrix[row_idx, top_idx].tolist()
+
+    base_value_scalar = float(base_value[0]) if isinstance(base_value, np.ndarray) else float(base_value)
+    final_predictions = (base_value_scalar + shap_matrix.sum(axis=1)).tolist()
+
+    explanations = [
+        {
             "base_value": base_value_scalar,
-            "prediction": final_prediction,
-            "contributors": top_contributors
-        })
+            "prediction": final_predictions[idx],
+            "contributors": [
+                {
+                    "feature": name,
+                    "impact": impact,
+                    "value": value,
+                    "positive": impact > 0
+                }
+                for name, impact, value in zip(top_names[idx], top_impacts[idx], top_values[idx])
+            ]
+        }
+        for idx in range(n_rows)
+    ]
 
     return explanations, shap_values, shap_df
 
@@ -63,10 +139,14 @@ def generate_shap_explanations(
     candidate_files: List[str],
     explanations: List[Dict[str, Any]],
     output_folders: Dict[str, str],
-    job_id: str
+    job_id: str,
+    on_entry: Optional[Callable[[Dict[str, Any]], None]] = None,
+    replace_existing: bool = False
 ) -> None:
     """
-    Save SHAP explanations to a JSON report, skipping existing ones based on candidate ID.
+    Save SHAP explanations to a JSON report, skipping existing ones based on candidate ID
+    unless `replace_existing` is set (used when a new model version re-scores a job).
+    `on_entry` is called with each new entry as soon as it is built.
     """
     shap_results_path = os.path.join(output_folders["reports"], "shap_explanations.json")
 
@@ -79,13 +159,17 @@ def generate_shap_explanations(
 
     existing_shap_ids = {entry["id"] for entry in existing_shap.get("shap", [])}
 
+    new_entries = []
     for idx, explanation in enumerate(explanations):
+        if explanation is None:
+            # Not shortlisted by the two-stage ranking
+            continue
         file_name = os.path.basename(candidate_files[idx])
         user_id = extract_user_id(file_name)
         candidate_id = get_candidate_id_from_firestore(job_id, user_id)
         candidate_name = get_candidate_name_from_firestore(job_id, user_id)
 
-        if candidate_id in existing_shap_ids:
+        if candidate_id in existing_shap_ids and not replace_existing:
             print(f"SHAP analysis for {candidate_name} already exists, skipping.")
             continue
 
@@ -96,7 +180,14 @@ def generate_shap_explanations(
             "prediction": explanation.get("prediction"),
             "contributors": explanation.get("contributors")
         }
-        existing_shap["shap"].append(entry)
+        new_entries.append(entry)
+        if on_entry is not None:
+            on_entry(entry)
+
+    replaced_ids = {entry["id"] for entry in new_entries}
+    existing_shap["shap"] = [
+        entry for entry in existing_shap.get("shap", []) if entry["id"] not in replaced_ids
+    ] + new_entries
 
     save_to_json(existing_shap, shap_results_path, upload_to_firebase=True)
     print(f"SHAP analysis saved to {shap_results_path}")
@@ -107,6 +198,14 @@ def _get_descriptive_feature_name(feature_name: str, skill_keywords: Optional[Li
         return f"Skill: {skill_name.capitalize()}"
     elif feature_name == "cosine_similarity":
         return "Overall CV-Job Similarity"
+    elif feature_name == "keyword_coverage":
+        return "Job Keyword Coverage"
+    elif feature_name == "keyword_match_count":
+        return "Matched Job Keywords"
+    elif feature_name == "keyword_density":
+        return "Job Keyword Mentions"
+    elif feature_name == "keyword_weighted_matches":
+        return "Weighted Job Keyword Matches"
     elif feature_name.startswith("embed_dim_"):
         dim_num = feature_name.replace("embed_dim_", "")
         return f"Semantic Context Factor {dim_num}"
@@ -152,17 +251,69 @@ def _format_factors(title: str, factors: List[Dict[str, Any]], sign: str = "+")
         output += f"• {factor['feature']}: {'Contributes +' if sign == '+' else 'Decreases by '}{impact:.3f}\n"
     return output
 
-def save_shap_summary_plot(shap_values: np.ndarray, X: pd.DataFrame, output_path: str):
-    plt.figure()
-    shap.summary_plot(shap_values, X, plot_type="bar", show=False)
+def summarize_shap_for_plot(
+    shap_values: np.ndarray,
+    X: pd.DataFrame,
+    max_features: Optional[int] = None,
+    max_samples: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Reduces SHAP values to the aggregates the summary plots need: mean |SHAP| per
+    feature and a row sample restricted to the most important features.
+    """
+    if max_features is None:
+        max_features = MODEL_SETTINGS['plot_max_features']
+    if max_samples is None:
+        max_samples = MODEL_SETTINGS['plot_max_samples']
+
+    shap_matrix = np.asarray(shap_values, dtype=float)
+    mean_abs = np.abs(shap_matrix).mean(axis=0)
+    top_features = np.argsort(-mean_abs)[:max_features]
+
+    n_rows = shap_matrix.shape[0]
+    if n_rows > max_samples:
+        rows = np.random.default_rng(42).choice(n_rows, size=max_samples, replace=False)
+    else:
+        rows = np.arange(n_rows)
+
+    return {
+        "feature_names": [str(X.columns[i]) for i in top_features],
+        "mean_abs_shap": mean_abs[top_features],
+        "sample_shap": shap_matrix[np.ix_(rows, top_features)],
+        "sample_values": np.asarray(X, dtype=float)[np.ix_(rows, top_features)]
+    }
+
+def render_shap_summary_plot(summary: Dict[str, Any], output_path: str):
+    import matplotlib.pyplot as plt
+    import shap
+
+    feature_names = summary["feature_names"]
+    mean_abs = summary["mean_abs_shap"]
+
+    order = np.argsort(mean_abs)
+    plt.figure(figsize=(8, max(4, 0.4 * len(feature_names))))
+    plt.barh([feature_names[i] for i in order], mean_abs[order], color="#1E88E5")
+    plt.xlabel("mean(|SHAP value|) (average impact on model output magnitude)")
     plt.tight_layout()
     plt.savefig(output_path.replace(".png", "_bar.png"), dpi=300)
     plt.close()
 
     plt.figure()
-    shap.summary_plot(shap_values, X, show=False)
+    shap.summary_plot(
+        summary["sample_shap"],
+        pd.DataFrame(summary["sample_values"], columns=feature_names),
+        show=False
+    )
     plt.tight_layout()
     plt.savefig(output_path.replace(".png", "_dot.png"), dpi=300)
     plt.close()
 
     print(f"SHAP summary plots saved to: {output_path.replace('.png', '_bar.png')} and _dot.png")
+
+def save_shap_summary_plot(shap_values: np.ndarray, X: pd.DataFrame, output_path: str):
+    """
+    Queues the SHAP bar and dot summary plots on the background renderer.
+    """
+    from src.utils.plot_renderer import submit_plot
+
+    submit_plot(render_shap_summary_plot, summarize_shap_for_plot(shap_values, X), output_path)
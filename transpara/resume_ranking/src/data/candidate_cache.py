@@ -0,0 +1,148 @@
+import hashlib
+import threading
+import numpy as np
+
+from typing import Any, Dict, List, Optional
+from config.settings import MODEL_SETTINGS
+from src.data.candidate_stream import featurize_candidates, iter_candidate_pdfs
+from src.utils.dedup import NearDuplicateDetector
+from src.utils.metrics import track_time, increment
+
+def compute_file_hash(path: str) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class CandidateArtifactCache:
+    """
+    In-process cache of per-CV artifacts keyed by PDF content hash: extracted
+    text, gender-mitigated text and the embedding of the mitigated text. None of
+    these depend on the job, so a candidate who applied to several jobs is
+    extracted, debiased and embedded once per batch run. A CV that is a near
+    duplicate of one already cached (see `NearDuplicateDetector`) keeps its own
+    text but shares the mitigated text and embedding of that canonical CV.
+    """
+
+    def __init__(self, tokenizer, model, batch_size: Optional[int] = None):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.batch_size = batch_size or MODEL_SETTINGS['streaming_batch_size']
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._detector = NearDuplicateDetector() if MODEL_SETTINGS['dedup_enabled'] else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def prepare(self, paths: List[str]) -> List[str]:
+        """
+        Computes artifacts for PDFs not seen before and returns the cache keys of
+        `paths`, in order.
+        """
+        from src.data.document_extraction import extract_text_from_pdf
+        from src.data.embeddings import get_text_embeddings
+        from src.models.linguistic_debiasing import mitigate_gender_bias
+
+        keys = [compute_file_hash(path) for path in paths]
+        with self._lock:
+            missing: Dict[str, str] = {}
+            for key, path in zip(keys, paths):
+                if key not in self._entries and key not in missing:
+                    missing[key] = path
+
+            if missing:
+                with track_time("extraction"):
+                    texts = [extract_text_from_pdf(path) for path in missing.values()]
+                increment("documents_extracted", len(texts))
+                canonical = {}
+                for key, text in zip(missing, texts):
+                    canonical[key], similarity = self._detector.add(key, text) if self._detector else (key, 1.0)
+                    self._entries[key] = {"text": text, "canonical": canonical[key], "similarity": similarity}
+
+                unique = [key for key in missing if canonical[key] == key]
+                mitigated = [mitigate_gender_bias(self._entries[key]["text"]) for key in unique]
+                embeddings = np.concatenate([
+                    get_text_embeddings(mitigated[start:start + self.batch_size], self.tokenizer, self.model)
+                    for start in range(0, len(mitigated), self.batch_size)
+                ]) if unique else []
+                for key, mitigated_text, embedding in zip(unique, mitigated, embeddings):
+                    self._entries[key].update(mitigated=mitigated_text, embedding=embedding)
+                for key in missing:
+                    if canonical[key] != key:
+                        source = self._entries[canonical[key]]
+                        self._entries[key].update(mitigated=source["mitigated"], embedding=source["embedding"])
+                        increment("near_duplicates_reused")
+
+        increment("candidate_cache_hits", len(keys) - len(missing))
+        print(f"Prepared {len(keys)} CVs ({len(missing)} new, {len(keys) - len(missing)} reused from earlier jobs).")
+        return keys
+
+    def get(self, keys: List[str], field: str) -> List[Any]:
+        return [self._entries[key][field] for key in keys]
+
+    def embeddings(self, keys: List[str]) -> np.ndarray:
+        return np.stack(self.get(keys, "embedding"))
+
+    def canonical_indices(self, keys: List[str]) -> (np.ndarray, np.ndarray):
+        """
+        For each key, the position in `keys` of the first CV sharing its canonical
+        entry, together with the estimated similarity to that entry.
+        """
+        first: Dict[str, int] = {}
+        canonical = np.array([first.setdefault(self._entries[key]["canonical"], idx) for idx, key in enumerate(keys)])
+        return canonical, np.array(self.get(keys, "similarity"), dtype=np.float64)
+
+    def num_shared(self, keys: List[str]) -> int:
+        """
+        How many of `keys` use the mitigated text and embedding of another CV
+        (a near duplicate, or the same PDF listed twice) instead of their own.
+        """
+        own = {key for key in keys if self._entries[key]["canonical"] == key}
+        return len(keys) - len(own)
+
+def build_candidate_features(
+    cache: CandidateArtifactCache,
+    candidates_dir: str,
+    job_description_text: str,
+    skill_keywords: Optional[List[str]],
+    feature_schema: str = "job",
+    gender_directions: Any = None
+) -> Dict[str, Any]:
+    """
+    Same result as `stream_candidate_features`, built from cached per-CV
+    artifacts. Only the job embedding and the feature rows are computed per job.
+    """
+    from src.data.embeddings import get_text_embedding
+    from src.models.linguistic_debiasing import mitigate_gender_bias
+    from src.utils.file_utils import clean_html
+
+    candidate_files = list(iter_candidate_pdfs(candidates_dir))
+    if not candidate_files:
+        raise FileNotFoundError("No PDF files found in candidate directory.")
+    keys = cache.prepare(candidate_files)
+
+    job_embedding = get_text_embedding(mitigate_gender_bias(clean_html(job_description_text)), cache.tokenizer, cache.model)
+    canonical_indices, similarity = cache.canonical_indices(keys)
+    # Near duplicates share their canonical CV's artifacts, so one feature row each
+    representatives, inverse = np.unique(canonical_indices, return_inverse=True)
+    unique_keys = [keys[idx] for idx in representatives]
+    num_shared = cache.num_shared(keys)
+    features, ratios = featurize_candidates(
+        job_embedding, cache.embeddings(unique_keys), cache.get(unique_keys, "mitigated"),
+        skill_keywords, feature_schema, gender_directions
+    )
+
+    return {
+        "candidate_files": candidate_files,
+        "candidate_texts": cache.get(keys, "text"),
+        "job_embedding": job_embedding,
+        "gender_directions": gender_directions,
+        "cv_embeddings": cache.embeddings(keys),
+        "features": features.iloc[inverse].reset_index(drop=True),
+        "keyword_ratios": np.array(ratios)[inverse] if ratios else None,
+        "canonical_indices": canonical_indices,
+        "duplicate_similarity": similarity,
+        "reused": {"mitigated_texts": num_shared, "embeddings": num_shared}
+    }
@@ -0,0 +1,164 @@
+import os
+import numpy as np
+import pandas as pd
+
+from typing import Any, Dict, Iterator, List, Optional
+from config.settings import MODEL_SETTINGS
+from src.utils.metrics import track_time, increment
+from src.utils.streaming import stream_stages
+
+def iter_candidate_pdfs(directory: str) -> Iterator[str]:
+    """
+    Candidate PDF paths in the same order as `load_candidate_pdfs`.
+    """
+    if not os.path.isdir(directory):
+        raise NotADirectoryError(f"Candidate directory not found: {directory}")
+    for file in os.listdir(directory):
+        if file.lower().endswith('.pdf'):
+            yield os.path.join(directory, file)
+
+def featurize_candidates(
+    job_embedding: Any,
+    cv_embeddings: np.ndarray,
+    mitigated_texts: List[str],
+    skill_keywords: Optional[List[str]],
+    feature_schema: str = "job",
+    gender_directions: Any = None
+) -> (pd.DataFrame, Optional[List[float]]):
+    """
+    Ranking features for a batch of CVs plus the keyword ratios the prefilter
+    needs (None without keywords).
+    """
+    from src.data.embeddings import create_feature_vectors_dataset, create_global_feature_vectors_dataset
+    from src.utils.text_utils import extract_matched_keywords
+
+    if feature_schema == "global":
+        features = create_global_feature_vectors_dataset(
+            job_embedding, cv_embeddings, mitigated_texts, skill_keywords or [],
+            gender_directions=gender_directions
+        )
+    else:
+        features = create_feature_vectors_dataset(
+            job_embedding, cv_embeddings, mitigated_texts,
+            gender_directions=gender_directions,
+            skill_keywords=skill_keywords
+        )
+
+    ratios = None
+    if skill_keywords:
+        ratios = [len(extract_matched_keywords(text, skill_keywords)) / len(skill_keywords) for text in mitigated_texts]
+    return features, ratios
+
+def stream_candidate_features(
+    candidates_dir: str,
+    job_description_text: str,
+    tokenizer,
+    model,
+    skill_keywords: Optional[List[str]],
+    feature_schema: str = "job",
+    batch_size: Optional[int] = None,
+    queue_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Extracts, debiases, embeds and featurizes the CVs in `candidates_dir` as
+    concurrent stages over micro-batches (see `stream_stages`). Mitigated texts
+    and intermediate tensors only live while their batch is in flight; what is
+    kept per CV is its raw text (needed by the reports), its embedding row and
+    its feature row. Near duplicates of an earlier CV (MODEL_SETTINGS['dedup_enabled'])
+    are found in the extract stage and skip the later stages, sharing the rows of
+    their canonical CV. The result can be passed to `rank_candidates(precomputed=...)`.
+    """
+    from src.data.document_extraction import extract_text_from_pdf
+    from src.data.embeddings import get_text_embedding, get_text_embeddings
+    from src.models.linguistic_debiasing import mitigate_gender_bias
+    from src.models.embedding_debiasing import compute_gender_subspace
+    from src.utils.file_utils import clean_html
+    from src.utils.dedup import NearDuplicateDetector
+
+    if batch_size is None:
+        batch_size = MODEL_SETTINGS['streaming_batch_size']
+    if queue_size is None:
+        queue_size = MODEL_SETTINGS['streaming_queue_size']
+
+    # Same job-side preparation as rank_candidates
+    job_description_text_mitigated = mitigate_gender_bias(clean_html(job_description_text))
+    job_embedding = get_text_embedding(job_description_text_mitigated, tokenizer, model)
+    gender_directions = compute_gender_subspace(tokenizer, model)
+
+    detector = NearDuplicateDetector() if MODEL_SETTINGS['dedup_enabled'] else None
+    extracted = [0]
+
+    def extract(paths: List[str]) -> Dict[str, Any]:
+        with track_time("extraction"):
+            texts = [extract_text_from_pdf(path) for path in paths]
+        increment("documents_extracted", len(paths))
+        # Positions in the whole stream; a canonical CV always comes before its duplicates
+        start = extracted[0]
+        extracted[0] += len(paths)
+        canonical, similarity = [], []
+        for position, text in enumerate(texts, start):
+            source, score = detector.add(position, text) if detector else (position, 1.0)
+            canonical.append(source)
+            similarity.append(score)
+        unique = [offset for offset, source in enumerate(canonical) if source == start + offset]
+        return {"files": paths, "texts": texts, "start": start, "canonical": canonical, "similarity": similarity, "unique": unique}
+
+    # Only the batch's canonical CVs go through the remaining stages
+    def mitigate(batch: Dict[str, Any]) -> Dict[str, Any]:
+        batch["mitigated"] = [mitigate_gender_bias(batch["texts"][offset]) for offset in batch["unique"]]
+        return batch
+
+    def embed(batch: Dict[str, Any]) -> Dict[str, Any]:
+        if batch["mitigated"]:
+            batch["embeddings"] = get_text_embeddings(batch["mitigated"], tokenizer, model)
+        return batch
+
+    def featurize(batch: Dict[str, Any]) -> Dict[str, Any]:
+        if batch["mitigated"]:
+            batch["features"], batch["keyword_ratios"] = featurize_candidates(
+                job_embedding, batch["embeddings"], batch["mitigated"], skill_keywords, feature_schema, gender_directions
+            )
+        del batch["mitigated"]
+        return batch
+
+    candidate_files, candidate_texts, embeddings, features, ratios = [], [], [], [], []
+    canonical, similarity, unique_positions = [], [], []
+    for batch in stream_stages(
+        iter_candidate_pdfs(candidates_dir),
+        [("extract", extract), ("mitigate", mitigate), ("embed", embed), ("featurize", featurize)],
+        batch_size=batch_size,
+        queue_size=queue_size
+    ):
+        candidate_files.extend(batch["files"])
+        candidate_texts.extend(batch["texts"])
+        canonical.extend(batch["canonical"])
+        similarity.extend(batch["similarity"])
+        if batch["unique"]:
+            unique_positions.extend(batch["start"] + offset for offset in batch["unique"])
+            embeddings.append(batch["embeddings"])
+            features.append(batch["features"])
+            ratios.extend(batch["keyword_ratios"] or [])
+        print(f"Streamed {len(candidate_files)} CVs...")
+
+    if not candidate_files:
+        raise FileNotFoundError("No PDF files found in candidate directory.")
+
+    # Row of each CV among the canonical CVs that were embedded and featurized
+    unique_rows = {position: row for row, position in enumerate(unique_positions)}
+    rows = np.array([unique_rows[source] for source in canonical])
+    num_shared = len(candidate_files) - len(unique_positions)
+    if num_shared:
+        increment("near_duplicates_reused", num_shared)
+
+    return {
+        "candidate_files": candidate_files,
+        "candidate_texts": candidate_texts,
+        "job_embedding": job_embedding,
+        "gender_directions": gender_directions,
+        "cv_embeddings": np.concatenate(embeddings)[rows],
+        "features": pd.concat(features, ignore_index=True).iloc[rows].reset_index(drop=True),
+        "keyword_ratios": np.array(ratios)[rows] if ratios else None,
+        "canonical_indices": np.array(canonical),
+        "duplicate_similarity": np.array(similarity, dtype=np.float64),
+        "reused": {"mitigated_texts": num_shared, "embeddings": num_shared}
+    }
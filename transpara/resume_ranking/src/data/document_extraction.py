@@ -1,13 +1,12 @@
 import os
-import pdfplumber
-import pytesseract
 import logging
 logging.getLogger("pdfminer").setLevel(logging.ERROR)
 
-from pdf2image import convert_from_path
 from typing import Optional, List
 
 def is_text_based_pdf(pdf_path: str) -> bool:
+    import pdfplumber
+
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
@@ -31,6 +30,8 @@ def extract_text_from_pdf(pdf_path: str) -> str:
         return extract_text_with_ocr(pdf_path)
 
 def _extract_text_directly(pdf_path: str) -> str:
+    import pdfplumber
+
     extracted_text = ""
     try:
         with pdfplumber.open(pdf_path) as pdf:
@@ -44,22 +45,28 @@ def _extract_text_directly(pdf_path: str) -> str:
     return extracted_text
 
 def extract_text_with_ocr(pdf_path: str, dpi: int = 300) -> str:
+    import pytesseract
+    from pdf2image import convert_from_path
+    from src.utils.metrics import track_time, increment
+
     try:
-        text = ""
-        images = convert_from_path(pdf_path, dpi=dpi)
-        
-        for i, image in enumerate(images):
-            image_path = f"temp_page_{i+1}.jpg"
-            try:
-                image.save(image_path, "JPEG")
-                
-                page_text = pytesseract.image_to_string(image)
-                text += page_text + "\n"
-            finally:
-                if os.path.exists(image_path):
-                    os.remove(image_path)
+        with track_time("ocr"):
+            text = ""
+            images = convert_from_path(pdf_path, dpi=dpi)
+            increment("ocr_pages", len(images))
+
+            for i, image in enumerate(images):
+                image_path = f"temp_page_{i+1}.jpg"
+                try:
+                    image.save(image_path, "JPEG")
                     
-        return text
+                    page_text = pytesseract.image_to_string(image)
+                    text += page_text + "\n"
+                finally:
+                    if os.path.exists(image_path):
+                        os.remove(image_path)
+                        
+            return text
     except Exception as e:
         print(f"OCR Error: {e}")
         return ""
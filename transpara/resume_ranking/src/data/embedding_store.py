@@ -0,0 +1,390 @@
+import os
+import json
+import threading
+import numpy as np
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from config.settings import MODEL_SETTINGS, EMBEDDING_STORE_DIR
+from src.data.embeddings import cosine_similarity_matrix, normalize_embeddings, to_embedding_matrix
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+def quantize(embeddings: np.ndarray, dtype: str) -> (np.ndarray, Optional[np.ndarray]):
+    """
+    Returns the stored representation and, for int8, the per-row scale.
+    """
+    embeddings = to_embedding_matrix(embeddings)
+    if dtype == "int8":
+        scales = np.abs(embeddings).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+    return embeddings.astype(STORAGE_DTYPES[dtype]), None
+
+def dequantize(stored: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    if scales is not None:
+        return stored.astype(np.float32) * scales[:, None]
+    return stored.astype(np.float32)
+
+def measure_quantization_error(embeddings: np.ndarray, dtype: str, num_pairs: int = 2000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Compares cosine similarities before and after a quantize/dequantize round trip:
+    for each vector against its own reconstruction, and for random pairs.
+    """
+    original = to_embedding_matrix(embeddings)
+    restored = dequantize(*quantize(original, dtype))
+    original_norm = normalize_embeddings(original)
+    restored_norm = normalize_embeddings(restored)
+
+    self_cosine = np.sum(original_norm * restored_norm, axis=1)
+    report = {
+        "dtype": dtype,
+        "samples": int(len(original)),
+        "min_self_cosine": round(float(self_cosine.min()), 6) if len(original) else None
+    }
+
+    if len(original) > 1:
+        rng = np.random.default_rng(seed)
+        left = rng.integers(0, len(original), size=num_pairs)
+        right = rng.integers(0, len(original), size=num_pairs)
+        exact = np.sum(original_norm[left] * original_norm[right], axis=1)
+        approx = np.sum(restored_norm[left] * restored_norm[right], axis=1)
+        errors = np.abs(exact - approx)
+        report.update({
+            "mean_pair_error": round(float(errors.mean()), 6),
+            "max_pair_error": round(float(errors.max()), 6)
+        })
+    return report
+
+class EmbeddingStore:
+    """
+    Append-only embedding archive on memory-mapped files.
+
+    `vectors.bin` holds rows in the storage dtype (float32, float16 or int8 with
+    a per-row float32 scale in `scales.bin`), `norms.bin` the L2 norm of each
+    dequantized row, `keys.jsonl` holds one
+    `[id, metadata]` line per row and `index.json` only the dimension, dtype
+    and quantization report. Readers map the files read-only, so worker
+    processes share the OS page cache instead of each holding a copy. Appends
+    only ever extend the files and then publish the new row count through
+    `count`; readers replay the key lines past the rows they have already
+    seen. Re-adding an id appends a new row and repoints the id. One writer at
+    a time is assumed per store (enforced with a lock file where fcntl is
+    available).
+    """
+
+    def __init__(self, store_dir: str, dim: Optional[int] = None, dtype: Optional[str] = None):
+        self.store_dir = store_dir
+        self._lock = threading.RLock()
+        self._rows: Dict[str, int] = {}
+        self._row_keys: List[str] = []
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._count = 0
+        # Bytes of keys.jsonl replayed so far
+        self._log_offset = 0
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._norms: Optional[np.memmap] = None
+
+        header = self._read_header()
+        if header:
+            self.dim, self.dtype = header["dim"], header["dtype"]
+            if dtype and dtype != self.dtype:
+                print(f"⚠️ Embedding store at {store_dir} uses {self.dtype}; ignoring requested {dtype}.")
+        else:
+            self.dim = dim
+            self.dtype = dtype or MODEL_SETTINGS['embedding_store_dtype']
+        if self.dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype: {self.dtype}")
+        self.quantization_error = (header or {}).get("quantization_error")
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    @property
+    def count(self) -> int:
+        """
+        Rows written so far, including rows of ids that were re-added since.
+        """
+        return self._count
+
+    @property
+    def rows(self) -> Dict[str, int]:
+        """
+        Current row of each id. Read-only.
+        """
+        return self._rows
+
+    @property
+    def row_keys(self) -> List[str]:
+        """
+        Id each row was written under; only ever grows. Read-only.
+        """
+        return self._row_keys
+
+    def get_metadata(self, key: str) -> Dict[str, Any]:
+        return self._metadata.get(key, {})
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.store_dir, "index.json")
+
+    @property
+    def keys_path(self) -> str:
+        return os.path.join(self.store_dir, "keys.jsonl")
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.store_dir, "vectors.bin")
+
+    @property
+    def scales_path(self) -> str:
+        return os.path.join(self.store_dir, "scales.bin")
+
+    @property
+    def norms_path(self) -> str:
+        return os.path.join(self.store_dir, "norms.bin")
+
+    @property
+    def count_path(self) -> str:
+        return os.path.join(self.store_dir, "count")
+
+    def _read_count(self) -> int:
+        try:
+            with open(self.count_path, "r", encoding="utf-8") as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return 0
+
+    def _read_header(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return None
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _replay(self, count: int):
+        """
+        Applies the key lines of rows [self._count, count).
+        """
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._log_offset)
+            for _ in range(count - self._count):
+                line = f.readline()
+                key, metadata = json.loads(line)
+                row = len(self._row_keys)
+                self._row_keys.append(key)
+                self._rows[key] = row
+                if metadata:
+                    self._metadata[key] = metadata
+                else:
+                    self._metadata.pop(key, None)
+                self._log_offset += len(line)
+        self._count = count
+
+    def _map_files(self):
+        self._vectors = self._scales = self._norms = None
+        if self._count:
+            self._vectors = np.memmap(self.vectors_path, dtype=STORAGE_DTYPES[self.dtype], mode="r", shape=(self._count, self.dim))
+            self._norms = np.memmap(self.norms_path, dtype=np.float32, mode="r", shape=(self._count,))
+            if self.dtype == "int8":
+                self._scales = np.memmap(self.scales_path, dtype=np.float32, mode="r", shape=(self._count,))
+
+    def refresh(self) -> bool:
+        """
+        Maps rows appended by other processes since this store was opened.
+        Returns whether anything changed.
+        """
+        with self._lock:
+            # Every append raises the count, however close together two appends are
+            count = self._read_count()
+            if count == self._count:
+                return False
+            if count < self._count:
+                # The store was deleted and rebuilt under us
+                self._rows, self._row_keys, self._metadata = {}, [], {}
+                self._count = self._log_offset = 0
+            header = self._read_header()
+            self.dim, self.dtype = header["dim"], header["dtype"]
+            self.quantization_error = header.get("quantization_error")
+            self._replay(count)
+            self._map_files()
+            return True
+
+    def _write_atomic(self, path: str, content: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def add(self, keys: List[str], embeddings: Any, metadata: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Appends embeddings (and optional per-id metadata) under `keys`.
+        Returns the number of rows written.
+        """
+        matrix = to_embedding_matrix(embeddings)
+        if len(keys) != len(matrix) or (metadata is not None and len(metadata) != len(keys)):
+            raise ValueError("keys and embeddings must have the same length")
+        if not keys:
+            return 0
+
+        with self._lock:
+            os.makedirs(self.store_dir, exist_ok=True)
+            with open(os.path.join(self.store_dir, ".lock"), "w") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Another writer may have appended since we last looked
+                self.refresh()
+
+                if self.dim is None:
+                    self.dim = matrix.shape[1]
+                elif matrix.shape[1] != self.dim:
+                    raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match store dimension {self.dim}")
+
+                stored, scales = quantize(matrix, self.dtype)
+                with open(self.vectors_path, "ab") as f:
+                    # Truncate anything a crashed writer left past the published count
+                    f.truncate(self._count * self.dim * stored.itemsize)
+                    f.write(stored.tobytes())
+                if scales is not None:
+                    with open(self.scales_path, "ab") as f:
+                        f.truncate(self._count * 4)
+                        f.write(scales.tobytes())
+                with open(self.norms_path, "ab") as f:
+                    f.truncate(self._count * 4)
+                    f.write(np.linalg.norm(dequantize(stored, scales), axis=1).astype(np.float32).tobytes())
+                lines = b"".join(
+                    json.dumps([key, metadata[offset] if metadata is not None else {}], separators=(",", ":")).encode("utf-8") + b"\n"
+                    for offset, key in enumerate(keys)
+                )
+                with open(self.keys_path, "ab") as f:
+                    f.truncate(self._log_offset)
+                    f.write(lines)
+
+                self._update_quantization_error(matrix)
+                self._write_atomic(self.index_path, json.dumps({
+                    "dim": self.dim,
+                    "dtype": self.dtype,
+                    "quantization_error": self.quantization_error
+                }))
+                self._write_atomic(self.count_path, str(self._count + len(keys)))
+                self._replay(self._count + len(keys))
+                self._map_files()
+        return len(keys)
+
+    def _update_quantization_error(self, matrix: np.ndarray):
+        if self.dtype == "float32":
+            return
+        batch = measure_quantization_error(matrix, self.dtype)
+        previous = self.quantization_error
+        if not previous or previous.get("dtype") != self.dtype:
+            self.quantization_error = batch
+            return
+
+        total = previous["samples"] + batch["samples"]
+        merged = {"dtype": self.dtype, "samples": total}
+        merged["min_self_cosine"] = min(value for value in (previous.get("min_self_cosine"), batch.get("min_self_cosine")) if value is not None)
+        if "mean_pair_error" in batch or "mean_pair_error" in previous:
+            merged["max_pair_error"] = max(previous.get("max_pair_error", 0.0), batch.get("max_pair_error", 0.0))
+            merged["mean_pair_error"] = round(
+                (previous.get("mean_pair_error", 0.0) * previous["samples"] + batch.get("mean_pair_error", 0.0) * batch["samples"]) / total, 6
+            )
+        self.quantization_error = merged
+
+    def get(self, keys: List[str]) -> np.ndarray:
+        """
+        Dequantized float32 rows for `keys`, in order. Raises KeyError for unknown ids.
+        """
+        self.refresh()
+        with self._lock:
+            rows = np.array([self._rows[key] for key in keys], dtype=np.int64)
+            if len(rows) == 0:
+                return np.empty((0, self.dim or 0), dtype=np.float32)
+            return self.get_rows(rows)
+
+    def get_rows(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Dequantized float32 rows by row number.
+        """
+        with self._lock:
+            rows = np.asarray(rows, dtype=np.int64)
+            if len(rows) == 0:
+                return np.empty((0, self.dim or 0), dtype=np.float32)
+            scales = self._scales[rows] if self._scales is not None else None
+            return dequantize(self._vectors[rows], scales)
+
+    def similarity(self, query: Any, keys: Optional[List[str]] = None, block_size: Optional[int] = None) -> np.ndarray:
+        """
+        Cosine similarity of `query` rows against stored rows (all rows when `keys` is None).
+        Blocks of stored rows are multiplied as stored (converted to float32 into
+        one reused buffer) and the scores rescaled by the stored scales and norms,
+        so rows are never dequantized or renormalized.
+        """
+        self.refresh()
+        if block_size is None:
+            block_size = MODEL_SETTINGS['similarity_block_size']
+        query = normalize_embeddings(query)
+        with self._lock:
+            rows = None if keys is None else np.array([self._rows[key] for key in keys], dtype=np.int64)
+            total = self._count if rows is None else len(rows)
+            # Scores are built row-major per stored row, so each block's output is contiguous
+            result = np.empty((total, len(query)), dtype=np.float32)
+            if total == 0:
+                return result.T
+
+            norms = self._norms[:total] if rows is None else self._norms[rows]
+            weights = np.divide(1.0, norms, out=np.zeros(total, dtype=np.float32), where=norms > 0)
+            if self._scales is not None:
+                weights *= self._scales[:total] if rows is None else self._scales[rows]
+
+            buffer = None if self.dtype == "float32" else np.empty((min(block_size, total), self.dim), dtype=np.float32)
+            for start in range(0, total, block_size):
+                stop = min(start + block_size, total)
+                # Contiguous slices of the memmap when scoring every row
+                block = self._vectors[start:stop] if rows is None else self._vectors[rows[start:stop]]
+                if buffer is not None:
+                    np.copyto(buffer[:stop - start], block, casting="unsafe")
+                    block = buffer[:stop - start]
+                np.dot(block, query.T, out=result[start:stop])
+            result *= weights[:, None]
+            return result.T
+
+@lru_cache(maxsize=None)
+def get_embedding_store(store_dir: Optional[str] = None) -> EmbeddingStore:
+    if store_dir is None:
+        model_name = MODEL_SETTINGS['embedding_model'].replace("/", "_")
+        store_dir = os.path.join(EMBEDDING_STORE_DIR, f"{model_name}_{MODEL_SETTINGS['pooling']}_{MODEL_SETTINGS['max_length']}")
+    return EmbeddingStore(store_dir)
+
+def embed_texts(texts: List[str], tokenizer, model, store: Optional[EmbeddingStore] = None) -> np.ndarray:
+    """
+    Embeds `texts`, reusing rows already in `store` (keyed by text hash) and
+    appending the ones it had to compute. Returns a float32 matrix in input order.
+    """
+    from src.data.embeddings import get_text_embedding
+    from src.utils.text_utils import compute_text_hash
+
+    if store is None:
+        return to_embedding_matrix([get_text_embedding(text, tokenizer, model) for text in texts])
+
+    keys = [compute_text_hash(text) for text in texts]
+    store.refresh()
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in store and key not in missing:
+            missing[key] = text
+
+    if missing:
+        print(f"Embedding {len(missing)} new texts ({len(texts) - len(missing)} reused from the embedding store)...")
+        computed = [get_text_embedding(text, tokenizer, model) for text in missing.values()]
+        store.add(list(missing), computed)
+    return store.get(keys)
@@ -1,12 +1,16 @@
-import torch
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional, Any, Union
-from transformers import AutoTokenizer, AutoModel
+from typing import Dict, List, Tuple, Optional, Any, Union, TYPE_CHECKING
 
 from config.settings import MODEL_SETTINGS
+from src.utils.metrics import track_time, increment
+
+if TYPE_CHECKING:
+    import torch
 
 def load_mbert_model(model_name: Optional[str] = None):
+    from transformers import AutoTokenizer, AutoModel
+
     if model_name is None:
         model_name = MODEL_SETTINGS['embedding_model']
         
@@ -16,14 +20,16 @@ def load_mbert_model(model_name: Optional[str] = None):
     
     return tokenizer, model
 
+@track_time("embedding")
 def get_text_embedding(
     text: str,
     tokenizer,
     model,
     max_length: Optional[int] = None,
     pooling: str = 'cls'
-) -> torch.Tensor:
-    
+) -> "torch.Tensor":
+    import torch
+
     if max_length is None:
         max_length = MODEL_SETTINGS['max_length']
     
@@ -37,13 +43,54 @@ def get_text_embedding(
     
     with torch.no_grad():
         outputs = model(**inputs)
+    increment("texts_embedded")
     
     if pooling == 'cls':
         return outputs.last_hidden_state[:, 0, :].squeeze(0)
     else:
         return torch.mean(outputs.last_hidden_state, dim=1).squeeze(0)
 
-def cosine_similarity(a: torch.Tensor, b: torch.Tensor) -> float:
+@track_time("embedding")
+def get_text_embeddings(
+    texts: List[str],
+    tokenizer,
+    model,
+    max_length: Optional[int] = None,
+    pooling: str = 'cls'
+) -> np.ndarray:
+    """
+    Batched `get_text_embedding`: one forward pass over `texts`, returned as a
+    float32 matrix. Every input is padded to `max_length` either way, so each
+    row matches the single-text embedding.
+    """
+    import torch
+
+    if max_length is None:
+        max_length = MODEL_SETTINGS['max_length']
+    if not texts:
+        return np.empty((0, model.config.hidden_size), dtype=np.float32)
+
+    inputs = tokenizer(
+        list(texts),
+        return_tensors="pt",
+        truncation=True,
+        max_length=max_length,
+        padding="max_length"
+    )
+
+    with torch.no_grad():
+        outputs = model(**inputs)
+    increment("texts_embedded", len(texts))
+
+    if pooling == 'cls':
+        pooled = outputs.last_hidden_state[:, 0, :]
+    else:
+        pooled = torch.mean(outputs.last_hidden_state, dim=1)
+    return pooled.cpu().numpy().astype(np.float32)
+
+def cosine_similarity(a: "torch.Tensor", b: "torch.Tensor") -> float:
+    import torch
+
     a_norm = a / a.norm(p=2, dim=0, keepdim=True)
     b_norm = b / b.norm(p=2, dim=0, keepdim=True)
     
@@ -51,18 +98,76 @@ def cosine_similarity(a: torch.Tensor, b: torch.Tensor) -> float:
     
     return similarity
 
+def to_embedding_matrix(embeddings: Any) -> np.ndarray:
+    """
+    Stacks a tensor, a list of 1-D tensors/arrays or an array into a 2-D float32 matrix.
+    """
+    if isinstance(embeddings, (list, tuple)):
+        if not embeddings:
+            return np.empty((0, 0), dtype=np.float32)
+        embeddings = [to_embedding_matrix(embedding)[0] for embedding in embeddings]
+    elif hasattr(embeddings, "detach"):
+        embeddings = embeddings.detach().cpu().numpy()
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    return matrix[None, :] if matrix.ndim == 1 else matrix
+
+def normalize_embeddings(embeddings: Any) -> np.ndarray:
+    """
+    L2-normalizes each row so dot products equal `cosine_similarity`. Zero rows stay zero.
+    """
+    matrix = to_embedding_matrix(embeddings)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def cosine_similarity_matrix(
+    a: Any,
+    b: Any,
+    normalized: bool = False,
+    block_size: Optional[int] = None
+) -> np.ndarray:
+    """
+    N x M cosine similarities between the rows of `a` and `b`. Rows of `a` are
+    processed in blocks of `block_size`, so only one block is normalized at a time
+    besides the output. Pass `normalized=True` for pre-normalized matrices.
+    """
+    if block_size is None:
+        block_size = MODEL_SETTINGS['similarity_block_size']
+
+    a = to_embedding_matrix(a)
+    b = to_embedding_matrix(b) if normalized else normalize_embeddings(b)
+    result = np.empty((a.shape[0], b.shape[0]), dtype=np.float32)
+    for start in range(0, a.shape[0], block_size):
+        block = a[start:start + block_size]
+        if not normalized:
+            block = normalize_embeddings(block)
+        np.matmul(block, b.T, out=result[start:start + block_size])
+    return result
+
+@track_time("debiasing")
+def debias_embedding_matrix(embeddings: np.ndarray, gender_directions: Any, lambda_bias: float = 1.0) -> np.ndarray:
+    """
+    Row-wise equivalent of `debias_embedding`, returning a new matrix.
+    """
+    debiased = np.array(embeddings, dtype=np.float32)
+    for direction in to_embedding_matrix(gender_directions):
+        projection = debiased @ direction / np.dot(direction, direction)
+        debiased -= lambda_bias * projection[:, None] * direction
+    return debiased
+
 def extract_skill_keywords(text: str, skill_keywords: List[str]) -> Dict[str, int]:
     text = text.lower()
     return {skill: text.count(skill.lower()) for skill in skill_keywords}
 
 def create_feature_vector(
-    job_embedding: torch.Tensor,
-    cv_embedding: torch.Tensor,
-    gender_directions: Optional[torch.Tensor] = None,
+    job_embedding: "torch.Tensor",
+    cv_embedding: "torch.Tensor",
+    gender_directions: Optional["torch.Tensor"] = None,
     text: Optional[str] = None,
     skill_keywords: Optional[List[str]] = None
 ) -> Dict[str, float]:
-    
+    import torch
+
     features = {}
     
     cos_sim = cosine_similarity(job_embedding, cv_embedding)
@@ -94,32 +199,135 @@ def create_feature_vector(
     return features
 
 def create_feature_vectors_dataset(
-    job_embedding: torch.Tensor,
-    cv_embeddings: List[torch.Tensor],
+    job_embedding: "torch.Tensor",
+    cv_embeddings: List["torch.Tensor"],
     cv_texts: Optional[List[str]] = None,
-    gender_directions: Optional[torch.Tensor] = None,
+    gender_directions: Optional["torch.Tensor"] = None,
     skill_keywords: Optional[List[str]] = None,
     similarity_scores: Optional[List[float]] = None
 ) -> pd.DataFrame:
-    
-    data = []
-    for idx, cv_embedding in enumerate(cv_embeddings):
-        features = create_feature_vector(
-            job_embedding, 
-            cv_embedding, 
-            gender_directions=gender_directions,
-            text=cv_texts[idx] if cv_texts else None,
-            skill_keywords=skill_keywords
-        )
-        
-        if similarity_scores is not None:
-            features["target_score"] = similarity_scores[idx]
-            
-        data.append(features)
-    
-    return pd.DataFrame(data)
+    """
+    Batched `create_feature_vector` over all CVs: same columns in the same order.
+    """
+    job_vector = to_embedding_matrix(job_embedding)[0]
+    cv_matrix = to_embedding_matrix(cv_embeddings)
+    if len(cv_matrix) == 0:
+        return pd.DataFrame()
+
+    columns: Dict[str, Any] = {"cosine_similarity": cosine_similarity_matrix(cv_matrix, job_vector)[:, 0]}
+
+    if gender_directions is not None:
+        cv_matrix = debias_embedding_matrix(cv_matrix, gender_directions)
+
+    embed_dim = cv_matrix.shape[1]
+    sampled = np.arange(0, embed_dim, embed_dim // MODEL_SETTINGS['sample_dims'])
+    for i in sampled:
+        columns[f"embed_dim_{i}"] = cv_matrix[:, i]
+
+    diff_matrix = np.abs(job_vector[sampled] - cv_matrix[:, sampled])
+    for col, i in enumerate(sampled):
+        columns[f"embed_diff_{i}"] = diff_matrix[:, col]
+
+    if cv_texts and skill_keywords is not None:
+        lowered = [text.lower() for text in cv_texts]
+        for skill in dict.fromkeys(skill_keywords):
+            columns[f"skill_{skill}"] = [text.count(skill.lower()) for text in lowered]
+
+    if similarity_scores is not None:
+        columns["target_score"] = similarity_scores
+
+    df = pd.DataFrame(columns)
+    float_columns = [name for name in df.columns if name.startswith(("cosine_", "embed_"))]
+    df[float_columns] = df[float_columns].astype(np.float64)
+    return df
+
+def create_global_feature_vector(
+    job_embedding: "torch.Tensor",
+    cv_embedding: "torch.Tensor",
+    text: str,
+    keywords: List[str],
+    gender_directions: Optional["torch.Tensor"] = None
+) -> Dict[str, float]:
+    """
+    Job-independent features: the column set is the same for every job, so one
+    model trained over many (job, CV) pairs can score any new job.
+    """
+    import torch
+    from src.utils.text_utils import extract_skill_keywords as count_keyword_matches
+
+    features = {"cosine_similarity": cosine_similarity(job_embedding, cv_embedding)}
+
+    keyword_counts = count_keyword_matches(text, keywords) if keywords else {}
+    num_keywords = max(len(keywords or []), 1)
+    occurrences = sum(keyword_counts.values())
+    features["keyword_coverage"] = len(keyword_counts) / num_keywords
+    features["keyword_match_count"] = float(len(keyword_counts))
+    features["keyword_density"] = occurrences / num_keywords
+    # Repeated mentions count with diminishing returns
+    features["keyword_weighted_matches"] = float(sum(np.log1p(count) for count in keyword_counts.values())) / num_keywords
+
+    if gender_directions is not None:
+        cv_embedding = debias_embedding(cv_embedding.clone(), gender_directions)
+
+    embed_dim = cv_embedding.shape[0]
+    step = embed_dim // MODEL_SETTINGS['sample_dims']
+    diff_embedding = torch.abs(job_embedding - cv_embedding)
+    for i in range(0, embed_dim, step):
+        features[f"embed_diff_{i}"] = diff_embedding[i].item()
+
+    return features
+
+def create_global_feature_vectors_dataset(
+    job_embedding: "torch.Tensor",
+    cv_embeddings: List["torch.Tensor"],
+    cv_texts: List[str],
+    keywords: List[str],
+    gender_directions: Optional["torch.Tensor"] = None,
+    similarity_scores: Optional[List[float]] = None
+) -> pd.DataFrame:
+    """
+    Batched `create_global_feature_vector` over all CVs: same columns in the same order.
+    """
+    from src.utils.text_utils import extract_skill_keywords as count_keyword_matches
+
+    job_vector = to_embedding_matrix(job_embedding)[0]
+    cv_matrix = to_embedding_matrix(cv_embeddings)
+    if len(cv_matrix) == 0:
+        return pd.DataFrame()
+
+    rows = []
+    num_keywords = max(len(keywords or []), 1)
+    for text in cv_texts:
+        keyword_counts = count_keyword_matches(text, keywords) if keywords else {}
+        rows.append({
+            "keyword_coverage": len(keyword_counts) / num_keywords,
+            "keyword_match_count": float(len(keyword_counts)),
+            "keyword_density": sum(keyword_counts.values()) / num_keywords,
+            "keyword_weighted_matches": float(sum(np.log1p(count) for count in keyword_counts.values())) / num_keywords
+        })
+
+    columns: Dict[str, Any] = {"cosine_similarity": cosine_similarity_matrix(cv_matrix, job_vector)[:, 0].astype(np.float64)}
+    keyword_df = pd.DataFrame(rows)
+    for name in keyword_df.columns:
+        columns[name] = keyword_df[name].to_numpy()
+
+    if gender_directions is not None:
+        cv_matrix = debias_embedding_matrix(cv_matrix, gender_directions)
+
+    embed_dim = cv_matrix.shape[1]
+    sampled = np.arange(0, embed_dim, embed_dim // MODEL_SETTINGS['sample_dims'])
+    diff_matrix = np.abs(job_vector[sampled] - cv_matrix[:, sampled]).astype(np.float64)
+    for col, i in enumerate(sampled):
+        columns[f"embed_diff_{i}"] = diff_matrix[:, col]
+
+    if similarity_scores is not None:
+        columns["target_score"] = similarity_scores
+
+    return pd.DataFrame(columns)
+
+def debias_embedding(embedding: "torch.Tensor", gender_directions: "torch.Tensor", lambda_bias: float = 1.0) -> "torch.Tensor":
+    import torch
 
-def debias_embedding(embedding: torch.Tensor, gender_directions: torch.Tensor, lambda_bias: float = 1.0) -> torch.Tensor:
     for direction in gender_directions:
         projection = torch.dot(embedding, direction) / torch.dot(direction, direction)
         embedding -= lambda_bias * projection * direction
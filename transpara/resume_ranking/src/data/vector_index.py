@@ -0,0 +1,287 @@
+import os
+import json
+import threading
+import numpy as np
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config.settings import MODEL_SETTINGS, VECTOR_INDEX_DIR
+from src.data.embeddings import normalize_embeddings
+from src.data.embedding_store import EmbeddingStore, dequantize, quantize
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+def make_candidate_key(job_id: str, user_id: str) -> str:
+    return f"{job_id}:{user_id}"
+
+class VectorIndex:
+    """
+    Persistent cosine-similarity index keyed by string ids. Used for CV embeddings
+    from every job and for job description embeddings.
+
+    Vectors are kept normalized in an EmbeddingStore in `index_dir`, so they are
+    appended under a lock file and memory-mapped like the training embeddings,
+    in the `vector_index_dtype` storage dtype. Inserts are persisted by
+    `add` and other processes' inserts are picked up by `reload_if_changed`.
+    Search uses hnswlib when it is installed and the index is large enough to
+    benefit, otherwise an exact matrix product over contiguous blocks of rows.
+    """
+
+    def __init__(self, index_dir: str, backend: Optional[str] = None):
+        self.index_dir = index_dir
+        self.backend = backend or MODEL_SETTINGS['vector_index_backend']
+        self.chunk_size = MODEL_SETTINGS['vector_index_chunk_size']
+        self._lock = threading.RLock()
+        self._store = EmbeddingStore(index_dir, dtype=MODEL_SETTINGS['vector_index_dtype'])
+        self._hnsw = None
+        self._live: Optional[np.ndarray] = None
+        # Rows of each `job_id` in the metadata, grouped up to `_grouped_rows`
+        self._job_rows: Dict[str, List[int]] = {}
+        self._grouped_rows = 0
+        self._import_legacy_files()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    @property
+    def hnsw_path(self) -> str:
+        return os.path.join(self.index_dir, "hnsw.bin")
+
+    def _import_legacy_files(self):
+        """
+        Moves an index saved as embeddings.npy + ids.json by older code into the store.
+        """
+        vectors_path = os.path.join(self.index_dir, "embeddings.npy")
+        ids_path = os.path.join(self.index_dir, "ids.json")
+        if len(self._store) or not (os.path.exists(vectors_path) and os.path.exists(ids_path)):
+            return
+        vectors = np.load(vectors_path)
+        with open(ids_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        if len(entries) == len(vectors):
+            keys = [entry["key"] for entry in entries]
+            metadata = [{name: value for name, value in entry.items() if name != "key"} for entry in entries]
+            self._store.add(keys, vectors, metadata)
+            print(f"Imported {len(keys)} embeddings from the legacy vector index at {self.index_dir}.")
+        else:
+            print(f"⚠️ Legacy vector index at {self.index_dir} is inconsistent ({len(entries)} ids, {len(vectors)} vectors). Skipping it.")
+        os.remove(vectors_path)
+        os.remove(ids_path)
+
+    def _use_hnsw(self) -> bool:
+        if hnswlib is None or self.backend == "numpy":
+            return False
+        return self.backend == "hnsw" or len(self._store) >= MODEL_SETTINGS['hnsw_min_size']
+
+    def _live_mask(self) -> np.ndarray:
+        # Rows of re-added keys stay in the store but are no longer searchable
+        if self._live is None or len(self._live) != self._store.count:
+            live = np.zeros(self._store.count, dtype=bool)
+            live[list(self._store.rows.values())] = True
+            self._live = live
+        return self._live
+
+    def _rows_of_jobs(self, job_ids: Iterable[str]) -> List[int]:
+        # Only rows appended since the last call are looked at
+        if self._grouped_rows > self._store.count:
+            # The store was rebuilt
+            self._job_rows, self._grouped_rows = {}, 0
+        row_keys = self._store.row_keys
+        for row in range(self._grouped_rows, self._store.count):
+            job_id = self._store.get_metadata(row_keys[row]).get("job_id")
+            if job_id is not None:
+                self._job_rows.setdefault(job_id, []).append(row)
+        self._grouped_rows = self._store.count
+        return [row for job_id in job_ids for row in self._job_rows.get(job_id, [])]
+
+    def reload_if_changed(self):
+        """
+        Picks up inserts persisted by another process (e.g. a pipeline run).
+        """
+        with self._lock:
+            if self._store.refresh():
+                self._hnsw = None
+                self._live = None
+
+    def add(self, keys: List[str], embeddings: np.ndarray, metadata: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Inserts or replaces embeddings by key and persists them. Keys whose
+        vector and metadata are unchanged are skipped, so re-running a job does
+        not grow the store. Returns the number of new keys.
+        """
+        vectors = normalize_embeddings(embeddings)
+        if len(keys) != len(vectors):
+            raise ValueError("keys and embeddings must have the same length")
+        metadata = metadata or [{} for _ in keys]
+
+        with self._lock:
+            self._store.refresh()
+            latest = {key: position for position, key in enumerate(keys)}
+            positions = [position for key, position in latest.items() if key not in self._store]
+            existing = [(key, position) for key, position in latest.items() if key in self._store]
+            if existing:
+                stored = self._store.get([key for key, _ in existing])
+                restored = dequantize(*quantize(vectors[[position for _, position in existing]], self._store.dtype))
+                for (key, position), old, new in zip(existing, stored, restored):
+                    if not np.array_equal(old, new) or self._store.get_metadata(key) != metadata[position]:
+                        positions.append(position)
+            added = sum(1 for key in latest if key not in self._store)
+            if not positions:
+                return 0
+
+            positions.sort()
+            self._store.add([keys[position] for position in positions], vectors[positions], [metadata[position] for position in positions])
+            self._live = None
+            if self._hnsw is not None:
+                rows = np.arange(self._store.count - len(positions), self._store.count)
+                self._hnsw_add(rows, self._store.get_rows(rows))
+            return added
+
+    def _hnsw_add(self, rows: np.ndarray, vectors: np.ndarray):
+        if self._hnsw.get_max_elements() < self._store.count:
+            self._hnsw.resize_index(max(self._store.count, 2 * self._hnsw.get_max_elements()))
+        self._hnsw.add_items(vectors, rows)
+
+    def _get_hnsw(self):
+        count = self._store.count
+        if self._hnsw is not None or not self._use_hnsw() or count == 0:
+            return self._hnsw
+        # The graph holds every store row; rows of re-added keys are filtered at query time
+        index = hnswlib.Index(space="ip", dim=self._store.dim)
+        if os.path.exists(self.hnsw_path):
+            index.load_index(self.hnsw_path, max_elements=count)
+            if index.get_current_count() != count:
+                index = None
+        else:
+            index = None
+        if index is None:
+            index = hnswlib.Index(space="ip", dim=self._store.dim)
+            index.init_index(
+                max_elements=max(count, 1024),
+                M=MODEL_SETTINGS['hnsw_m'],
+                ef_construction=MODEL_SETTINGS['hnsw_ef_construction']
+            )
+            for start in range(0, count, self.chunk_size):
+                rows = np.arange(start, min(start + self.chunk_size, count))
+                index.add_items(self._store.get_rows(rows), rows)
+        index.set_ef(MODEL_SETTINGS['hnsw_ef_search'])
+        self._hnsw = index
+        return index
+
+    def _exact_search(self, query: np.ndarray, k: int, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self._store.similarity(query, block_size=self.chunk_size)[0]
+        rows = np.flatnonzero(valid)
+        scores = scores[rows]
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores, rows = scores[top], rows[top]
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 10,
+        exclude_keys: Optional[Iterable[str]] = None,
+        exclude_job_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns up to `k` entries most similar to `query_embedding`, each with its
+        metadata and a `score` equal to the cosine similarity. Entries under
+        `exclude_keys` or whose metadata `job_id` is in `exclude_job_ids` are skipped.
+        """
+        query = normalize_embeddings(query_embedding)
+        with self._lock:
+            if len(self._store) == 0 or k <= 0:
+                return []
+            rows_by_key = self._store.rows
+            excluded = [rows_by_key[key] for key in (exclude_keys or []) if key in rows_by_key]
+            if exclude_job_ids:
+                excluded.extend(self._rows_of_jobs(exclude_job_ids))
+            valid = self._live_mask()
+            if excluded:
+                valid = valid.copy()
+                valid[excluded] = False
+            searchable = int(np.count_nonzero(valid))
+            k = min(k, searchable)
+            if k <= 0:
+                return []
+
+            index = self._get_hnsw()
+            if index is not None:
+                # Ask for enough neighbours to still have k after dropping excluded and stale rows
+                skipped = self._store.count - searchable
+                labels, distances = index.knn_query(query, k=min(k + skipped, self._store.count))
+                hits = [(int(row), 1.0 - float(dist)) for row, dist in zip(labels[0], distances[0]) if valid[row]]
+                rows = np.array([row for row, _ in hits[:k]], dtype=np.int64)
+                scores = np.array([score for _, score in hits[:k]], dtype=np.float32)
+            else:
+                rows, scores = self._exact_search(query, k, valid)
+
+            row_keys = self._store.row_keys
+            results = []
+            for row, score in zip(rows, scores):
+                key = row_keys[int(row)]
+                results.append({**self._store.get_metadata(key), "key": key, "score": round(float(score), 4)})
+            return results
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._store.rows)
+
+    def get_vector(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            if key not in self._store:
+                return None
+            return self._store.get([key])[0]
+
+    def similar_to(self, key: str, k: int = 10) -> List[Dict[str, Any]]:
+        query = self.get_vector(key)
+        if query is None:
+            raise KeyError(f"No embedding indexed for {key}")
+        return self.search(query, k=k, exclude_keys=[key])
+
+    def save(self):
+        """
+        Inserts are already persisted by `add`; this only saves the HNSW graph.
+        """
+        with self._lock:
+            # A saved graph whose row count no longer matches the store is rebuilt on load
+            if self._hnsw is not None:
+                os.makedirs(self.index_dir, exist_ok=True)
+                self._hnsw.save_index(self.hnsw_path)
+
+@lru_cache(maxsize=None)
+def get_vector_index(index_dir: str) -> VectorIndex:
+    return VectorIndex(index_dir)
+
+def get_candidate_index() -> VectorIndex:
+    return get_vector_index(os.path.join(VECTOR_INDEX_DIR, "candidates"))
+
+def get_job_index() -> VectorIndex:
+    return get_vector_index(os.path.join(VECTOR_INDEX_DIR, "jobs"))
+
+def index_job_embeddings(
+    job_id: str,
+    user_ids: List[str],
+    cv_embeddings: np.ndarray,
+    job_embedding: Optional[np.ndarray] = None
+) -> int:
+    """
+    Adds one job's CV embeddings (and optionally its description embedding) to
+    the shared indexes and persists them. Returns the number of new CVs.
+    """
+    candidate_index = get_candidate_index()
+    keys = [make_candidate_key(job_id, user_id) for user_id in user_ids]
+    metadata = [{"job_id": job_id, "user_id": user_id} for user_id in user_ids]
+    added = candidate_index.add(keys, cv_embeddings, metadata)
+    candidate_index.save()
+
+    if job_embedding is not None:
+        job_index = get_job_index()
+        job_index.add([job_id], job_embedding, [{"job_id": job_id}])
+        job_index.save()
+    return added
@@ -7,6 +7,8 @@ from src.models.ranking_model import (
 
 from src.models.embedding_debiasing import (
     compute_gender_subspace,
+    compute_embedding_associations,
+    get_word_embeddings,
     debias_embedding,
     cosine_similarity
 )
@@ -17,6 +19,13 @@ from src.models.linguistic_debiasing import (
     detect_gendered_terms
 )
 
+from src.models.gendered_language import (
+    iter_tokens,
+    count_tokens,
+    scan_terms,
+    neutralize_terms
+)
+
 
 __all__ = [
     'load_ranking_model',
@@ -24,9 +33,15 @@ __all__ = [
     'rank_candidates',
     'display_ranking',
     'compute_gender_subspace',
+    'compute_embedding_associations',
+    'get_word_embeddings',
     'debias_embedding',
     'cosine_similarity',
     'compute_gender_bias_score',
     'mitigate_gender_bias',
-    'detect_gendered_terms'
+    'detect_gendered_terms',
+    'iter_tokens',
+    'count_tokens',
+    'scan_terms',
+    'neutralize_terms'
 ]
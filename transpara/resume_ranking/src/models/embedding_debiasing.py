@@ -1,22 +1,40 @@
-import torch
+import threading
 import numpy as np
-from typing import Optional
-from config.settings import GENDER_WORD_PAIRS, MODEL_SETTINGS
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from config.settings import ATTRIBUTE_SETS, GENDER_WORD_PAIRS, MODEL_SETTINGS
+from src.data.embeddings import cosine_similarity, cosine_similarity_matrix
+from src.utils.metrics import track_time
 
-def compute_gender_subspace(tokenizer, model) -> torch.Tensor:
+if TYPE_CHECKING:
+    import torch
+
+# Embeddings of single words keyed by (model name, word), shared across runs
+_word_embeddings: Dict[Tuple[Any, str], np.ndarray] = {}
+_word_embeddings_lock = threading.Lock()
+
+def get_word_embeddings(words: List[str], tokenizer, model) -> np.ndarray:
     from src.data.embeddings import get_text_embedding
 
-    gender_diffs = []
-    for male_word, female_word in GENDER_WORD_PAIRS:
-        male_emb = get_text_embedding(male_word, tokenizer, model)
-        female_emb = get_text_embedding(female_word, tokenizer, model)
-        gender_diffs.append((male_emb - female_emb).numpy())
+    model_key = getattr(model, "name_or_path", None) or id(model)
+    with _word_embeddings_lock:
+        for word in words:
+            if (model_key, word) not in _word_embeddings:
+                _word_embeddings[(model_key, word)] = get_text_embedding(word, tokenizer, model).numpy()
+        return np.stack([_word_embeddings[(model_key, word)] for word in words])
 
-    gender_diffs = np.array(gender_diffs)
+@track_time("debiasing")
+def compute_gender_subspace(tokenizer, model) -> "torch.Tensor":
+    import torch
+
+    male_words = [male_word for male_word, _ in GENDER_WORD_PAIRS]
+    female_words = [female_word for _, female_word in GENDER_WORD_PAIRS]
+    gender_diffs = get_word_embeddings(male_words, tokenizer, model) - get_word_embeddings(female_words, tokenizer, model)
     U, s, Vt = np.linalg.svd(gender_diffs, full_matrices=False)
     return torch.tensor(Vt[:3]).float()
 
-def debias_embedding(embedding: torch.Tensor, gender_directions: torch.Tensor, lambda_bias: Optional[float] = None) -> torch.Tensor:
+def debias_embedding(embedding: "torch.Tensor", gender_directions: "torch.Tensor", lambda_bias: Optional[float] = None) -> "torch.Tensor":
+    import torch
+
     if lambda_bias is None:
         lambda_bias = MODEL_SETTINGS['lambda_bias']
 
@@ -27,7 +45,37 @@ def debias_embedding(embedding: torch.Tensor, gender_directions: torch.Tensor, l
 
     return debiased_emb
 
-def cosine_similarity(a: torch.Tensor, b: torch.Tensor) -> float:
-    a_norm = a / a.norm(p=2, dim=0, keepdim=True)
-    b_norm = b / b.norm(p=2, dim=0, keepdim=True)
-    return torch.dot(a_norm, b_norm).item()
+@track_time("debiasing")
+def compute_embedding_associations(cv_embeddings: Any, tokenizer, model) -> Dict[str, Any]:
+    """
+    WEAT-style audit of CV embeddings. For each CV, the career and gender
+    associations are the mean cosine similarity to the career minus the family
+    words of ATTRIBUTE_SETS, and to the male minus the female words of
+    GENDER_WORD_PAIRS; both come from one CV x word similarity matrix. The
+    WEAT effect size of the male vs female words on career vs family describes
+    the embedding model itself.
+    """
+    career, family = ATTRIBUTE_SETS["career"], ATTRIBUTE_SETS["family"]
+    male = [male_word for male_word, _ in GENDER_WORD_PAIRS]
+    female = [female_word for _, female_word in GENDER_WORD_PAIRS]
+    word_matrix = get_word_embeddings(career + family + male + female, tokenizer, model)
+
+    # Column 0: career - family, column 1: male - female
+    weights = np.zeros((len(word_matrix), 2), dtype=np.float32)
+    sizes = np.cumsum([0, len(career), len(family), len(male), len(female)])
+    weights[sizes[0]:sizes[1], 0] = 1.0 / len(career)
+    weights[sizes[1]:sizes[2], 0] = -1.0 / len(family)
+    weights[sizes[2]:sizes[3], 1] = 1.0 / len(male)
+    weights[sizes[3]:sizes[4], 1] = -1.0 / len(female)
+
+    associations = cosine_similarity_matrix(cv_embeddings, word_matrix) @ weights
+
+    attribute_words = word_matrix[:sizes[2]]
+    word_scores = cosine_similarity_matrix(word_matrix[sizes[2]:], attribute_words) @ weights[:sizes[2], 0]
+    effect_size = (word_scores[:len(male)].mean() - word_scores[len(male):].mean()) / (word_scores.std(ddof=1) + 1e-12)
+
+    return {
+        "career_association": associations[:, 0],
+        "gender_association": associations[:, 1],
+        "weat_effect_size": float(effect_size)
+    }
@@ -0,0 +1,364 @@
+import re
+import unicodedata
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+# Rule-based replacement for the spaCy pipeline in the gendered-language
+# functions. Tokenization follows spaCy's English tokenizer (whitespace tokens,
+# prefix/suffix/infix splitting, contractions and abbreviations), so token counts
+# and term matches agree with len(nlp(text)) on Latin-script CV text. Other
+# scripts use approximate character classes.
+
+_WHITESPACE = re.compile(r"\s+|\S+")
+
+_PUNCT = ["…", "……", ",", ":", ";", "!", "?", "¿", "؟", "¡", "(", ")", "[", "]", "{", "}", "<", ">", "_", "#", "*", "&",
+          "。", "？", "！", "，", "、", "；", "：", "～", "·", "।", "،", "۔", "؛", "٪"]
+_QUOTES = ["'", '"', "”", "“", "`", "‘", "´", "’", "‚", ",", "„", "»", "«", "「", "」", "『", "』", "（", "）", "〔", "〕",
+           "【", "】", "《", "》", "〈", "〉", "⟦", "⟧"]
+_CURRENCY = ["$", "£", "€", "¥", "฿", "US$", "C$", "A$", "₽", "﷼", "₴", "₠", "₡", "₢", "₣", "₤", "₥", "₦", "₧", "₨", "₩",
+             "₪", "₫", "₭", "₮", "₯", "₰", "₱", "₲", "₳", "₵", "₶", "₷", "₸", "₹", "₺", "₻", "₼", "₾", "₿"]
+_UNITS = ["km", "km²", "km³", "m", "m²", "m³", "dm", "dm²", "dm³", "cm", "cm²", "cm³", "mm", "mm²", "mm³", "ha", "µm", "nm",
+          "yd", "in", "ft", "kg", "g", "mg", "µg", "t", "lb", "oz", "m/s", "km/h", "kmh", "mph", "hPa", "Pa", "mbar", "mb",
+          "MB", "kb", "KB", "gb", "GB", "tb", "TB", "T", "G", "M", "K", "%"]
+_HYPHENS = ["-", "–", "—", "--", "---", "——", "~"]
+
+_ABBREVIATIONS = """
+    Adm. Ak. Ala. Apr. Ariz. Ark. Aug. Bros. Calif. Co. Colo. Conn. Corp. D.C. Dec. Del. Dr. E.G. E.g. Feb. Fla. Ga. Gen.
+    Gov. I.E. I.e. Ia. Id. Ill. Inc. Ind. Jan. Jr. Jul. Jun. Kan. Kans. Ky. La. Ltd. Mar. Mass. Md. Messrs. Mich. Minn.
+    Miss. Mo. Mont. Mr. Mrs. Ms. Mt. N.C. N.D. N.H. N.J. N.M. N.Y. Neb. Nebr. Nev. Nov. Oct. Okla. Ore. Pa. Ph.D. Prof.
+    Rep. Rev. S.C. Sen. Sep. Sept. St. Tenn. Va. Wash. Wis. a.m. co. e.g. i.e. p.m. v.s. vs. °C. °F. °K. °c. °f. °k.
+    a. b. c. d. e. f. g. h. i. j. k. l. m. n. o. p. q. r. s. t. u. v. w. x. y. z. ä. ö. ü.
+""".split()
+
+_EMOTICONS = r"""
+    (*_*) (-8 (-: (-; (-_-) (._.) (: (; (= (>_<) (^_^) (o: (¬_¬) )-: ): 8) 8-) 8-D :'( :') :'-( :'-) :( :(( :((( :() :)
+    :)) :))) :* :-( :-(( :-((( :-) :-)) :-))) :-* :-/ :-0 :-3 :-> :-D :-O :-P :-X :-] :-o :-p :-x :-| :-} :/ :0 :1 :3 :>
+    :D :O :P :X :] :o :o) :p :x :| :} ;) ;-) ;-D ;D ;_; <.< </3 <3 <33 <333 <space> =( =) =/ =3 =D =[ =] =| >.< >.> >:(
+    >:o ><(((*> [-: [: [= \") ]= o.O ._. ‘S ‘s
+""".split()
+
+# Pronouns are never rewritten (spaCy tags them PRON)
+PRONOUNS = frozenset({"he", "she", "his", "her", "hers", "him", "himself", "herself"})
+
+def _special_cases() -> Dict[str, List[str]]:
+    """
+    Tokenizer exceptions: contractions split into their parts, abbreviations
+    and emoticons kept whole.
+    """
+    exc: Dict[str, List[str]] = {}
+
+    def add(orth: str, *pieces: str):
+        exc[orth] = list(pieces) or [orth]
+
+    def clitics(orth: str, endings: Iterable[str], with_ve: Iterable[str] = ()):
+        for ending in endings:
+            add(orth + "'" + ending, orth, "'" + ending)
+            add(orth + ending, orth, ending)
+        for ending in with_ve:
+            add(orth + "'" + ending + "'ve", orth, "'" + ending, "'ve")
+            add(orth + ending + "ve", orth, ending, "ve")
+
+    for orth in ("i", "I"):
+        clitics(orth, ["m"])
+        add(orth + "'ma", orth, "'m", "a")
+        add(orth + "ma", orth, "m", "a")
+    for pron in ("i", "you", "he", "she", "it", "we", "they"):
+        for orth in (pron, pron.title()):
+            clitics(orth, ["ll", "d"], ["ll", "d"])
+            if pron in ("i", "you", "we", "they"):
+                clitics(orth, ["ve"])
+            if pron in ("you", "we", "they"):
+                clitics(orth, ["re"])
+            if pron in ("he", "she", "it"):
+                clitics(orth, ["s"])
+    words = {
+        "who": ["s", "ll", "re", "ve", "d"], "what": ["s", "ll", "re", "ve", "d"], "when": ["s", "ll", "re", "ve", "d"],
+        "where": ["s", "ll", "re", "ve", "d"], "why": ["s", "ll", "re", "ve", "d"], "how": ["s", "ll", "re", "ve", "d"],
+        "there": ["s", "ll", "re", "ve", "d"], "that": ["s", "ll", "d"], "this": ["s", "ll", "d"],
+        "these": ["ll", "re", "ve", "d"], "those": ["ll", "re", "ve", "d"]
+    }
+    for word, endings in words.items():
+        for orth in (word, word.title()):
+            clitics(orth, endings, ["ll", "d"])
+    for verb in ("ca", "could", "do", "does", "did", "had", "may", "might", "must", "need", "ought", "sha", "should", "wo", "would"):
+        for orth in (verb, verb.title()):
+            add(orth + "n't", orth, "n't")
+            add(orth + "nt", orth, "nt")
+            add(orth + "n't've", orth, "n't", "'ve")
+            add(orth + "ntve", orth, "nt", "ve")
+            if verb in ("could", "might", "must", "should", "would"):
+                clitics(orth, ["ve"])
+    for verb in ("ai", "are", "is", "was", "were", "have", "has", "dare"):
+        for orth in (verb, verb.title()):
+            add(orth + "n't", orth, "n't")
+            add(orth + "nt", orth, "nt")
+    for word in ("doin", "goin", "nuthin", "nothin", "ol", "somethin", "lovin", "havin"):
+        for orth in (word, word.title()):
+            add(orth + "'")
+    for word in ("cause", "cos", "coz", "cuz"):
+        for orth in (word, word.title()):
+            add("'" + orth)
+    for orth in ("'bout", "'em", "'nuff", "'s", "'S", "'d", "'re", "'ll", "''", "'", "and/or", "w/o", "C++"):
+        add(orth)
+    for orth, pieces in (
+        ("y'all", ("y'", "all")), ("yall", ("y", "all")), ("how'd'y", ("how", "'d", "'y")), ("How'd'y", ("How", "'d", "'y")),
+        ("not've", ("not", "'ve")), ("notve", ("not", "ve")), ("Not've", ("Not", "'ve")), ("Notve", ("Not", "ve")),
+        ("cannot", ("can", "not")), ("Cannot", ("Can", "not")), ("gonna", ("gon", "na")), ("Gonna", ("Gon", "na")),
+        ("gotta", ("got", "ta")), ("Gotta", ("Got", "ta")), ("let's", ("let", "'s")), ("Let's", ("Let", "'s")),
+        ("c'mon", ("c'm", "on")), ("C'mon", ("C'm", "on"))
+    ):
+        add(orth, *pieces)
+    for hour in range(1, 13):
+        for period in ("am", "a.m.", "pm", "p.m."):
+            add(f"{hour}{period}", str(hour), period)
+    for orth in _ABBREVIATIONS + _EMOTICONS:
+        add(orth)
+    # Real words that the clitic rules above would split
+    for orth in ("Ill", "ill", "Its", "its", "Hell", "hell", "Shell", "shell", "Shed", "shed", "were", "Were", "Well", "well", "Whore", "whore"):
+        exc.pop(orth, None)
+    for orth, pieces in list(exc.items()):
+        if "'" in orth:
+            exc[orth.replace("'", "’")] = [piece.replace("'", "’") for piece in pieces]
+    return exc
+
+def _char_class(predicate) -> str:
+    ranges = []
+    for cp in range(0x30, 0x3000):
+        if predicate(chr(cp)):
+            if ranges and ranges[-1][1] == cp - 1:
+                ranges[-1][1] = cp
+            else:
+                ranges.append([cp, cp])
+    return "".join(f"\\u{low:04x}" if low == high else f"\\u{low:04x}-\\u{high:04x}" for low, high in ranges)
+
+def _alternatives(items: Iterable[str]) -> str:
+    return "|".join(re.escape(item) for item in items)
+
+class _Rules:
+    def __init__(self):
+        lower = _char_class(lambda c: c.islower() and c not in "ªµº")
+        upper = _char_class(str.isupper)
+        alpha = _char_class(lambda c: c.isalpha() and c not in "ªµº" and unicodedata.category(c) != "Lm"
+                            and not 0x1c0 <= ord(c) <= 0x1c3)
+        icons = "[" + _char_class(lambda c: unicodedata.category(c) == "So") + "\U0001F000-\U0001FAFF]"
+        quotes = "".join(re.escape(q) for q in _QUOTES)
+        punct = _alternatives(_PUNCT)
+
+        self.prefix = re.compile(
+            "^(?:§|%|=|—|–|\\+(?![0-9])|" + punct + "|\\.\\.+|" + _alternatives(_QUOTES) + "|"
+            + _alternatives(_CURRENCY) + "|" + icons + ")"
+        )
+        self.suffix = re.compile(
+            "(?:" + punct + "|\\.\\.+|" + _alternatives(_QUOTES) + "|" + icons + "|'s|'S|’s|’S|—|–"
+            + "|(?<=[0-9])\\+|(?<=°[FfCcKk])\\.|(?<=[0-9])(?:" + _alternatives(_CURRENCY) + ")"
+            + "|(?<=[0-9])(?:" + _alternatives(_UNITS) + ")"
+            + "|(?<=[0-9" + lower + "%²\\-+" + re.escape("".join(_PUNCT)) + "|." + quotes + "])\\."
+            + "|(?<=[" + upper + "][" + upper + "])\\.)$"
+        )
+        self.infix = re.compile(
+            "\\.\\.+|…|" + icons + "|(?<=[0-9])[+\\-*^](?=[0-9-])"
+            + "|(?<=[" + lower + quotes + "])\\.(?=[" + upper + quotes + "])"
+            + "|(?<=[" + alpha + "]),(?=[" + alpha + "])"
+            + "|(?<=[" + alpha + "0-9])(?:" + _alternatives(_HYPHENS) + ")(?=[" + alpha + "])"
+            + "|(?<=[" + alpha + "0-9])[:<>=/](?=[" + alpha + "])"
+        )
+        self.url = re.compile(
+            "^(?:(?:[\\w+\\-.]{2,})://)?(?:\\S+(?::\\S*)?@)?(?:"
+            "(?!(?:10|127)(?:\\.\\d{1,3}){3})(?!(?:169\\.254|192\\.168)(?:\\.\\d{1,3}){2})"
+            "(?!172\\.(?:1[6-9]|2\\d|3[0-1])(?:\\.\\d{1,3}){2})"
+            "(?:[1-9]\\d?|1\\d\\d|2[01]\\d|22[0-3])(?:\\.(?:1?\\d{1,2}|2[0-4]\\d|25[0-5])){2}"
+            "(?:\\.(?:[1-9]\\d?|1\\d\\d|2[0-4]\\d|25[0-4]))"
+            "|(?:(?:[A-Za-z0-9\\u00a1-\\uffff][A-Za-z0-9\\u00a1-\\uffff_-]{0,62})?[A-Za-z0-9\\u00a1-\\uffff]\\.)+"
+            "(?:[" + lower + "]{2,63}))(?::\\d{2,5})?(?:[/?#]\\S*)?$"
+        )
+        self.specials = _special_cases()
+        # Special cases that affix splitting breaks up (mostly emoticons) are
+        # merged back afterwards, as spaCy's special-case matcher does
+        self.merges: Dict[Tuple[str, ...], str] = {}
+        for orth in self.specials:
+            pieces = tuple(self.split(orth, {}))
+            if len(pieces) > 1:
+                self.merges[pieces] = orth
+        self.merge_starts = frozenset(pieces[0] for pieces in self.merges)
+        self.merge_lengths = sorted({len(pieces) for pieces in self.merges}, reverse=True)
+
+    def split(self, chunk: str, specials: Dict[str, List[str]]) -> List[str]:
+        """
+        Tokens of a whitespace-free chunk, following spaCy's affix loop.
+        """
+        prefixes: List[str] = []
+        suffixes: List[str] = []
+        string = chunk
+        last_size = 0
+        while string and len(string) != last_size:
+            if string in specials:
+                break
+            last_size = len(string)
+            match = self.prefix.search(string)
+            pre_len = match.end() if match else 0
+            if pre_len and string[pre_len:] in specials:
+                prefixes.append(string[:pre_len])
+                string = string[pre_len:]
+                break
+            match = self.suffix.search(string[pre_len:])
+            suf_len = match.end() - match.start() if match else 0
+            if suf_len and string[:-suf_len] in specials:
+                suffixes.append(string[-suf_len:])
+                string = string[:-suf_len]
+                break
+            if pre_len and suf_len and pre_len + suf_len <= len(string):
+                prefixes.append(string[:pre_len])
+                suffixes.append(string[-suf_len:])
+                string = string[pre_len:-suf_len]
+            elif pre_len:
+                prefixes.append(string[:pre_len])
+                string = string[pre_len:]
+            elif suf_len:
+                suffixes.append(string[-suf_len:])
+                string = string[:-suf_len]
+
+        tokens = prefixes
+        if string in specials:
+            tokens.extend(specials[string])
+        elif string and self.url.match(string):
+            tokens.append(string)
+        elif string:
+            start = 0
+            for match in self.infix.finditer(string):
+                if match.start() == 0:
+                    continue
+                if match.start() != start:
+                    tokens.append(string[start:match.start()])
+                if match.start() != match.end():
+                    tokens.append(match.group(0))
+                start = match.end()
+            if string[start:]:
+                tokens.append(string[start:])
+        tokens.extend(reversed(suffixes))
+        return tokens
+
+    def merge(self, tokens: List[str]) -> List[str]:
+        """
+        Re-tokenizes runs of tokens spelling a special case as that special case;
+        longest runs first, then leftmost, without overlaps.
+        """
+        spans = []
+        for start, token in enumerate(tokens):
+            if token in self.merge_starts:
+                for length in self.merge_lengths:
+                    if start + length <= len(tokens) and tuple(tokens[start:start + length]) in self.merges:
+                        spans.append((-length, start))
+        if not spans:
+            return tokens
+        taken = set()
+        merged = {}
+        for length, start in sorted(spans):
+            positions = range(start, start - length)
+            if not taken.intersection(positions):
+                taken.update(positions)
+                merged[start] = start - length
+        result = []
+        idx = 0
+        while idx < len(tokens):
+            if idx in merged:
+                result.extend(self.specials[self.merges[tuple(tokens[idx:merged[idx]])]])
+                idx = merged[idx]
+            else:
+                result.append(tokens[idx])
+                idx += 1
+        return result
+
+@lru_cache(maxsize=1)
+def _rules() -> _Rules:
+    return _Rules()
+
+@lru_cache(maxsize=65536)
+def _split_chunk(chunk: str) -> Tuple[str, ...]:
+    rules = _rules()
+    tokens = rules.split(chunk, rules.specials)
+    if len(tokens) > 1:
+        tokens = rules.merge(tokens)
+    return tuple(tokens)
+
+def _iter_chunks(text: str) -> Iterator[Tuple[int, str, bool]]:
+    """
+    (offset, chunk, is_whitespace) for the whitespace-token and word chunks of
+    `text`; a single space after a word belongs to that word, as in spaCy.
+    """
+    after_word = False
+    for match in _WHITESPACE.finditer(text):
+        chunk = match.group(0)
+        if chunk[0].isspace():
+            start = match.start()
+            if after_word and chunk[0] == " ":
+                chunk = chunk[1:]
+                start += 1
+            if chunk:
+                yield start, chunk, True
+            after_word = False
+        else:
+            yield match.start(), chunk, False
+            after_word = True
+
+def iter_tokens(text: str) -> Iterator[Tuple[int, str]]:
+    """
+    (offset, token) pairs matching the tokens of spaCy's English tokenizer.
+    """
+    for offset, chunk, is_whitespace in _iter_chunks(text):
+        if is_whitespace:
+            yield offset, chunk
+            continue
+        for token in _split_chunk(chunk):
+            yield offset, token
+            offset += len(token)
+
+def count_tokens(text: str) -> int:
+    return sum(1 if is_whitespace else len(_split_chunk(chunk)) for _, chunk, is_whitespace in _iter_chunks(text))
+
+def scan_terms(text: str, vocabularies: Iterable[FrozenSet[str]]) -> Tuple[int, List[List[str]]]:
+    """
+    Token count of `text` and, per vocabulary, the matching tokens of the
+    lowercased text, in one pass over its chunks.
+    """
+    vocabularies = list(vocabularies)
+    found: List[List[str]] = [[] for _ in vocabularies]
+    total = 0
+    for _, chunk, is_whitespace in _iter_chunks(text):
+        if is_whitespace:
+            total += 1
+            continue
+        total += len(_split_chunk(chunk))
+        for token in _split_chunk(chunk.lower()):
+            for terms, vocabulary in zip(found, vocabularies):
+                if token in vocabulary:
+                    terms.append(token)
+    return total, found
+
+def _is_capitalized(token: Optional[str]) -> bool:
+    return bool(token) and token[0].isupper() and token.isalpha()
+
+def neutralize_terms(text: str, replacements: Dict[str, str]) -> str:
+    """
+    Replaces gendered nouns by their neutral form in one pass over the tokens.
+    Pronouns are kept, and so are capitalized terms next to another capitalized
+    word, which are taken to be part of a name or title ("Lady Gaga").
+    """
+    tokens = list(iter_tokens(text))
+    parts: List[str] = []
+    position = 0
+    for idx, (offset, token) in enumerate(tokens):
+        lower_text = token.lower()
+        if lower_text not in replacements or lower_text in PRONOUNS:
+            continue
+        if token[0].isupper():
+            previous = tokens[idx - 1][1] if idx > 0 else None
+            following = tokens[idx + 1][1] if idx + 1 < len(tokens) else None
+            if _is_capitalized(previous) or _is_capitalized(following):
+                continue
+        replacement = replacements[lower_text]
+        parts.append(text[position:offset])
+        parts.append(replacement.capitalize() if token.istitle() else replacement)
+        position = offset + len(token)
+    parts.append(text[position:])
+    return "".join(parts)
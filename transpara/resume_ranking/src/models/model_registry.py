@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import hashlib
+import tempfile
+import subprocess
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from config.settings import MODEL_SETTINGS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+REGISTRY_DIR_NAME = "registry"
+CURRENT_POINTER = "current.json"
+MODEL_FILE_NAME = "ranking_model.joblib"
+
+def compute_model_version(job_hash: str, keywords: List[str], code_version: Optional[str] = None) -> str:
+    """
+    Version key for a job model: the job text hash, the keyword set and the code version.
+    """
+    if code_version is None:
+        code_version = MODEL_SETTINGS['model_code_version']
+    payload = json.dumps({
+        "job_hash": job_hash,
+        "keywords": sorted(keywords),
+        "code_version": code_version
+    }, sort_keys=True)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()[:12]
+
+def get_version_dir(models_dir: str, version: str) -> str:
+    return os.path.join(models_dir, REGISTRY_DIR_NAME, version)
+
+def get_version_model_path(models_dir: str, version: str) -> str:
+    return os.path.join(get_version_dir(models_dir, version), MODEL_FILE_NAME)
+
+def _write_json_atomic(data: Dict[str, Any], path: str):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False, encoding="utf-8") as tmp:
+        json.dump(data, tmp, indent=2, ensure_ascii=False)
+        tmp_path = tmp.name
+    os.replace(tmp_path, path)
+
+def publish_model_version(
+    models_dir: str,
+    version: str,
+    job_hash: str,
+    keywords: List[str],
+    training_strategy: str
+) -> Dict[str, Any]:
+    """
+    Marks a trained version as ready and atomically points `current.json` at it.
+    The model file must already be saved at get_version_model_path(models_dir, version).
+    """
+    model_path = get_version_model_path(models_dir, version)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Cannot publish model version {version}: {model_path} is missing")
+
+    manifest = {
+        "version": version,
+        "job_hash": job_hash,
+        "keywords": sorted(keywords),
+        "code_version": MODEL_SETTINGS['model_code_version'],
+        "training_strategy": training_strategy,
+        "model_path": model_path,
+        "published_at": datetime.utcnow().isoformat()
+    }
+    _write_json_atomic(manifest, os.path.join(get_version_dir(models_dir, version), "manifest.json"))
+    _write_json_atomic(manifest, os.path.join(models_dir, REGISTRY_DIR_NAME, CURRENT_POINTER))
+    print(f"📦 Published ranking model version {version}")
+    return manifest
+
+def get_latest_ready_version(models_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the manifest of the version `current.json` points to. A model saved by
+    older code directly under models_dir is reported as the 'legacy' version.
+    """
+    pointer_path = os.path.join(models_dir, REGISTRY_DIR_NAME, CURRENT_POINTER)
+    if os.path.exists(pointer_path):
+        with open(pointer_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if os.path.exists(manifest.get("model_path", "")):
+            return manifest
+
+    legacy_path = os.path.join(models_dir, MODEL_FILE_NAME)
+    if os.path.exists(legacy_path):
+        return {"version": "legacy", "model_path": legacy_path, "keywords": None}
+    return None
+
+def keywords_from_model(model: Any) -> List[str]:
+    feature_names = getattr(model, "feature_names_in_", [])
+    return [name[len("skill_"):] for name in feature_names if name.startswith("skill_")]
+
+def start_training_worker(args: List[str], log_path: str) -> subprocess.Popen:
+    """
+    Starts `python <args>` as a detached process in its own session, so it
+    outlives the caller and nobody waits on it. Output goes to `log_path`.
+    """
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, "a", encoding="utf-8") as log_file:
+        return subprocess.Popen(
+            [sys.executable] + args,
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+
+@contextmanager
+def training_lock(lock_dir: str) -> Iterator[None]:
+    """
+    Serializes training workers across processes (where fcntl is available),
+    so several jobs retraining at once do not each load the models at once.
+    """
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, ".training.lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
@@ -1,30 +1,43 @@
 import os
 import json
 import numpy as np
-import tempfile
-import json
-import matplotlib.pyplot as plt
 
-from typing import Optional, Dict, Any
-from firebase_admin import storage
+from typing import Optional, Dict, Any, Callable
 from uuid import uuid4
 from joblib import load
 from typing import List
-from src.data.embeddings import get_text_embedding, create_feature_vectors_dataset
+from src.data.embeddings import get_text_embedding, cosine_similarity_matrix, create_feature_vectors_dataset, create_global_feature_vectors_dataset
 from src.models.linguistic_debiasing import mitigate_gender_bias
 from src.models.embedding_debiasing import compute_gender_subspace
-from src.analysis.shap_explanation import generate_model_explanations, save_shap_summary_plot
-from api.openai_client import initialize_openai_client
+from src.analysis.shap_explanation import generate_model_explanations, save_shap_summary_plot, load_tree_explainer
 from src.utils.file_utils import save_to_json, load_from_json, extract_user_id, clean_html
 from src.utils.firebase_utils import get_candidate_id_from_firestore, get_candidate_name_from_firestore, load_json_from_firebase
-from src.utils.job_desc_keyword_extraction import extract_keywords_from_job_description
+from src.utils.plot_renderer import submit_plot
+from src.utils.metrics import track_time, increment
+from src.utils.dedup import find_duplicates, build_dedup_report
+from src.utils.text_utils import extract_matched_keywords
+from config.settings import MODEL_SETTINGS
+
+
+def plot_score_distribution(counts: np.ndarray, bin_edges: np.ndarray, output_path: str):
+    import matplotlib.pyplot as plt
 
+    plt.figure(figsize=(8, 5))
+    plt.stairs(counts, bin_edges, fill=True, edgecolor='black', alpha=0.75)
+    plt.xlabel("Predicted Match Score")
+    plt.ylabel("Number of Candidates")
+    plt.title("Distribution of Predicted Candidate Scores")
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=300)
+    plt.close()
+    print(f"📊 Prediction score distribution plot saved to {output_path}")
 
 def load_ranking_model(model_path: str) -> any:
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model file not found: {model_path}")
     return load(model_path)
 
+@track_time("prediction")
 def predict_with_ranking_model(model: any, features_df) -> (np.ndarray, any):
     X = features_df.drop('target_score', axis=1) if 'target_score' in features_df.columns else features_df
     predictions = model.predict(X)
@@ -32,6 +45,35 @@ def predict_with_ranking_model(model: any, features_df) -> (np.ndarray, any):
     result_df['predicted_score'] = predictions
     return predictions, result_df
 
+def prefilter_candidates(
+    job_embedding: np.ndarray,
+    cv_embeddings: np.ndarray,
+    candidate_texts: List[str],
+    skill_keywords: Optional[List[str]],
+    top_m: int,
+    keyword_ratios: Optional[np.ndarray] = None
+) -> (np.ndarray, np.ndarray):
+    """
+    Cheap first stage: scores every CV with the same 0.6 * cosine + 0.4 * keyword
+    ratio blend used for training labels and returns the indices of the top `top_m`
+    (unordered) together with all prefilter scores. Pass `keyword_ratios` when they
+    were already computed (e.g. by the streaming pipeline).
+    """
+    cosine_scores = cosine_similarity_matrix(cv_embeddings, job_embedding)[:, 0].astype(np.float64)
+
+    if skill_keywords:
+        if keyword_ratios is not None:
+            ratios = np.asarray(keyword_ratios, dtype=np.float64)
+        else:
+            ratios = np.array([len(extract_matched_keywords(text, skill_keywords)) for text in candidate_texts]) / len(skill_keywords)
+        scores = 0.6 * cosine_scores + 0.4 * ratios
+    else:
+        scores = cosine_scores
+
+    if top_m >= len(scores):
+        return np.arange(len(scores)), scores
+    return np.argpartition(-scores, top_m - 1)[:top_m], scores
+
 def rank_candidates(
     job_description_text: str,
     candidate_texts: List[str],
@@ -41,49 +83,117 @@ def rank_candidates(
     output_folders: dict = None,
     job_id: str = None,
     custom_model: Optional[Any] = None,
-    custom_keywords: Optional[List[str]] = None
+    custom_keywords: Optional[List[str]] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    feature_schema: str = "job",
+    model_path: Optional[str] = None,
+    replace_existing: bool = False,
+    rerank_top_m: Optional[int] = None,
+    precomputed: Optional[Dict[str, Any]] = None
 ) -> dict:
-    
-    job_description_text = clean_html(job_description_text)
+    """
+    Scores candidates with the ranking model. With more than `rerank_top_m`
+    candidates (MODEL_SETTINGS['rerank_top_m'] by default), a cosine + keyword
+    prefilter picks a shortlist first and only the shortlist goes through feature
+    building, prediction, SHAP and the per-candidate reports. Predictions are NaN
+    and explanations None for candidates outside the shortlist, and
+    `ranked_indices` covers the shortlist only.
 
-    job_description_text_mitigated = mitigate_gender_bias(job_description_text)
-    candidate_texts_mitigated = [mitigate_gender_bias(text) for text in candidate_texts]
+    `precomputed` takes the output of `stream_candidate_features` (or
+    `build_candidate_features`), whose embeddings and feature rows replace the
+    debiasing, embedding and feature building done here.
 
+    Near-duplicate CVs (MODEL_SETTINGS['dedup_enabled']) are mapped to the first
+    CV of their group, `canonical_indices` in the result, and reuse its
+    embedding, feature row, score and explanation.
+    """
     skill_keywords = custom_keywords
-    gender_directions = compute_gender_subspace(tokenizer, model)
+    num_candidates = len(candidate_texts)
+    if precomputed is not None:
+        job_embedding = precomputed["job_embedding"]
+        gender_directions = precomputed["gender_directions"]
+        candidate_texts_mitigated = None
+        cv_matrix = precomputed["cv_embeddings"]
+        canonical = precomputed.get("canonical_indices", np.arange(num_candidates))
+        similarity = precomputed.get("duplicate_similarity", np.ones(num_candidates))
+    else:
+        job_description_text = clean_html(job_description_text)
+        if MODEL_SETTINGS['dedup_enabled']:
+            canonical, similarity = find_duplicates(candidate_texts)
+        else:
+            canonical, similarity = np.arange(num_candidates), np.ones(num_candidates)
+        unique_indices, inverse = np.unique(canonical, return_inverse=True)
+
+        job_description_text_mitigated = mitigate_gender_bias(job_description_text)
+        unique_mitigated = [mitigate_gender_bias(candidate_texts[idx]) for idx in unique_indices]
+        candidate_texts_mitigated = [unique_mitigated[pos] for pos in inverse]
+        gender_directions = compute_gender_subspace(tokenizer, model)
+
+        job_embedding = get_text_embedding(job_description_text_mitigated, tokenizer, model)
+        unique_embeddings = [get_text_embedding(text, tokenizer, model) for text in unique_mitigated]
+        cv_embeddings = [unique_embeddings[pos] for pos in inverse]
+        cv_matrix = np.stack([embedding.cpu().numpy() for embedding in unique_embeddings])[inverse]
+    job_vector = job_embedding.cpu().numpy()
 
     print("Loading ranking model...\n")
-    model_path = os.path.join(output_folders['models'], "ranking_model.joblib")
+    if model_path is None:
+        model_path = os.path.join(output_folders['models'], "ranking_model.joblib")
     ranking_model = custom_model or load_ranking_model(model_path)
 
-    test_features = create_feature_vectors_dataset(
-        get_text_embedding(job_description_text_mitigated, tokenizer, model),
-        [get_text_embedding(text, tokenizer, model) for text in candidate_texts_mitigated],
-        candidate_texts_mitigated,
-        gender_directions=gender_directions,
-        skill_keywords=skill_keywords
-    )
-    feature_names = list(test_features.columns)
+    if rerank_top_m is None:
+        rerank_top_m = MODEL_SETTINGS['rerank_top_m']
+    if rerank_top_m and num_candidates > rerank_top_m:
+        shortlist, _ = prefilter_candidates(
+            job_vector, cv_matrix, candidate_texts_mitigated, skill_keywords, rerank_top_m,
+            keyword_ratios=precomputed["keyword_ratios"] if precomputed is not None else None
+        )
+        print(f"Prefilter shortlisted {len(shortlist)} of {num_candidates} candidates for re-ranking.\n")
+    else:
+        shortlist = np.arange(num_candidates)
 
-    print("Predicting match scores...\n")
-    predictions, results_df = predict_with_ranking_model(ranking_model, test_features)
+    # Features, scores and SHAP once per canonical CV in the shortlist
+    _, first_positions, shortlist_inverse = np.unique(canonical[shortlist], return_index=True, return_inverse=True)
+    representatives = shortlist[first_positions]
 
-    plt.figure(figsize=(8, 5))
-    plt.hist(predictions, bins=20, edgecolor='black', alpha=0.75)
-    plt.xlabel("Predicted Match Score")
-    plt.ylabel("Number of Candidates")
-    plt.title("Distribution of Predicted Candidate Scores")
-    plt.tight_layout()
+    if precomputed is not None:
+        unique_features = precomputed["features"].iloc[representatives].reset_index(drop=True)
+    else:
+        shortlisted_embeddings = [cv_embeddings[idx] for idx in representatives]
+        shortlisted_texts = [candidate_texts_mitigated[idx] for idx in representatives]
+
+        if feature_schema == "global":
+            unique_features = create_global_feature_vectors_dataset(
+                job_embedding,
+                shortlisted_embeddings,
+                shortlisted_texts,
+                skill_keywords or [],
+                gender_directions=gender_directions
+            )
+        else:
+            unique_features = create_feature_vectors_dataset(
+                job_embedding,
+                shortlisted_embeddings,
+                shortlisted_texts,
+                gender_directions=gender_directions,
+                skill_keywords=skill_keywords
+            )
+    feature_names = list(unique_features.columns)
+
+    print("Predicting match scores...\n")
+    unique_predictions, results_df = predict_with_ranking_model(ranking_model, unique_features)
+    shortlist_predictions = unique_predictions[shortlist_inverse]
 
     score_hist_path = os.path.join(output_folders['reports'], "predicted_score_distribution.png")
-    plt.savefig(score_hist_path, dpi=300)
-    plt.close()
-    print(f"📊 Prediction score distribution plot saved to {score_hist_path}")
+    counts, bin_edges = np.histogram(shortlist_predictions, bins=20)
+    submit_plot(plot_score_distribution, counts, bin_edges, score_hist_path)
 
     if os.getenv("SAVE_TEST_FEATURES") == "1":
+        test_features = unique_features.iloc[shortlist_inverse].reset_index(drop=True)
         test_features.to_json("tests/sample_data/test_features.json", orient="records", indent=2)
 
-    ranked_indices = np.argsort(-predictions)
+    predictions = np.full(num_candidates, np.nan)
+    predictions[shortlist] = shortlist_predictions
+    ranked_indices = shortlist[np.argsort(-shortlist_predictions)]
 
     ranking_results_path = os.path.join(output_folders['reports'], "ranking_results.json")
     if os.path.exists(ranking_results_path):
@@ -95,6 +205,7 @@ def rank_candidates(
 
     existing_ids = {entry["id"] for entry in existing_ranking.get("ranking", [])}
 
+    new_entries = []
     for rank, idx in enumerate(ranked_indices, start=1):
         candidate_file = candidate_files[idx]
         file_name = os.path.basename(candidate_file)
@@ -102,7 +213,7 @@ def rank_candidates(
         candidate_id = get_candidate_id_from_firestore(job_id, user_id)
         candidate_name = get_candidate_name_from_firestore(job_id, user_id)
 
-        if candidate_id in existing_ids:
+        if candidate_id in existing_ids and not replace_existing:
             print(f"Ranking result for {candidate_name} already exists, skipping.")
             continue
 
@@ -112,10 +223,20 @@ def rank_candidates(
             "candidate_file": candidate_name,
             "score": round(predictions[idx], 4)
         }
-        existing_ranking["ranking"].append(entry)
+        new_entries.append(entry)
+
+    if len(shortlist) < num_candidates:
+        existing_ranking["prefilter"] = {"num_candidates": num_candidates, "shortlisted": len(shortlist)}
+
+    replaced_ids = {entry["id"] for entry in new_entries}
+    existing_ranking["ranking"] = [
+        entry for entry in existing_ranking.get("ranking", []) if entry["id"] not in replaced_ids
+    ] + new_entries
 
     save_to_json(existing_ranking, ranking_results_path, upload_to_firebase=True)
     print(f"Ranking results saved to {ranking_results_path}")
+    if progress_callback is not None:
+        progress_callback(existing_ranking)
 
     candidate_texts_path = os.path.join(output_folders["reports"], "candidate_texts.json")
     if os.path.exists(candidate_texts_path):
@@ -128,7 +249,7 @@ def rank_candidates(
         existing_texts = {"analysis_id": "candidate_texts_" + str(uuid4()), "texts": []}
 
     existing_text_ids = {entry["id"] for entry in existing_texts.get("texts", [])}
-    for i in range(len(candidate_files)):
+    for i in ranked_indices:
         file_name = os.path.basename(candidate_files[i])
         user_id = extract_user_id(file_name)
         candidate_id = get_candidate_id_from_firestore(job_id, user_id)
@@ -145,19 +266,46 @@ def rank_candidates(
     save_to_json(existing_texts, candidate_texts_path, upload_to_firebase=True)
     print(f"Candidate texts saved to {candidate_texts_path}")
 
-    explanations, shap_values, shap_df = generate_model_explanations(
-        ranking_model, feature_names, test_features
+    explainer = load_tree_explainer(ranking_model, model_path)
+    unique_explanations, shap_values, shap_df = generate_model_explanations(
+        ranking_model, feature_names, unique_features, explainer=explainer
     )
+    explanations = [None] * num_candidates
+    for idx, pos in zip(shortlist, shortlist_inverse):
+        explanations[idx] = unique_explanations[pos]
 
-    save_shap_summary_plot(shap_values, test_features, os.path.join(output_folders["reports"], "shap_summary.png"))
+    save_shap_summary_plot(shap_values, unique_features, os.path.join(output_folders["reports"], "shap_summary.png"))
+
+    num_unique = len(np.unique(canonical))
+    if num_unique < num_candidates:
+        # Precomputed runs report what their stream or cache actually shared
+        if precomputed is not None:
+            shared = precomputed.get("reused", {})
+        else:
+            shared = {"mitigated_texts": num_candidates - num_unique, "embeddings": num_candidates - num_unique}
+        reused = {
+            "mitigated_texts": shared.get("mitigated_texts", 0),
+            "embeddings": shared.get("embeddings", 0),
+            "feature_rows": len(shortlist) - len(representatives),
+            "predictions": len(shortlist) - len(representatives),
+            "shap_explanations": len(shortlist) - len(representatives)
+        }
+        dedup_report = build_dedup_report(candidate_files, canonical, similarity, reused)
+        save_to_json(dedup_report, os.path.join(output_folders["reports"], "dedup_report.json"))
+        increment("near_duplicate_cvs", num_candidates - num_unique)
+        print(f"Deduplicated {num_candidates - num_unique} of {num_candidates} CVs as near duplicates.")
 
     return {
         "model": ranking_model,
         "predictions": predictions,
         "ranked_indices": ranked_indices,
         "feature_names": feature_names,
+        "skill_keywords": skill_keywords,
         "output_folders": output_folders,
-        "explanations": explanations
+        "explanations": explanations,
+        "job_embedding": job_vector,
+        "cv_embeddings": cv_matrix,
+        "canonical_indices": canonical
     }
 
 def display_ranking(job_id: str):
@@ -21,7 +21,9 @@ from src.utils.firebase_utils import (
     get_candidate_name_from_firestore,
     get_candidate_id_from_firestore,
     upload_json_to_firebase,
-    load_json_from_firebase
+    load_json_from_firebase,
+    get_firestore_client,
+    get_storage_bucket
 )
 
 from src.utils.firebase_init import (
@@ -47,6 +49,8 @@ __all__ = [
     'get_candidate_id_from_firestore',
     'upload_json_to_firebase',
     'load_json_from_firebase',
+    'get_firestore_client',
+    'get_storage_bucket',
     'initialize_firebase',
     'extract_keywords_from_job_description'
 ]
\ No newline at end of file
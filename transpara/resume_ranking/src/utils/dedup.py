@@ -0,0 +1,144 @@
+import os
+import re
+import zlib
+import hashlib
+import numpy as np
+
+from typing import Any, Dict, List, Optional, Tuple
+from config.settings import MODEL_SETTINGS
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+def normalize_for_dedup(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+def shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    """
+    32-bit hashes of the distinct word `shingle_size`-grams of the normalized text.
+    """
+    words = normalize_for_dedup(text).split()
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    if len(words) <= shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+class MinHasher:
+    """
+    MinHash signatures with `num_perm` universal hash functions (a * x + b) mod p.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a, b < 2^31 and x < 2^32 keep a * x + b inside uint64
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        if len(hashes) == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=1)
+
+def estimate_similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """
+    Estimated Jaccard similarity of the two shingle sets.
+    """
+    return float(np.mean(signature_a == signature_b))
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    (bands, rows) whose S-curve midpoint (1 / bands) ** (1 / rows) is closest to `threshold`.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+class NearDuplicateDetector:
+    """
+    Maps each added text to a canonical key: the first earlier text whose
+    estimated Jaccard similarity over word shingles is at least `threshold`,
+    or the text's own key. Exact duplicates (after normalization) are matched
+    by hash; near duplicates through LSH buckets over MinHash signatures. Only
+    canonical texts are indexed, so duplicates never chain.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, num_perm: Optional[int] = None, shingle_size: Optional[int] = None):
+        self.threshold = threshold if threshold is not None else MODEL_SETTINGS['dedup_threshold']
+        self.shingle_size = shingle_size or MODEL_SETTINGS['dedup_shingle_size']
+        self.hasher = MinHasher(num_perm or MODEL_SETTINGS['dedup_num_perm'])
+        self.bands, self.rows = lsh_params(self.threshold, self.hasher.num_perm)
+        self._exact: Dict[str, Any] = {}
+        self._signatures: Dict[Any, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, List[Any]]] = [{} for _ in range(self.bands)]
+
+    def add(self, key: Any, text: str) -> Tuple[Any, float]:
+        """
+        Returns (canonical key, estimated similarity to it).
+        """
+        exact_hash = hashlib.md5(normalize_for_dedup(text).encode("utf-8")).hexdigest()
+        if exact_hash in self._exact:
+            return self._exact[exact_hash], 1.0
+
+        signature = self.hasher.signature(shingle_hashes(text, self.shingle_size))
+        band_keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, band_keys):
+            candidates.update(buckets.get(band_key, ()))
+
+        best_key, best_similarity = None, 0.0
+        for candidate in candidates:
+            similarity = estimate_similarity(signature, self._signatures[candidate])
+            if similarity > best_similarity:
+                best_key, best_similarity = candidate, similarity
+        if best_key is not None and best_similarity >= self.threshold:
+            return best_key, best_similarity
+
+        self._exact[exact_hash] = key
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets.setdefault(band_key, []).append(key)
+        return key, 1.0
+
+def find_duplicates(texts: List[str], threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For each text, the index of its canonical text (itself if it is the first of
+    its group) and the estimated similarity to it.
+    """
+    detector = NearDuplicateDetector(threshold)
+    canonical = np.empty(len(texts), dtype=np.int64)
+    similarity = np.ones(len(texts), dtype=np.float64)
+    for idx, text in enumerate(texts):
+        canonical[idx], similarity[idx] = detector.add(idx, text)
+    return canonical, similarity
+
+def build_dedup_report(
+    candidate_files: List[str],
+    canonical: np.ndarray,
+    similarity: np.ndarray,
+    reused: Dict[str, int]
+) -> Dict[str, Any]:
+    duplicates = [
+        {
+            "candidate_file": os.path.basename(candidate_files[idx]),
+            "canonical_file": os.path.basename(candidate_files[canonical[idx]]),
+            "similarity": round(float(similarity[idx]), 4)
+        }
+        for idx in range(len(canonical)) if canonical[idx] != idx
+    ]
+    return {
+        "threshold": MODEL_SETTINGS['dedup_threshold'],
+        "num_candidates": int(len(canonical)),
+        "unique_candidates": int(len(np.unique(canonical))),
+        "duplicates": duplicates,
+        "reused": reused
+    }
@@ -4,7 +4,6 @@ import csv
 import shutil
 import hashlib
 
-from bs4 import BeautifulSoup
 from typing import Dict, List, Any, Optional, Union, TextIO
 
 def ensure_dir_exists(directory_path: str) -> str:
@@ -40,4 +39,6 @@ def extract_user_id(file_name: str) -> str:
     return os.path.basename(file_name).split("_")[0]
 
 def clean_html(raw_html: str) -> str:
+    from bs4 import BeautifulSoup
+
     return BeautifulSoup(raw_html, "html.parser").get_text()
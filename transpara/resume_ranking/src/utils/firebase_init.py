@@ -1,7 +1,7 @@
-import firebase_admin
-from firebase_admin import credentials, initialize_app
-
 def initialize_firebase():
+    import firebase_admin
+    from firebase_admin import credentials, initialize_app
+
     if not firebase_admin._apps:
         cred = credentials.Certificate("firebase-adminsdk.json")
         return initialize_app(cred, {
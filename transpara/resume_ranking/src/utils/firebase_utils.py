@@ -1,24 +1,39 @@
-from firebase_admin import credentials, firestore
+from functools import lru_cache
 from src.utils.firebase_init import initialize_firebase
-from firebase_admin import storage
+from src.utils.metrics import track_time
 
 import tempfile
 import os
 import json
 
-initialize_firebase()
-firestore_db = firestore.client()
+@lru_cache(maxsize=1)
+def get_firestore_client():
+    """
+    Initializes Firebase and creates the Firestore client on first use.
+    """
+    from firebase_admin import firestore
 
+    initialize_firebase()
+    return firestore.client()
+
+def get_storage_bucket():
+    from firebase_admin import storage
+
+    initialize_firebase()
+    return storage.bucket()
+
+@track_time("firebase_io")
 def get_candidate_name_from_firestore(job_id: str, user_id: str) -> str:
-    doc_ref = firestore_db.collection("jobs").document(job_id).collection("applications").document(user_id)
+    doc_ref = get_firestore_client().collection("jobs").document(job_id).collection("applications").document(user_id)
     doc = doc_ref.get()
     if doc.exists:
         data = doc.to_dict()
         return f"{data.get('firstName', '')} {data.get('lastName', '')}".strip()
     return user_id
 
+@track_time("firebase_io")
 def get_candidate_id_from_firestore(job_id: str, user_id: str) -> str:
-    doc_ref = firestore_db.collection("jobs").document(job_id).collection("applications").document(user_id)
+    doc_ref = get_firestore_client().collection("jobs").document(job_id).collection("applications").document(user_id)
     doc = doc_ref.get()
     if doc.exists:
         data = doc.to_dict()
@@ -32,8 +47,9 @@ def get_candidate_id_from_firestore(job_id: str, user_id: str) -> str:
     return user_id
 
 
+@track_time("firebase_io")
 def upload_json_to_firebase(data: dict, path: str) -> str:
-    bucket = storage.bucket()
+    bucket = get_storage_bucket()
     blob = bucket.blob(path)
 
     with tempfile.NamedTemporaryFile(mode="w+", delete=False, suffix=".json") as tmp:
@@ -45,8 +61,9 @@ def upload_json_to_firebase(data: dict, path: str) -> str:
 
     return f"gs://{bucket.name}/{path}"
 
+@track_time("firebase_io")
 def load_json_from_firebase(job_id: str, filename: str) -> dict:
-    bucket = storage.bucket()
+    bucket = get_storage_bucket()
     blob = bucket.blob(f"reports/{job_id}/{filename}")
 
     with tempfile.NamedTemporaryFile(mode="r+", delete=False) as temp_file:
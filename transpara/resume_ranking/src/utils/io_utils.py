@@ -2,6 +2,7 @@ import os
 import json
 from typing import List, Tuple
 from src.data.document_extraction import extract_text_from_pdf
+from src.utils.metrics import track_time, increment
 
 def load_job_description(path: str) -> str:
     if not os.path.exists(path):
@@ -9,6 +10,7 @@ def load_job_description(path: str) -> str:
     with open(path, 'r', encoding='utf-8') as f:
         return f.read()
 
+@track_time("extraction")
 def load_candidate_pdfs(directory: str) -> Tuple[List[str], List[str]]:
     if not os.path.isdir(directory):
         raise NotADirectoryError(f"Candidate directory not found: {directory}")
@@ -18,6 +20,7 @@ def load_candidate_pdfs(directory: str) -> Tuple[List[str], List[str]]:
             file_path = os.path.join(directory, file)
             files.append(file_path)
             texts.append(extract_text_from_pdf(file_path))
+    increment("documents_extracted", len(files))
     if not files:
         raise FileNotFoundError("No PDF files found in candidate directory.")
     return files, texts
\ No newline at end of file
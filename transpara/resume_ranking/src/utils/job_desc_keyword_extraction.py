@@ -3,13 +3,13 @@ import logging
 import os
 import re
 from typing import List, Optional, Any
-from api.openai_client import initialize_openai_client, get_completion
-from openai import OpenAI
-from dotenv import load_dotenv
 from config.settings import MODEL_SETTINGS
+from src.utils.metrics import track_time
+from api.openai_client import record_gpt_usage
 
 logger = logging.getLogger(__name__)
 
+@track_time("gpt")
 def extract_keywords_from_job_description(
     job_description: str,
     max_keywords: int = 25,
@@ -21,6 +21,9 @@ def extract_keywords_from_job_description(
     """
 
     if client is None:
+        from openai import OpenAI
+        from dotenv import load_dotenv
+
         load_dotenv()
         openai_api_key = os.getenv("OPENAI_API_KEY")
         if not openai_api_key:
@@ -49,6 +52,7 @@ def extract_keywords_from_job_description(
             temperature=0,
             max_tokens=400
         )
+        record_gpt_usage(response)
 
         content = response.choices[0].message.content.strip()
 
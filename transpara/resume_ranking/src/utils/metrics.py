@@ -0,0 +1,162 @@
+import time
+import threading
+import contextvars
+
+from collections import defaultdict
+from contextlib import ContextDecorator, contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+STAGES = (
+    "extraction", "ocr", "embedding", "debiasing", "training", "prediction",
+    "shap", "gpt", "firebase_io", "plotting"
+)
+
+class RunMetrics:
+    """
+    Timings and counters for one pipeline run.
+    """
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.started_at = time.time()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            entry["count"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "wall_seconds": round(time.time() - self.started_at, 3),
+                "stages": {
+                    stage: {
+                        "count": entry["count"],
+                        "total_seconds": round(entry["total_seconds"], 4),
+                        "max_seconds": round(entry["max_seconds"], 4)
+                    }
+                    for stage, entry in sorted(self.stages.items())
+                },
+                "counters": dict(sorted(self.counters.items()))
+            }
+
+# Process-wide totals served on /metrics, plus the run of the current context
+_totals = RunMetrics()
+_current_run: contextvars.ContextVar[Optional[RunMetrics]] = contextvars.ContextVar("current_run", default=None)
+_runs_completed = 0
+_totals_lock = threading.Lock()
+
+def observe(stage: str, seconds: float):
+    _totals.observe(stage, seconds)
+    run = _current_run.get()
+    if run is not None:
+        run.observe(stage, seconds)
+
+def increment(name: str, value: float = 1):
+    _totals.increment(name, value)
+    run = _current_run.get()
+    if run is not None:
+        run.increment(name, value)
+
+class track_time(ContextDecorator):
+    """
+    Times a block or function call under `stage`: `with track_time("shap"):`
+    or `@track_time("gpt")`. Nested stages are each recorded in full.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._starts = threading.local()
+
+    def __enter__(self):
+        self._starts.__dict__.setdefault("stack", []).append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self._starts.stack.pop())
+        return False
+
+@contextmanager
+def record_run(job_id: Optional[str] = None) -> Iterator[RunMetrics]:
+    """
+    Collects every observation made in this context (and in threads started
+    through `propagate_context`) into a fresh RunMetrics.
+    """
+    global _runs_completed
+    run = RunMetrics(job_id)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+        with _totals_lock:
+            _runs_completed += 1
+
+def propagate_context(fn):
+    """
+    Binds `fn` to the caller's context so work handed to another thread is
+    still attributed to the current run.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+def merge_run_metrics(run: Dict[str, Any]):
+    """
+    Adds a run recorded in another process (e.g. the CLI pipeline started by the
+    API server) to this process's totals.
+    """
+    global _runs_completed
+    for stage, entry in run.get("stages", {}).items():
+        with _totals._lock:
+            total = _totals.stages.setdefault(stage, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            total["count"] += entry["count"]
+            total["total_seconds"] += entry["total_seconds"]
+            total["max_seconds"] = max(total["max_seconds"], entry["max_seconds"])
+    for name, value in run.get("counters", {}).items():
+        _totals.increment(name, value)
+    with _totals_lock:
+        _runs_completed += 1
+
+def _metric_name(name: str) -> str:
+    return "".join(char if char.isalnum() else "_" for char in name.lower())
+
+def render_prometheus() -> str:
+    """
+    Process-wide totals in the Prometheus text exposition format.
+    """
+    snapshot = _totals.to_dict()
+    lines = [
+        "# HELP transpara_stage_duration_seconds Time spent per pipeline stage.",
+        "# TYPE transpara_stage_duration_seconds summary"
+    ]
+    for stage, entry in snapshot["stages"].items():
+        lines.append(f'transpara_stage_duration_seconds_sum{{stage="{stage}"}} {entry["total_seconds"]}')
+        lines.append(f'transpara_stage_duration_seconds_count{{stage="{stage}"}} {entry["count"]}')
+
+    lines += [
+        "# HELP transpara_stage_duration_seconds_max Longest single observation per stage.",
+        "# TYPE transpara_stage_duration_seconds_max gauge"
+    ]
+    for stage, entry in snapshot["stages"].items():
+        lines.append(f'transpara_stage_duration_seconds_max{{stage="{stage}"}} {entry["max_seconds"]}')
+
+    for name, value in snapshot["counters"].items():
+        metric = f"transpara_{_metric_name(name)}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+
+    lines += [
+        "# HELP transpara_pipeline_runs_total Completed pipeline runs.",
+        "# TYPE transpara_pipeline_runs_total counter",
+        f"transpara_pipeline_runs_total {_runs_completed}"
+    ]
+    return "\n".join(lines) + "\n"
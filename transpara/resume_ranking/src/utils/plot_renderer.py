@@ -0,0 +1,57 @@
+import atexit
+import threading
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Optional
+from src.utils.metrics import propagate_context, track_time
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending: List[Future] = []
+_lock = threading.Lock()
+
+def _init_worker():
+    # Rendering happens off the main thread, so never pick an interactive backend
+    import matplotlib
+    matplotlib.use("Agg")
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # A single worker keeps pyplot's global state confined to one thread
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plot-renderer", initializer=_init_worker)
+        return _executor
+
+def submit_plot(render_fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """
+    Queues `render_fn(*args, **kwargs)` on the background plot renderer.
+    Arguments should be small precomputed arrays, not live model objects.
+    """
+    future = _get_executor().submit(propagate_context(track_time("plotting")(render_fn)), *args, **kwargs)
+    with _lock:
+        _pending[:] = [f for f in _pending if not f.done()]
+        _pending.append(future)
+    return future
+
+def wait_for_plots(timeout: Optional[float] = None) -> int:
+    """
+    Blocks until every queued plot has been rendered. Returns the number of failed plots.
+    """
+    with _lock:
+        pending = list(_pending)
+        _pending.clear()
+    if not pending:
+        return 0
+
+    done, not_done = wait(pending, timeout=timeout)
+    failures = 0
+    for future in done:
+        error = future.exception()
+        if error is not None:
+            failures += 1
+            print(f"⚠️ Plot rendering failed: {error}")
+    if not_done:
+        print(f"⚠️ {len(not_done)} plots still rendering after {timeout}s")
+    return failures
+
+atexit.register(wait_for_plots)
@@ -0,0 +1,106 @@
+import queue
+import threading
+
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Tuple
+from src.utils.metrics import propagate_context
+
+_DONE = object()
+
+class _StageFailure:
+    def __init__(self, stage: str, error: BaseException):
+        self.stage = stage
+        self.error = error
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def stream_stages(
+    source: Iterable[Any],
+    stages: Sequence[Tuple[str, Callable[[List[Any]], Any]]],
+    batch_size: int = 16,
+    queue_size: int = 4
+) -> Iterator[Any]:
+    """
+    Runs `stages` as a chain of threads over micro-batches of `source` and yields
+    the last stage's output per batch, in input order. Each stage maps one batch
+    to one batch. The bounded queues between stages cap how many batches are in
+    flight, so memory does not grow with the input while stages overlap. The
+    first exception raised by the source or any stage stops the pipeline and is
+    re-raised to the caller.
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    def put(target: queue.Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(source_queue: queue.Queue) -> Any:
+        while not stop.is_set():
+            try:
+                return source_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def produce():
+        try:
+            for batch in iter_batches(source, batch_size):
+                if not put(queues[0], batch):
+                    return
+        except Exception as e:
+            put(queues[0], _StageFailure("source", e))
+            return
+        put(queues[0], _DONE)
+
+    def work(name: str, fn: Callable[[List[Any]], Any], inbox: queue.Queue, outbox: queue.Queue):
+        while True:
+            item = get(inbox)
+            if item is _DONE or isinstance(item, _StageFailure):
+                put(outbox, item)
+                return
+            try:
+                result = fn(item)
+            except Exception as e:
+                put(outbox, _StageFailure(name, e))
+                return
+            if not put(outbox, result):
+                return
+
+    # Stage threads record metrics into the caller's run
+    threads = [threading.Thread(target=propagate_context(produce), name="stream-source", daemon=True)]
+    for position, (name, fn) in enumerate(stages):
+        threads.append(threading.Thread(
+            target=propagate_context(work),
+            args=(name, fn, queues[position], queues[position + 1]),
+            name=f"stream-{name}",
+            daemon=True
+        ))
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageFailure):
+                print(f"❌ Streaming stage '{item.stage}' failed: {item.error}")
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
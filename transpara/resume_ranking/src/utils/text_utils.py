@@ -1,16 +1,23 @@
 import re
 import string
-import spacy
 import hashlib
 
+from functools import lru_cache
 from typing import Dict, List, Set, Tuple, Optional, Any, Union
 from config.settings import DEFAULT_SKILLS
 
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("SpaCy model not found. Please run: python -m spacy download en_core_web_sm")
-    raise
+@lru_cache(maxsize=1)
+def get_nlp():
+    """
+    Loads the spaCy pipeline on first use so importing this module stays cheap.
+    """
+    import spacy
+
+    try:
+        return spacy.load("en_core_web_sm")
+    except OSError:
+        print("SpaCy model not found. Please run: python -m spacy download en_core_web_sm")
+        raise
 
 def extract_skill_keywords(text: str, skill_keywords: Optional[List[str]] = None) -> Dict[str, int]:
     if skill_keywords is None:
@@ -38,7 +45,7 @@ def preprocess_text(text: str, lowercase: bool = True, remove_punctuation: bool
     return text
 
 def tokenize(text: str, remove_stopwords: bool = True) -> List[str]:
-    doc = nlp(text)
+    doc = get_nlp()(text)
     
     if remove_stopwords:
         tokens = [token.text for token in doc if not token.is_stop and not token.is_punct]
@@ -48,7 +55,7 @@ def tokenize(text: str, remove_stopwords: bool = True) -> List[str]:
     return tokens
 
 def extract_named_entities(text: str) -> Dict[str, List[str]]:
-    doc = nlp(text)
+    doc = get_nlp()(text)
     entities = {}
     
     for ent in doc.ents:
@@ -70,17 +77,17 @@ def calculate_term_frequency(tokens: List[str]) -> Dict[str, float]:
     return term_freq
 
 def extract_sentences(text: str) -> List[str]:
-    doc = nlp(text)
+    doc = get_nlp()(text)
     sentences = [sent.text.strip() for sent in doc.sents]
     return sentences
 
 def get_word_count(text: str) -> int:
-    doc = nlp(text)
+    doc = get_nlp()(text)
     word_count = sum(1 for token in doc if not token.is_punct and not token.is_space)
     return word_count
 
 def get_text_statistics(text: str) -> Dict[str, Any]:
-    doc = nlp(text)
+    doc = get_nlp()(text)
     
     char_count = len(text)
     word_count = sum(1 for token in doc if not token.is_punct and not token.is_space)
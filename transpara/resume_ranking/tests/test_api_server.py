@@ -1,6 +1,7 @@
 import os
 import json
 import pytest
+import subprocess
 from unittest.mock import patch
 
 def mock_load_json_report(path):
@@ -23,3 +24,142 @@ def test_analyze_candidates(mock_load, mock_system, mock_download_pdfs, mock_dow
     assert response.status_code == 200
     assert "mock_key" in response.json()["ranking_results"]
 
+
+def mock_run_pipeline(job_description_path, candidates_dir, job_id, progress_callback=None):
+    progress_callback("extraction", {"job_id": job_id, "num_candidates": 2})
+    progress_callback("ranking", {"ranking": [{"id": "c1", "rank": 1, "score": 0.9}]})
+    progress_callback("complete", {"job_id": job_id})
+
+
+@patch("backend.api_server.download_job_description", return_value=True)
+@patch("backend.api_server.download_candidate_pdfs", return_value=2)
+@patch("backend.api_server.run_pipeline", side_effect=mock_run_pipeline)
+def test_analyze_candidates_stream(mock_pipeline, mock_download_pdfs, mock_download_desc, client):
+    response = client.get("/api/analyze-candidates/job123/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["event: extraction", "event: ranking", "event: complete"]
+
+
+def test_metrics_endpoint(client):
+    from src.utils.metrics import track_time
+
+    with track_time("prediction"):
+        pass
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'transpara_stage_duration_seconds_count{stage="prediction"}' in response.text
+
+
+def mock_download_job_description(job_id, output_path):
+    return job_id != "missing-job"
+
+
+@patch("backend.api_server.download_job_description", side_effect=mock_download_job_description)
+@patch("backend.api_server.download_candidate_pdfs", return_value=2)
+@patch("backend.api_server.subprocess.run")
+@patch("backend.api_server.load_json_report", return_value={
+    "jobs": {"job1": {"status": "ok", "metrics": {"stages": {}, "counters": {}}}},
+    "distinct_cvs": 2
+})
+def test_analyze_candidates_batch(mock_load, mock_run, mock_download_pdfs, mock_download_desc, client):
+    response = client.post("/api/analyze-candidates/batch", json={"jobIds": ["job1", "job2", "missing-job", "x; rm -rf ~"]})
+    assert response.status_code == 200
+    jobs = response.json()["jobs"]
+    assert jobs["job1"]["status"] == "ok"
+    assert jobs["job2"]["status"] == "error"
+    assert jobs["missing-job"]["detail"] == "Job description not found in Firestore."
+    assert jobs["x; rm -rf ~"]["detail"] == "Invalid job id."
+    command = mock_run.call_args[0][0]
+    assert command[2:5] == ["--job_ids", "job1", "job2"]
+    assert mock_run.call_args[1]["check"] is True
+
+
+@patch("backend.api_server.download_job_description", return_value=True)
+@patch("backend.api_server.download_candidate_pdfs", return_value=2)
+@patch("backend.api_server.subprocess.run", side_effect=subprocess.CalledProcessError(1, "main.py"))
+@patch("backend.api_server.load_json_report", return_value={})
+def test_analyze_candidates_batch_reports_failed_pipeline(mock_load, mock_run, mock_download_pdfs, mock_download_desc, client):
+    response = client.post("/api/analyze-candidates/batch", json={"jobIds": ["job1"]})
+    assert response.json()["jobs"]["job1"] == {"status": "error", "detail": "Pipeline exited with status 1."}
+
+
+def write_reports(root, job_id):
+    output_dir = root / "output" / "reports" / job_id
+    output_dir.mkdir(parents=True)
+    ids = [f"c{idx}" for idx in range(5)]
+    reports = {
+        "ranking_results.json": {"analysis_id": "ranking", "ranking": [
+            {"id": cid, "rank": 5 - idx, "candidate_file": cid, "score": idx / 10} for idx, cid in enumerate(ids)
+        ]},
+        "candidate_texts.json": {"analysis_id": "texts", "texts": [
+            {"id": cid, "candidate_file": cid, "extracted_text": f"text of {cid}"} for cid in ids
+        ]}
+    }
+    for name, report in reports.items():
+        (output_dir / name).write_text(json.dumps(report))
+    return output_dir
+
+
+def test_get_analysis_pagination_and_projection(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_reports(tmp_path, "paged-job")
+
+    full = client.get("/api/get-analysis/paged-job").json()
+    assert set(full) == {"ranking_results", "shap_explanations", "chatgpt_explanations", "gender_bias_report", "candidate_texts"}
+    assert len(full["candidate_texts"]["texts"]) == 5
+
+    page = client.get("/api/get-analysis/paged-job", params={
+        "reports": "ranking_results,candidate_texts", "top_k": 4, "offset": 1, "limit": 2, "fields": "score"
+    }).json()
+    assert page["pagination"] == {"total": 4, "offset": 1, "limit": 2, "returned": 2}
+    assert page["ranking_results"]["ranking"] == [{"id": "c3", "score": 0.3}, {"id": "c2", "score": 0.2}]
+    assert page["candidate_texts"]["texts"] == [{"id": "c3"}, {"id": "c2"}]
+    assert "shap_explanations" not in page
+
+    single = client.get("/api/get-analysis/paged-job", params={"candidate_id": "c1", "reports": "candidate_texts"}).json()
+    assert single["candidate_texts"]["texts"][0]["extracted_text"] == "text of c1"
+
+    assert client.get("/api/get-analysis/paged-job", params={"candidate_id": "nobody"}).status_code == 404
+    assert client.get("/api/get-analysis/paged-job", params={"reports": "unknown"}).status_code == 400
+
+
+def test_report_index_reloads_changed_files(tmp_path):
+    from backend.api_server import load_json_report
+    from backend.report_index import ReportIndex
+
+    output_dir = write_reports(tmp_path, "job")
+    path = str(output_dir / "ranking_results.json")
+    index = ReportIndex(load_json_report)
+
+    first = index.get(path, "ranking")
+    assert index.get(path, "ranking") is first
+    (output_dir / "ranking_results.json").write_text(json.dumps({"ranking": [{"id": "new", "rank": 1}]}))
+    assert index.get(path, "ranking").order == ["new"]
+
+
+def test_get_analysis_conditional_and_compressed(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output_dir = write_reports(tmp_path, "cached-job")
+    texts = {"texts": [{"id": f"c{idx}", "extracted_text": "Python developer. " * 50} for idx in range(5)]}
+    (output_dir / "candidate_texts.json").write_text(json.dumps(texts))
+
+    first = client.get("/api/get-analysis/cached-job", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.json()["candidate_texts"]["texts"][0]["id"] == "c0"
+    etag = first.headers["etag"]
+
+    with patch("backend.api_server.get_analysis_response") as mock_build:
+        assert client.get("/api/get-analysis/cached-job", headers={"If-None-Match": etag}).status_code == 304
+        not_modified = client.get("/api/get-analysis/cached-job", headers={"If-Modified-Since": first.headers["last-modified"]})
+        assert not_modified.status_code == 304
+        mock_build.assert_not_called()
+
+    (output_dir / "ranking_results.json").write_text(json.dumps({"ranking": [{"id": "new", "rank": 1}]}))
+    changed = client.get("/api/get-analysis/cached-job", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["ranking_results"]["ranking"][0]["id"] == "new"
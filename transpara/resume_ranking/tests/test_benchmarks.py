@@ -0,0 +1,15 @@
+from benchmarks.run_benchmarks import compare_to_baseline
+
+def test_compare_to_baseline_flags_only_regressions_beyond_threshold():
+    baseline = {"stages": {
+        "embedding": {"docs_per_sec": 10.0, "peak_traced_mb": 100.0},
+        "shap": {"docs_per_sec": 50.0, "peak_traced_mb": 20.0}
+    }}
+    results = {
+        "embedding": {"docs_per_sec": 8.5, "peak_traced_mb": 110.0},
+        "shap": {"docs_per_sec": 30.0, "peak_traced_mb": 30.0},
+        "training_grid": {"docs_per_sec": 1.0, "peak_traced_mb": 500.0}
+    }
+    regressions = compare_to_baseline(results, baseline, threshold=0.2)
+    assert len(regressions) == 2
+    assert all(regression.startswith("shap") for regression in regressions)
@@ -0,0 +1,32 @@
+import shutil
+import numpy as np
+from unittest.mock import patch
+
+from src.data.candidate_cache import CandidateArtifactCache
+
+def fake_embeddings(texts, tokenizer, model):
+    return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+@patch("src.data.embeddings.get_text_embeddings", side_effect=fake_embeddings)
+@patch("src.models.linguistic_debiasing.mitigate_gender_bias", side_effect=lambda text: text.lower())
+@patch("src.data.document_extraction.extract_text_from_pdf", side_effect=lambda path: open(path).read())
+def test_cvs_shared_across_jobs_are_processed_once(mock_extract, mock_mitigate, mock_embed, tmp_path):
+    job_a, job_b = tmp_path / "job_a", tmp_path / "job_b"
+    job_a.mkdir()
+    job_b.mkdir()
+    (job_a / "user1.pdf").write_text("Python Developer")
+    (job_a / "user2.pdf").write_text("Sales Manager")
+    # Same CV submitted to another job under a different file name
+    shutil.copy(job_a / "user1.pdf", job_b / "user1_again.pdf")
+
+    cache = CandidateArtifactCache(tokenizer=None, model=None)
+    keys_a = cache.prepare([str(job_a / "user1.pdf"), str(job_a / "user2.pdf")])
+    keys_b = cache.prepare([str(job_b / "user1_again.pdf")])
+
+    assert len(cache) == 2
+    assert keys_b[0] == keys_a[0]
+    assert mock_extract.call_count == 2
+    assert cache.get(keys_b, "mitigated") == ["python developer"]
+    assert cache.embeddings(keys_a).shape == (2, 2)
+    # The same PDF in one job shares its artifacts with the first listing
+    assert cache.num_shared(keys_a + keys_b) == 1
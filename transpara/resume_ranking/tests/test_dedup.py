@@ -0,0 +1,60 @@
+import random
+import numpy as np
+from unittest.mock import patch
+
+from src.data.candidate_cache import CandidateArtifactCache
+from src.utils.dedup import find_duplicates, lsh_params
+
+WORDS = [
+    "python", "developer", "sales", "manager", "budapest", "university", "machine", "learning",
+    "project", "team", "customer", "cloud", "data", "analysis", "marketing", "research",
+    "design", "java", "leadership", "finance", "support", "backend", "frontend", "testing"
+]
+
+def make_cv(seed: int, length: int = 300) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+def test_near_duplicates_map_to_the_first_cv():
+    original = make_cv(1)
+    edited = original.replace("python", "Python,", 1) + " references available"
+    texts = [original, make_cv(2), edited, make_cv(3), original.upper()]
+
+    canonical, similarity = find_duplicates(texts, threshold=0.8)
+
+    assert list(canonical) == [0, 1, 0, 3, 0]
+    assert similarity[2] >= 0.8
+    assert similarity[4] == 1.0
+
+def test_threshold_keeps_related_cvs_apart():
+    base = make_cv(1).split()
+    # Roughly half of the shingles change
+    rewritten = " ".join(word if i % 10 else "changed" for i, word in enumerate(base))
+    canonical, _ = find_duplicates([" ".join(base), rewritten], threshold=0.9)
+    assert list(canonical) == [0, 1]
+
+def test_lsh_bands_match_threshold():
+    bands, rows = lsh_params(0.9, 128)
+    assert bands * rows <= 128
+    assert abs((1 / bands) ** (1 / rows) - 0.9) < 0.05
+
+def fake_embeddings(texts, tokenizer, model):
+    return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+@patch("src.data.embeddings.get_text_embeddings", side_effect=fake_embeddings)
+@patch("src.models.linguistic_debiasing.mitigate_gender_bias", side_effect=lambda text: text.lower())
+@patch("src.data.document_extraction.extract_text_from_pdf", side_effect=lambda path: open(path).read())
+def test_cache_reuses_artifacts_of_near_duplicates(mock_extract, mock_mitigate, mock_embed, tmp_path):
+    original = make_cv(1)
+    (tmp_path / "user1.pdf").write_text(original)
+    (tmp_path / "user2.pdf").write_text(original + " Hobbies: chess")
+    (tmp_path / "user3.pdf").write_text(make_cv(2))
+
+    cache = CandidateArtifactCache(tokenizer=None, model=None)
+    keys = cache.prepare([str(tmp_path / name) for name in ("user1.pdf", "user2.pdf", "user3.pdf")])
+    canonical, _ = cache.canonical_indices(keys)
+
+    assert list(canonical) == [0, 0, 2]
+    assert mock_mitigate.call_count == 2
+    assert cache.get(keys, "text")[1].endswith("chess")
+    assert cache.get(keys, "mitigated")[1] == original.lower()
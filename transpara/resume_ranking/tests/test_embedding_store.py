@@ -0,0 +1,85 @@
+import os
+import numpy as np
+import pytest
+
+from src.data.embedding_store import EmbeddingStore, measure_quantization_error
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_store_round_trip_and_append(tmp_path, dtype):
+    rng = np.random.default_rng(0)
+    first = rng.normal(size=(20, 768)).astype(np.float32)
+    second = rng.normal(size=(5, 768)).astype(np.float32)
+
+    store = EmbeddingStore(str(tmp_path), dtype=dtype)
+    store.add([f"cv{i}" for i in range(20)], first)
+
+    reader = EmbeddingStore(str(tmp_path))
+    assert reader.dtype == dtype and len(reader) == 20
+
+    store.add(["cv0"] + [f"new{i}" for i in range(4)], second)
+    restored = reader.get(["cv0", "cv1", "new3"])
+    expected = np.vstack([second[0], first[1], second[4]])
+    cosine = np.sum(restored * expected, axis=1) / (np.linalg.norm(restored, axis=1) * np.linalg.norm(expected, axis=1))
+    assert cosine.min() > 0.999
+
+    report = store.quantization_error
+    assert report["samples"] == 25
+    assert report["max_pair_error"] < 0.01
+
+def test_quantization_error_report_orders_dtypes():
+    embeddings = np.random.default_rng(1).normal(size=(100, 64))
+    float16 = measure_quantization_error(embeddings, "float16")
+    int8 = measure_quantization_error(embeddings, "int8")
+    assert float16["mean_pair_error"] <= int8["mean_pair_error"]
+    assert measure_quantization_error(embeddings, "float32")["max_pair_error"] < 1e-6
+
+def test_refresh_sees_appends_within_one_mtime_tick(tmp_path):
+    writer = EmbeddingStore(str(tmp_path), dtype="float32")
+    writer.add(["a"], np.ones((1, 4)))
+    reader = EmbeddingStore(str(tmp_path))
+    stamp = os.stat(writer.index_path).st_mtime_ns
+
+    writer.add(["b"], np.zeros((1, 4)), metadata=[{"job_id": "j"}])
+    os.utime(writer.index_path, ns=(stamp, stamp))
+
+    assert reader.refresh()
+    assert "b" in reader and reader.get_metadata("b") == {"job_id": "j"}
+    assert not reader.refresh()
+
+def test_appends_only_extend_the_key_log(tmp_path):
+    writer = EmbeddingStore(str(tmp_path), dtype="float32")
+    writer.add(["a", "b"], np.eye(4)[:2], metadata=[{"job_id": "j"}, {}])
+    reader = EmbeddingStore(str(tmp_path))
+    with open(writer.keys_path, "rb") as f:
+        before = f.read()
+
+    writer.add(["a"], np.eye(4)[2:3])
+    with open(writer.keys_path, "rb") as f:
+        after = f.read()
+    assert after.startswith(before) and after.count(b"\n") == 3
+    assert "rows" not in writer._read_header()
+
+    # Lines past the published count (a writer that crashed mid-append) are ignored and overwritten
+    with open(writer.keys_path, "ab") as f:
+        f.write(b'["torn",{}]\n')
+    assert reader.refresh() and reader.rows == {"a": 2, "b": 1}
+    assert reader.get_metadata("a") == {}
+    reader.add(["c"], np.eye(4)[3:4])
+    assert "torn" not in EmbeddingStore(str(tmp_path))
+    np.testing.assert_array_equal(writer.get(["c"]), np.eye(4)[3:4])
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_similarity_rescales_by_stored_norms(tmp_path, dtype):
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(50, 16)) * rng.uniform(0.1, 10.0, size=(50, 1))
+    vectors[7] = 0.0
+    store = EmbeddingStore(str(tmp_path), dtype=dtype)
+    store.add([f"cv{i}" for i in range(50)], vectors)
+
+    queries = rng.normal(size=(3, 16))
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[7] = 1.0
+    expected = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ (vectors / norms[:, None]).T
+
+    np.testing.assert_allclose(store.similarity(queries, block_size=16), expected, atol=0.02)
+    np.testing.assert_allclose(store.similarity(queries, keys=["cv9", "cv7"]), expected[:, [9, 7]], atol=0.02)
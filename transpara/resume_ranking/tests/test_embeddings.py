@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from src.data.embeddings import cosine_similarity_matrix, create_feature_vectors_dataset
+
+def test_cosine_similarity_matrix_matches_pairwise_cosine():
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(300, 16))
+    b = rng.normal(size=(7, 16))
+
+    expected = np.array([[x @ y / (np.linalg.norm(x) * np.linalg.norm(y)) for y in b] for x in a])
+    result = cosine_similarity_matrix(a, b, block_size=64)
+    assert result.shape == (300, 7)
+    assert np.allclose(result, expected, atol=1e-5)
+
+def test_feature_dataset_matches_single_feature_vector():
+    torch = pytest.importorskip("torch")
+    from src.data.embeddings import create_feature_vector
+
+    torch.manual_seed(0)
+    job_embedding = torch.randn(768)
+    cv_embeddings = [torch.randn(768) for _ in range(4)]
+    gender_directions = torch.randn(3, 768)
+    texts = ["python and sql", "react", "", "python python"]
+    keywords = ["python", "sql", "react"]
+
+    df = create_feature_vectors_dataset(job_embedding, cv_embeddings, texts, gender_directions, keywords)
+    for idx, cv_embedding in enumerate(cv_embeddings):
+        expected = create_feature_vector(job_embedding, cv_embedding, gender_directions, texts[idx], keywords)
+        assert list(df.columns) == list(expected)
+        assert np.allclose(df.iloc[idx].to_numpy(dtype=float), list(expected.values()), atol=1e-5)
@@ -13,3 +13,29 @@ def test_generate_chatgpt_explanation_with_no_client(mock_init):
     )
     assert "error" in response
 
+
+def test_prompt_context_respects_token_budget():
+    from api.prompt_builder import select_relevant_text, estimate_token_count
+
+    filler = "\n".join(f"Volunteered at community event number {i}" for i in range(200))
+    cv_text = filler + "\nBuilt REST services in Python and React for hiring tools\n" + filler
+    excerpt = select_relevant_text(cv_text, "Python developer with React experience", ["python", "react"], token_budget=50)
+
+    assert estimate_token_count(excerpt) <= 50
+    assert "Python and React" in excerpt
+
+
+class WordEncoding:
+    def encode(self, text):
+        return text.split(" ")
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@patch("api.prompt_builder.get_token_encoding", return_value=WordEncoding())
+def test_unmatched_text_is_truncated_with_the_encoder(mock_encoding):
+    from api.prompt_builder import select_relevant_text
+
+    text = " ".join(f"word{i}" for i in range(100))
+    assert select_relevant_text(text, "unrelated", token_budget=10) == " ".join(f"word{i}" for i in range(10))
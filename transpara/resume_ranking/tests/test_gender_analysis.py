@@ -1,3 +1,10 @@
+import json
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from src.analysis.gender_analysis import analyze_gender_bias_distribution, generate_gender_bias_report
+from src.models.embedding_debiasing import compute_embedding_associations
 from src.models.linguistic_debiasing import compute_gender_bias_score
 
 def test_bias_score_balanced_text():
@@ -5,3 +12,37 @@ def test_bias_score_balanced_text():
     score = compute_gender_bias_score(text)
     assert isinstance(score, float)
     assert score < 5
+
+def fake_word_embedding(word, tokenizer, model):
+    male_or_career = {"he", "man", "father", "son", "brother", "uncle", "husband", "executive", "management", "professional", "salary", "office"}
+    vector = np.array([1.0, 0.1, 0.0], dtype=np.float32) if word in male_or_career else np.array([0.1, 1.0, 0.0], dtype=np.float32)
+    return SimpleNamespace(numpy=lambda: vector)
+
+@patch("src.analysis.gender_analysis.get_candidate_name_from_firestore", side_effect=lambda job_id, user_id: user_id)
+@patch("src.analysis.gender_analysis.get_candidate_id_from_firestore", side_effect=lambda job_id, user_id: user_id)
+@patch("src.data.embeddings.get_text_embedding", side_effect=fake_word_embedding)
+def test_embedding_audit_is_added_to_report(mock_embedding, mock_id, mock_name):
+    cv_embeddings = np.array([[1.0, 0.0, 0.2], [0.0, 1.0, 0.2], [0.5, 0.5, 1.0]], dtype=np.float32)
+    audit = compute_embedding_associations(cv_embeddings, tokenizer=None, model=SimpleNamespace(name_or_path="fake-audit"))
+
+    assert audit["gender_association"][0] > 0 > audit["gender_association"][1]
+    assert audit["weat_effect_size"] > 0
+
+    texts = ["He is an engineer.", "She is an engineer.", "They are an engineer."]
+    files = ["user1.pdf", "user2.pdf", "user3.pdf"]
+    report = json.loads(generate_gender_bias_report(texts, files, [0.0, 0.0, 0.0], "job", embedding_audit=audit))
+
+    assert report["candidate_analysis"][0]["embedding_gender_association"] > 0
+    assert report["embedding_audit"]["summary"]["most_female_associated_candidate"] == "user2.pdf"
+    assert report["embedding_audit"]["summary"]["gender_career_correlation"] > 0
+
+@patch("src.analysis.gender_analysis.get_candidate_name_from_firestore", side_effect=lambda job_id, user_id: user_id)
+@patch("src.analysis.gender_analysis.get_candidate_id_from_firestore", side_effect=lambda job_id, user_id: user_id)
+def test_near_duplicates_reuse_score_and_terms_together(mock_id, mock_name):
+    texts = ["He led the team and his work shipped.", "She led the team and his work shipped."]
+    result = analyze_gender_bias_distribution(texts, ["user1.pdf", "user2.pdf"], job_id="job", canonical_indices=np.array([0, 0]))
+
+    entries = json.loads(result["report"])["candidate_analysis"]
+    assert entries[0]["gender_bias_score"] == entries[1]["gender_bias_score"]
+    assert entries[0]["male_terms"] == entries[1]["male_terms"] == {"he": 1, "his": 1}
+    assert entries[1]["female_terms"] == "none"
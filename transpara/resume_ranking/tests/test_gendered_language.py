@@ -0,0 +1,36 @@
+import pytest
+
+from src.models.gendered_language import count_tokens, iter_tokens
+from src.models.linguistic_debiasing import FEMALE_TERMS, MALE_TERMS, compute_gender_bias_score, mitigate_gender_bias
+
+SAMPLES = [
+    "He's a team player; she'd said he'll lead. Don't, can't, won't! I'm sure they're fine. Y'all gonna see.",
+    "Contact: john.doe@example.com | https://linkedin.com/in/john-doe | github.com/jdoe (GPA): 3.9/4.0",
+    "  leading spaces and\ttabs\ndouble  spaces   and trailing  ",
+    "Revenue grew 40% to $3.5M (2019–2021), i.e. 3x; e.g., Inc. Ltd. Dr. Smith, Ph.D., U.S.A. and U.K.",
+    "\"Quoted\" ‘single’ «guillemets» — dash ... ellipsis… 10km 5kg 100MB 3pm 10a.m. A/B CI/CD e-commerce",
+    "Chairman of the Board; businessman/businesswoman; Mother-of-two; husband's role; (she) [he] {him}.",
+    "Müller-Lüdenscheidt GmbH; Ingeniería de Software (España); Größe: 1,5m; hi :) x):( C++ Node.js",
+    "Mr.Smith met Mrs.Jones.Then left.He said:\"ok\". shes hes Id Ill its cannot 500K+ +36 30 123 4567\n\n indented",
+]
+
+def test_tokens_match_spacy_tokenizer():
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    for text in SAMPLES + [text.lower() for text in SAMPLES]:
+        assert [token for _, token in iter_tokens(text)] == [token.text for token in nlp.tokenizer(text)]
+        assert count_tokens(text) == len(nlp.tokenizer(text))
+
+def test_bias_score_matches_spacy_counts():
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    for text in SAMPLES:
+        lowered = [token.text for token in nlp.tokenizer(text.lower())]
+        male = sum(token in MALE_TERMS for token in lowered)
+        female = sum(token in FEMALE_TERMS for token in lowered)
+        expected = abs(male - female) / (len(nlp.tokenizer(text)) + 1e-6) * 100
+        assert compute_gender_bias_score(text) == expected
+
+def test_mitigation_keeps_pronouns_and_names():
+    assert mitigate_gender_bias("The chairman thanked his wife.") == "The chairperson thanked his spouse."
+    assert mitigate_gender_bias("Mother of two.\nLady Gaga fan.") == "Parent of two.\nLady Gaga fan."
@@ -0,0 +1,28 @@
+import os
+import json
+import subprocess
+import sys
+import pytest
+
+from config.settings import IMPORT_TIME_BUDGETS, LAZY_MODULES
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def measure_import(module: str) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+@pytest.mark.parametrize("module", sorted(IMPORT_TIME_BUDGETS))
+def test_import_stays_within_budget(module):
+    result = measure_import(module)
+    assert result["loaded"] == [], f"{module} eagerly imports {result['loaded']}"
+    assert result["seconds"] < IMPORT_TIME_BUDGETS[module]
@@ -0,0 +1,31 @@
+import threading
+
+from src.utils.metrics import increment, propagate_context, record_run, render_prometheus, track_time
+
+def test_run_collects_stages_and_counters_across_threads():
+    @track_time("embedding")
+    def embed():
+        increment("texts_embedded")
+
+    with record_run("job1") as run:
+        embed()
+        worker = threading.Thread(target=propagate_context(embed))
+        worker.start()
+        worker.join()
+        # Without propagate_context the observation only reaches the global totals
+        unscoped = threading.Thread(target=embed)
+        unscoped.start()
+        unscoped.join()
+
+    metrics = run.to_dict()
+    assert metrics["job_id"] == "job1"
+    assert metrics["stages"]["embedding"]["count"] == 2
+    assert metrics["counters"]["texts_embedded"] == 2
+
+def test_prometheus_output_includes_totals():
+    with track_time("gpt"):
+        increment("gpt_calls")
+    output = render_prometheus()
+    assert 'transpara_stage_duration_seconds_sum{stage="gpt"}' in output
+    assert "transpara_gpt_calls_total" in output
+    assert output.endswith("\n")
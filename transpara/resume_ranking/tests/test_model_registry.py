@@ -0,0 +1,47 @@
+import os
+
+from src.models.model_registry import (
+    compute_model_version, get_latest_ready_version, get_version_model_path, publish_model_version,
+    start_training_worker, training_lock
+)
+
+def _save_dummy_model(models_dir, version):
+    path = get_version_model_path(models_dir, version)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"model")
+    return path
+
+def test_model_version_depends_on_job_and_keywords():
+    version = compute_model_version("hash", ["python", "sql"])
+    assert version == compute_model_version("hash", ["sql", "python"])
+    assert version != compute_model_version("hash", ["python"])
+    assert version != compute_model_version("other", ["python", "sql"])
+    assert version != compute_model_version("hash", ["python", "sql"], code_version="next")
+
+def test_publish_swaps_current_version(tmp_path):
+    models_dir = str(tmp_path)
+    assert get_latest_ready_version(models_dir) is None
+
+    _save_dummy_model(models_dir, "v1")
+    publish_model_version(models_dir, "v1", "hash1", ["python"], "full_search")
+    assert get_latest_ready_version(models_dir)["version"] == "v1"
+
+    _save_dummy_model(models_dir, "v2")
+    publish_model_version(models_dir, "v2", "hash2", ["sql"], "warm_start_trees")
+    latest = get_latest_ready_version(models_dir)
+    assert latest["version"] == "v2"
+    assert latest["keywords"] == ["sql"]
+    assert not [name for name in os.listdir(os.path.join(models_dir, "registry")) if name.endswith(".tmp")]
+
+def test_training_worker_runs_detached(tmp_path):
+    log_path = str(tmp_path / "logs" / "worker.log")
+    with training_lock(str(tmp_path)):
+        # The caller is not blocked by the worker, which waits for the lock
+        worker = start_training_worker([
+            "-c",
+            f"from src.models.model_registry import training_lock\nwith training_lock({str(tmp_path)!r}): print('trained')"
+        ], log_path)
+        assert worker.poll() is None
+    assert worker.wait(timeout=30) == 0
+    assert open(log_path).read().strip() == "trained"
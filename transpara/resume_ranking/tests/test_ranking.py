@@ -1,5 +1,6 @@
 import os
-from src.models.ranking_model import rank_candidates
+import numpy as np
+from src.models.ranking_model import rank_candidates, prefilter_candidates
 from src.utils.io_utils import load_job_description, load_candidate_pdfs
 
 def test_rank_candidates_pipeline(test_model_and_tokenizer):
@@ -61,3 +62,13 @@ def test_rank_candidates_pipeline(test_model_and_tokenizer):
     assert "predictions" in results
     assert len(results["predictions"]) == len(candidate_files)
     assert os.path.exists(os.path.join(output_folders["reports"], "ranking_results.json"))
+
+def test_prefilter_shortlists_top_scores():
+    rng = np.random.default_rng(0)
+    cv_embeddings = rng.normal(size=(50, 16))
+    job_embedding = rng.normal(size=16)
+    texts = ["python developer" if i % 5 == 0 else "sales manager" for i in range(50)]
+
+    shortlist, scores = prefilter_candidates(job_embedding, cv_embeddings, texts, ["python"], top_m=10)
+    assert len(scores) == 50
+    assert set(shortlist) == set(np.argsort(-scores)[:10])
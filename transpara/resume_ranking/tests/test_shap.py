@@ -23,3 +23,18 @@ def test_shap_explanation_generation():
     assert shap_values.shape[0] == len(df)
     assert isinstance(shap_values, np.ndarray)
 
+
+def test_shap_contributors_sorted_by_absolute_impact():
+    model = load_ranking_model("tests/sample_data/models/ranking_model.joblib")
+    df = pd.read_json("tests/sample_data/test_features.json")
+
+    explanations, shap_values, _ = generate_model_explanations(
+        model=model,
+        feature_names=df.columns.tolist(),
+        X=df
+    )
+
+    for row, explanation in zip(shap_values, explanations):
+        impacts = [abs(c["impact"]) for c in explanation["contributors"]]
+        assert impacts == sorted(impacts, reverse=True)
+        assert np.isclose(impacts[0], np.abs(row).max())
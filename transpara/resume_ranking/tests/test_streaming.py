@@ -0,0 +1,71 @@
+import threading
+import pytest
+
+from src.utils.streaming import stream_stages
+
+def test_stages_run_on_batches_in_order():
+    batches = list(stream_stages(
+        range(10),
+        [("double", lambda batch: [x * 2 for x in batch]), ("sum", sum)],
+        batch_size=3,
+        queue_size=1
+    ))
+    assert batches == [6, 24, 42, 18]
+
+def test_bounded_queues_limit_batches_in_flight():
+    lock = threading.Lock()
+    in_flight = {"now": 0, "max": 0}
+
+    def produced():
+        for item in range(200):
+            if item % 4 == 0:
+                with lock:
+                    in_flight["now"] += 1
+                    in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            yield item
+
+    for _ in stream_stages(produced(), [("identity", lambda batch: batch)], batch_size=4, queue_size=2):
+        with lock:
+            in_flight["now"] -= 1
+    # Two queues of two, one batch per thread and one being assembled
+    assert in_flight["max"] <= 7
+
+def test_stage_errors_reach_the_caller():
+    def fail(batch):
+        raise ValueError("bad batch")
+
+    with pytest.raises(ValueError, match="bad batch"):
+        list(stream_stages(range(5), [("fail", fail)], batch_size=2))
+
+def test_stream_candidate_features_shares_rows_of_near_duplicates(tmp_path):
+    import numpy as np
+    import pandas as pd
+    from unittest.mock import patch
+    from src.data.candidate_stream import stream_candidate_features
+
+    texts = {
+        "a.pdf": "senior python developer with ten years of django and postgres experience in fintech",
+        "b.pdf": "sales manager leading a regional team across retail accounts and partner channels",
+        "c.pdf": "senior python developer with ten years of django and postgres experience in fintech",
+    }
+    for name, text in texts.items():
+        (tmp_path / name).write_text(text)
+
+    def featurize(job_embedding, embeddings, mitigated, *args):
+        return pd.DataFrame({"length": [len(text) for text in mitigated]}), None
+
+    embedded = []
+    with patch("src.data.document_extraction.extract_text_from_pdf", side_effect=lambda path: open(path).read()), \
+            patch("src.models.linguistic_debiasing.mitigate_gender_bias", side_effect=lambda text: text.upper()), \
+            patch("src.models.embedding_debiasing.compute_gender_subspace", return_value=None), \
+            patch("src.data.embeddings.get_text_embedding", return_value=None), \
+            patch("src.data.embeddings.get_text_embeddings", side_effect=lambda batch, *_: embedded.extend(batch) or np.array([[len(text)] for text in batch])), \
+            patch("src.data.candidate_stream.featurize_candidates", side_effect=featurize), \
+            patch("src.data.candidate_stream.iter_candidate_pdfs", return_value=iter([str(tmp_path / name) for name in texts])):
+        result = stream_candidate_features(str(tmp_path), "job", None, None, None, batch_size=2)
+
+    assert len(embedded) == 2
+    assert result["canonical_indices"].tolist() == [0, 1, 0]
+    assert result["cv_embeddings"][2] == result["cv_embeddings"][0]
+    assert result["features"]["length"].tolist() == [len(texts["a.pdf"]), len(texts["b.pdf"]), len(texts["a.pdf"])]
+    assert result["reused"] == {"mitigated_texts": 1, "embeddings": 1}
@@ -0,0 +1,17 @@
+import numpy as np, pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from config.settings import MODEL_SETTINGS
+from training.train_model import warm_start_ranking_model
+
+def test_warm_start_stops_growing_at_the_cap(monkeypatch):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": rng.normal(size=60), "b": rng.normal(size=60)})
+    df["target_score"] = df["a"] * 2 + df["b"]
+    previous = GradientBoostingRegressor(n_estimators=20, random_state=0).fit(df[["a", "b"]], df["target_score"])
+    monkeypatch.setitem(MODEL_SETTINGS, "warm_start_max_estimators", 30)
+
+    grown, _, strategy = warm_start_ranking_model(df, previous, extra_estimators=10)
+    assert strategy == "warm_start_trees" and grown.n_estimators_ == 30
+
+    refit, _, strategy = warm_start_ranking_model(df, grown, extra_estimators=10)
+    assert strategy == "reuse_params" and refit.n_estimators_ == 30
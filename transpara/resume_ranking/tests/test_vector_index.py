@@ -0,0 +1,62 @@
+import numpy as np
+
+from src.data.vector_index import VectorIndex
+
+def test_search_matches_brute_force_cosine(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 32))
+    index = VectorIndex(str(tmp_path), backend="numpy")
+    index.chunk_size = 64
+    index.add([f"job:{i}" for i in range(len(vectors))], vectors)
+
+    query = rng.normal(size=32)
+    cosine = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    expected = [f"job:{i}" for i in np.argsort(-cosine)[:5]]
+
+    results = index.search(query, k=5)
+    assert [entry["key"] for entry in results] == expected
+    assert results[0]["score"] == round(float(cosine.max()), 4)
+
+def test_incremental_inserts_persist_and_upsert(tmp_path):
+    index = VectorIndex(str(tmp_path), backend="numpy")
+    assert index.add(["a:1", "a:2"], np.eye(3)[:2], [{"user_id": "1"}, {"user_id": "2"}]) == 2
+    index.save()
+
+    reloaded = VectorIndex(str(tmp_path), backend="numpy")
+    assert len(reloaded) == 2
+    assert reloaded.add(["a:2", "b:3"], np.array([[0, 0, 1], [1, 1, 0]])) == 1
+    assert len(reloaded) == 3
+
+    similar = reloaded.similar_to("a:1", k=2)
+    assert [entry["key"] for entry in similar] == ["b:3", "a:2"]
+    assert similar[1]["score"] == 0.0
+
+def test_reruns_do_not_grow_the_store_and_other_writers_are_seen(tmp_path):
+    vectors = np.random.default_rng(1).normal(size=(10, 8))
+    keys = [f"job:{i}" for i in range(10)]
+    index = VectorIndex(str(tmp_path), backend="numpy")
+    other_process = VectorIndex(str(tmp_path), backend="numpy")
+
+    assert index.add(keys, vectors) == 10
+    assert index.add(keys, vectors) == 0
+    assert other_process.add(["other:1"], vectors[:1]) == 1
+
+    index.reload_if_changed()
+    assert len(index) == 11
+    assert index.add(keys[:1], vectors[1:2]) == 0
+    assert {entry["key"] for entry in index.search(vectors[1], k=2)} == {"job:0", "job:1"}
+    assert len(index.search(vectors[1], k=20)) == 11
+
+def test_search_excludes_jobs_by_metadata(tmp_path):
+    index = VectorIndex(str(tmp_path), backend="numpy")
+    vectors = np.random.default_rng(2).normal(size=(6, 8))
+    keys = ["a:1", "a:2", "b:1", "b:2", "ab:1", "c:1"]
+    metadata = [{"job_id": key.split(":")[0]} for key in keys]
+    index.add(keys[:4], vectors[:4], metadata[:4])
+    assert {entry["key"] for entry in index.search(vectors[0], k=10, exclude_job_ids=["a"])} == {"b:1", "b:2"}
+
+    # Rows appended (and re-added) after the first search are grouped too
+    index.add(keys[4:] + ["a:1"], np.vstack([vectors[4:], vectors[1]]), metadata[4:] + [metadata[0]])
+    results = index.search(vectors[0], k=10, exclude_job_ids=["a", "c"])
+    assert {entry["key"] for entry in results} == {"b:1", "b:2", "ab:1"}
+    assert results[0]["job_id"] in {"b", "ab"}
@@ -0,0 +1,112 @@
+# python -m training.train_global_model
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+from typing import List, Optional
+
+from src.data.embeddings import load_mbert_model
+from src.utils.file_utils import clean_html
+from src.utils.text_utils import extract_skill_keywords
+from config.settings import DEFAULT_SKILLS, GLOBAL_MODEL_PATH, MODEL_SETTINGS
+from src.data.embedding_store import get_embedding_store
+from src.utils.plot_renderer import wait_for_plots
+from training.train_model import get_candidate_texts, train_ranking_model
+
+def keywords_for_job(job_description_text: str) -> List[str]:
+    """
+    Offline keyword set for a training job: the DEFAULT_SKILLS mentioned in it.
+    """
+    return sorted(extract_skill_keywords(job_description_text, DEFAULT_SKILLS).keys())
+
+def prepare_global_training_data(
+    job_description_texts: List[str],
+    candidate_texts: List[str],
+    tokenizer,
+    model,
+    job_keywords: Optional[List[List[str]]] = None,
+    gender_directions=None,
+    embedding_store=None
+) -> pd.DataFrame:
+    """
+    Builds one row per (job, CV) pair using the job-independent feature schema.
+    """
+    from src.data.embeddings import get_text_embedding, cosine_similarity_matrix, normalize_embeddings, create_global_feature_vectors_dataset
+    from src.data.embedding_store import embed_texts
+    from src.utils.text_utils import extract_matched_keywords
+
+    cv_embeddings = embed_texts(candidate_texts, tokenizer, model, store=embedding_store)
+    cv_normalized = normalize_embeddings(cv_embeddings)
+
+    frames = []
+    for job_idx, job_text in enumerate(job_description_texts):
+        job_text = clean_html(job_text)
+        keywords = job_keywords[job_idx] if job_keywords else keywords_for_job(job_text)
+        if not keywords:
+            print(f"⚠️ No keywords found for training job {job_idx}, skipping.")
+            continue
+
+        job_embedding = get_text_embedding(job_text, tokenizer, model)
+        cosine_scores = cosine_similarity_matrix(cv_normalized, normalize_embeddings(job_embedding), normalized=True)[:, 0]
+        ratios = np.array([len(extract_matched_keywords(text, keywords)) for text in candidate_texts]) / len(keywords)
+        scores = (0.6 * cosine_scores.astype(np.float64) + 0.4 * ratios).tolist()
+
+        frames.append(create_global_feature_vectors_dataset(
+            job_embedding, cv_embeddings, candidate_texts, keywords,
+            gender_directions=gender_directions,
+            similarity_scores=scores
+        ))
+        print(f"Prepared {len(candidate_texts)} pairs for training job {job_idx + 1}/{len(job_description_texts)}")
+
+    if not frames:
+        raise ValueError("No usable training jobs for the global ranking model")
+    return pd.concat(frames, ignore_index=True)
+
+def load_job_descriptions(job_descriptions_dir: str) -> List[str]:
+    texts = []
+    for root, _, files in os.walk(job_descriptions_dir):
+        for file in sorted(files):
+            if file.endswith(".txt"):
+                with open(os.path.join(root, file), "r", encoding="utf-8") as f:
+                    texts.append(f.read())
+    return texts
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the job-agnostic global ranking model")
+    parser.add_argument('--job_descriptions_dir', type=str, default='data')
+    parser.add_argument('--candidates_dir', type=str, default='../resume_generator/output')
+    parser.add_argument('--save_path', type=str, default=GLOBAL_MODEL_PATH)
+    parser.add_argument('--training_mode', type=str, choices=['grid', 'fast'], default='fast')
+    args = parser.parse_args()
+
+    job_texts = load_job_descriptions(args.job_descriptions_dir)
+    if not job_texts:
+        print("No job description .txt files found.")
+        return
+
+    candidate_files, candidate_texts = get_candidate_texts(args.candidates_dir)
+    if not candidate_files:
+        print("No candidate resumes found.")
+        return
+
+    tokenizer, model = load_mbert_model()
+
+    print(f"Preparing global training data from {len(job_texts)} jobs x {len(candidate_texts)} CVs...")
+    store = get_embedding_store() if MODEL_SETTINGS['cache_training_embeddings'] else None
+    df = prepare_global_training_data(job_texts, candidate_texts, tokenizer, model, embedding_store=store)
+
+    output_folders = {
+        'models': os.path.dirname(args.save_path),
+        'reports': os.path.join(os.path.dirname(args.save_path), "reports")
+    }
+    os.makedirs(output_folders['reports'], exist_ok=True)
+
+    print("Training global ranking model...")
+    train_ranking_model(df, save_path=args.save_path, output_folders=output_folders, training_mode=args.training_mode)
+    wait_for_plots()
+    print(f"✅ Global ranking model saved to {args.save_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,26 +2,24 @@
 import os
 import numpy as np
 import pandas as pd
+import time
 import joblib
-import torch
 import argparse
-import matplotlib.pyplot as plt
 
+from copy import deepcopy
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Any
-from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.isotonic import IsotonicRegression
-from sklearn.linear_model import LogisticRegression
 
 from src.data.document_extraction import extract_text_from_pdf
 from src.data.embeddings import load_mbert_model
 from config.settings import DEFAULT_SKILLS, MODEL_SETTINGS
-from src.utils.file_utils import clean_html
+from src.utils.file_utils import clean_html, save_to_json
 from src.utils.text_utils import extract_matched_keywords
+from src.utils.plot_renderer import submit_plot, wait_for_plots
 
 def plot_calibration_curve(y_pred, y_true, calibrated_pred, method, output_path):
+    import matplotlib.pyplot as plt
+
     bins = np.linspace(0, 1, 20)
     bin_centers = []
     bin_avg_true = []
@@ -46,11 +44,15 @@ def plot_calibration_curve(y_pred, y_true, calibrated_pred, method, output_path)
     print(f"✅ Calibration plot saved: {output_path}")
 
 def calibrate_with_isotonic(y_pred, y_true):
+    from sklearn.isotonic import IsotonicRegression
+
     iso_reg = IsotonicRegression(out_of_bounds='clip')
     calibrated = iso_reg.fit_transform(y_pred, y_true)
     return iso_reg, calibrated
 
 def calibrate_with_platt(y_pred, y_true):
+    from sklearn.linear_model import LogisticRegression
+
     log_reg = LogisticRegression()
     y_pred_reshaped = y_pred.reshape(-1, 1)
     y_true_binary = np.digitize(y_true, bins=np.linspace(0, 1, 3)) - 1
@@ -59,19 +61,21 @@ def calibrate_with_platt(y_pred, y_true):
     return log_reg, calibrated
 
 def run_calibration_analysis(y_true, y_pred, output_dir="output/reports"):
+    from sklearn.metrics import mean_squared_error, r2_score
+
     os.makedirs(output_dir, exist_ok=True)
 
     iso_model, iso_calibrated = calibrate_with_isotonic(y_pred, y_true)
     mse_iso = mean_squared_error(y_true, iso_calibrated)
     r2_iso = r2_score(y_true, iso_calibrated)
     print(f"📈 Isotonic Regression -> MSE: {mse_iso:.4f}, R²: {r2_iso:.4f}")
-    plot_calibration_curve(y_pred, y_true, iso_calibrated, "Isotonic", os.path.join(output_dir, "calibration_isotonic.png"))
+    submit_plot(plot_calibration_curve, y_pred, y_true, iso_calibrated, "Isotonic", os.path.join(output_dir, "calibration_isotonic.png"))
 
     platt_model, platt_calibrated = calibrate_with_platt(y_pred, y_true)
     mse_platt = mean_squared_error(y_true, platt_calibrated)
     r2_platt = r2_score(y_true, platt_calibrated)
     print(f"📈 Platt Scaling (Logistic) -> MSE: {mse_platt:.4f}, R²: {r2_platt:.4f}")
-    plot_calibration_curve(y_pred, y_true, platt_calibrated, "Platt", os.path.join(output_dir, "calibration_platt.png"))
+    submit_plot(plot_calibration_curve, y_pred, y_true, platt_calibrated, "Platt", os.path.join(output_dir, "calibration_platt.png"))
 
     return {
         "isotonic": {"model": iso_model, "calibrated": iso_calibrated},
@@ -79,6 +83,8 @@ def run_calibration_analysis(y_true, y_pred, output_dir="output/reports"):
     }
 
 def plot_regression_calibration(y_true: np.ndarray, y_pred: np.ndarray, output_path: str = None, bins: int = 10):
+    import matplotlib.pyplot as plt
+
     assert len(y_true) == len(y_pred), "Length mismatch between true and predicted values"
 
     df = pd.DataFrame({'y_true': y_true, 'y_pred': y_pred})
@@ -101,12 +107,18 @@ def plot_regression_calibration(y_true: np.ndarray, y_pred: np.ndarray, output_p
 
     if output_path:
         plt.savefig(output_path, dpi=300)
+        plt.close()
         print(f"📊 Calibration plot saved to {output_path}")
     else:
         plt.show()
 
 def plot_feature_importance(model, feature_names, output_path, top_n=10):
-    importances = model.feature_importances_
+    plot_feature_importance_values(model.feature_importances_, feature_names, output_path, top_n=top_n)
+
+def plot_feature_importance_values(importances, feature_names, output_path, top_n=10):
+    import matplotlib.pyplot as plt
+
+    top_n = min(top_n, len(importances))
     indices = np.argsort(importances)[-top_n:]
     plt.figure(figsize=(10, 6))
     plt.barh(range(top_n), importances[indices], align='center')
@@ -118,6 +130,8 @@ def plot_feature_importance(model, feature_names, output_path, top_n=10):
     plt.close()
 
 def plot_predictions(y_true, y_pred, output_path):
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(8, 6))
     plt.scatter(y_true, y_pred, alpha=0.7)
     plt.plot([min(y_true), max(y_true)], [min(y_true), max(y_true)], 'r--')
@@ -129,6 +143,8 @@ def plot_predictions(y_true, y_pred, output_path):
     plt.close()
 
 def plot_keyword_match_distribution(match_counts, output_path):
+    import matplotlib.pyplot as plt
+
     if not match_counts:
         print("⚠️ No keyword matches found. Skipping keyword match distribution plot.")
         return
@@ -148,8 +164,10 @@ def plot_keyword_match_distribution(match_counts, output_path):
     print(f"📊 Keyword match distribution plot saved to {output_path}")
 
 def prepare_training_data(job_description_text, candidate_texts, tokenizer, model,
-                          skill_keywords=None, gender_directions=None, synthetic=True, reports_path=None):
-    from src.data.embeddings import get_text_embedding, cosine_similarity, create_feature_vectors_dataset
+                          skill_keywords=None, gender_directions=None, synthetic=True, reports_path=None,
+                          embedding_store=None):
+    from src.data.embeddings import get_text_embedding, cosine_similarity_matrix, create_feature_vectors_dataset
+    from src.data.embedding_store import embed_texts
 
     if skill_keywords is None:
         skill_keywords = DEFAULT_SKILLS
@@ -158,27 +176,22 @@ def prepare_training_data(job_description_text, candidate_texts, tokenizer, mode
 
     job_description_text = clean_html(job_description_text)
     job_embedding = get_text_embedding(job_description_text, tokenizer, model)
-    cv_embeddings = [get_text_embedding(text, tokenizer, model) for text in candidate_texts]
+    # Training CVs are the same for every job, so their embeddings can come from the store
+    cv_embeddings = embed_texts(candidate_texts, tokenizer, model, store=embedding_store)
     
-    match_counts, ratios, scores = [], [], []
-
-    for i, text in enumerate(candidate_texts):
-        matched_keywords = extract_matched_keywords(text, skill_keywords)
-        match_count = len(matched_keywords)
-        ratio = match_count / len(skill_keywords)
-        match_counts.append(match_count)
-        ratios.append(ratio)
+    match_counts = np.array([len(extract_matched_keywords(text, skill_keywords)) for text in candidate_texts])
+    ratios = match_counts / len(skill_keywords)
 
-        if synthetic:
-            cosine_score = cosine_similarity(job_embedding, cv_embeddings[i])
-            score = 0.6 * cosine_score + 0.4 * ratio
-            scores.append(score)
+    scores = []
+    if synthetic and len(cv_embeddings):
+        cosine_scores = cosine_similarity_matrix(cv_embeddings, job_embedding)[:, 0].astype(np.float64)
+        scores = (0.6 * cosine_scores + 0.4 * ratios).tolist()
 
-    print("Keyword match counts per candidate:", match_counts)
+    print("Keyword match counts per candidate:", match_counts.tolist())
 
-    if reports_path and match_counts:
+    if reports_path and len(match_counts):
         output_path = os.path.join(reports_path, "keyword_match_distribution.png")
-        plot_keyword_match_distribution(match_counts, output_path)
+        submit_plot(plot_keyword_match_distribution, match_counts.tolist(), output_path)
 
     df = create_feature_vectors_dataset(
         job_embedding, cv_embeddings, candidate_texts,
@@ -190,7 +203,7 @@ def prepare_training_data(job_description_text, candidate_texts, tokenizer, mode
     return df
 
 
-def train_ranking_model(features_df, save_path=None, output_folders=None, param_grid=None):
+def train_ranking_model(features_df, save_path=None, output_folders=None, param_grid=None, training_mode=None):
     if 'target_score' not in features_df.columns:
         raise ValueError("Missing 'target_score' column")
 
@@ -199,40 +212,86 @@ def train_ranking_model(features_df, save_path=None, output_folders=None, param_
 
     if param_grid is None:
         param_grid = MODEL_SETTINGS['gbm_params']
+    if training_mode is None:
+        training_mode = MODEL_SETTINGS['training_mode']
 
     if len(X) <= 3:
         model = _train_small_dataset(X, y)
     else:
-        model = _train_with_cross_validation(X, y, param_grid, output_folders)
+        model = _train_with_cross_validation(X, y, param_grid, output_folders, training_mode=training_mode)
 
-    if output_folders:
-        plot_feature_importance(model, X.columns, os.path.join(output_folders['reports'], "feature_importance.png"))
+    if output_folders and hasattr(model, "feature_importances_"):
+        submit_plot(
+            plot_feature_importance_values, np.array(model.feature_importances_), list(X.columns),
+            os.path.join(output_folders['reports'], "feature_importance.png")
+        )
 
     if save_path:
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
         joblib.dump(model, save_path)
         print(f"Model saved to {save_path}")
 
+        from src.analysis.shap_explanation import save_tree_explainer
+        save_tree_explainer(model, save_path)
+
     return model, X.columns.tolist()
 
 
 def _train_small_dataset(X, y):
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.metrics import mean_squared_error
+
     model = GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, max_depth=3, random_state=42)
     model.fit(X, y)
     print(f"Training MSE: {mean_squared_error(y, model.predict(X)):.4f}")
     return model
 
 
-def _train_with_cross_validation(X, y, param_grid, output_folders=None):
-    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
-    print(f"Training on {len(X_train)} samples, validating on {len(X_val)}")
-
-    model = GridSearchCV(
+def _build_search(training_mode, param_grid):
+    if training_mode == 'fast':
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        from sklearn.model_selection import HalvingRandomSearchCV
+
+        return HalvingRandomSearchCV(
+            HistGradientBoostingRegressor(
+                max_iter=MODEL_SETTINGS['fast_search_max_iter'],
+                early_stopping=True,
+                validation_fraction=0.1,
+                n_iter_no_change=10,
+                random_state=42
+            ),
+            MODEL_SETTINGS['fast_search_params'],
+            n_candidates=MODEL_SETTINGS['fast_search_candidates'],
+            factor=3,
+            cv=3,
+            scoring='neg_mean_squared_error',
+            n_jobs=MODEL_SETTINGS['training_n_jobs'],
+            random_state=42
+        )
+
+    if training_mode != 'grid':
+        raise ValueError(f"Unknown training mode: {training_mode}")
+
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.model_selection import GridSearchCV
+
+    return GridSearchCV(
         GradientBoostingRegressor(random_state=42),
         param_grid,
         cv=3,
         scoring='neg_mean_squared_error'
     )
+
+
+def _train_with_cross_validation(X, y, param_grid, output_folders=None, training_mode='grid'):
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+    print(f"Training on {len(X_train)} samples, validating on {len(X_val)} ({training_mode} search)")
+
+    model = _build_search(training_mode, param_grid)
     model.fit(X_train, y_train)
 
     best_model = model.best_estimator_
@@ -247,12 +306,121 @@ def _train_with_cross_validation(X, y, param_grid, output_folders=None):
         pass
 
     if output_folders:
-        plot_predictions(y_val, y_pred, os.path.join(output_folders['reports'], "pred_vs_actual.png"))
-        plot_regression_calibration(y_val, y_pred, os.path.join(output_folders['reports'], "calibration_plot.png"))
+        y_val_array = np.asarray(y_val, dtype=float)
+        submit_plot(plot_predictions, y_val_array, y_pred, os.path.join(output_folders['reports'], "pred_vs_actual.png"))
+        submit_plot(plot_regression_calibration, y_val_array, y_pred, os.path.join(output_folders['reports'], "calibration_plot.png"))
         run_calibration_analysis(y_val, y_pred, output_dir=output_folders['reports'])
 
     return best_model
 
+def is_feature_schema_compatible(model, feature_names) -> bool:
+    previous_features = getattr(model, "feature_names_in_", None)
+    return previous_features is not None and list(previous_features) == list(feature_names)
+
+
+def warm_start_ranking_model(features_df, previous_model, save_path=None, output_folders=None, extra_estimators=None):
+    """
+    Retrains from the previous job model instead of searching from scratch.
+
+    When the feature schema is unchanged the previous trees are kept and
+    `extra_estimators` more are boosted on the new data. Otherwise, or when that
+    would grow the model past MODEL_SETTINGS['warm_start_max_estimators'], a
+    fresh model is fitted once with the previous model's hyperparameters (its
+    size capped at that setting).
+    """
+    from sklearn.base import clone
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_squared_error
+
+    if 'target_score' not in features_df.columns:
+        raise ValueError("Missing 'target_score' column")
+    if extra_estimators is None:
+        extra_estimators = MODEL_SETTINGS['warm_start_extra_estimators']
+
+    X = features_df.drop(columns='target_score')
+    y = features_df['target_score']
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    max_estimators = MODEL_SETTINGS['warm_start_max_estimators']
+    # GradientBoosting counts trees in n_estimators, HistGradientBoosting in max_iter
+    size_param, fitted_size = ("n_estimators", "n_estimators_") if hasattr(previous_model, "n_estimators_") else ("max_iter", "n_iter_")
+    grown_size = getattr(previous_model, fitted_size) + extra_estimators
+
+    if is_feature_schema_compatible(previous_model, X.columns) and grown_size <= max_estimators:
+        model = deepcopy(previous_model)
+        model.set_params(warm_start=True, **{size_param: grown_size})
+        print(f"Warm start: boosting {extra_estimators} additional trees on the previous model")
+        strategy = "warm_start_trees"
+    else:
+        model = clone(previous_model)
+        model.set_params(**{size_param: min(model.get_params()[size_param], max_estimators)})
+        if grown_size > max_estimators:
+            print(f"Warm start: {grown_size} trees would exceed warm_start_max_estimators ({max_estimators}), refitting with previous params {model.get_params()}")
+        else:
+            print(f"Warm start: feature schema changed, refitting with previous params {model.get_params()}")
+        strategy = "reuse_params"
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    model.set_params(warm_start=False)
+    print(f"Warm-start training took {time.perf_counter() - start:.2f}s")
+    print(f"Validation MSE: {mean_squared_error(y_val, model.predict(X_val)):.4f}")
+
+    if output_folders and hasattr(model, "feature_importances_"):
+        submit_plot(
+            plot_feature_importance_values, np.array(model.feature_importances_), list(X.columns),
+            os.path.join(output_folders['reports'], "feature_importance.png")
+        )
+
+    if save_path:
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        joblib.dump(model, save_path)
+        print(f"Model saved to {save_path}")
+
+        from src.analysis.shap_explanation import save_tree_explainer
+        save_tree_explainer(model, save_path)
+
+    return model, X.columns.tolist(), strategy
+
+
+def compare_training_modes(features_df, param_grid=None, modes=('grid', 'fast'), output_path=None):
+    """
+    Trains one model per search mode on the same split and reports wall time and
+    validation MSE side by side.
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_squared_error
+
+    if param_grid is None:
+        param_grid = MODEL_SETTINGS['gbm_params']
+
+    X = features_df.drop(columns='target_score')
+    y = features_df['target_score']
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    comparison = {}
+    for mode in modes:
+        search = _build_search(mode, param_grid)
+        start = time.perf_counter()
+        search.fit(X_train, y_train)
+        wall_time = time.perf_counter() - start
+
+        comparison[mode] = {
+            "wall_time_s": round(wall_time, 3),
+            "val_mse": float(mean_squared_error(y_val, search.best_estimator_.predict(X_val))),
+            "best_params": {k: (v if isinstance(v, (int, float, str)) or v is None else str(v)) for k, v in search.best_params_.items()}
+        }
+
+    print(f"\n{'Mode':<8}{'Wall time (s)':>16}{'Validation MSE':>18}")
+    for mode, stats in comparison.items():
+        print(f"{mode:<8}{stats['wall_time_s']:>16.2f}{stats['val_mse']:>18.5f}")
+
+    if output_path:
+        save_to_json(comparison, output_path)
+        print(f"Training mode comparison saved to {output_path}")
+
+    return comparison
+
 def get_candidate_texts(candidates_dir):
     files, texts = [], []
     for file in os.listdir(candidates_dir):
@@ -266,6 +434,9 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--job_description', type=str, default='data/job_desc/data.txt')
     parser.add_argument('--candidates_dir', type=str, default='resume_generator/output')
+    parser.add_argument('--training_mode', type=str, choices=['grid', 'fast'], default=None)
+    parser.add_argument('--compare_training_modes', action='store_true',
+                        help="Benchmark grid search against the fast search before training")
     args = parser.parse_args()
 
     if not os.path.exists(args.job_description):
@@ -307,10 +478,14 @@ def main():
         reports_path=output_folders['reports']
     )
 
+    if args.compare_training_modes:
+        compare_training_modes(df, output_path=os.path.join(output_folders['reports'], "training_mode_comparison.json"))
+
     print("Training model...")
     model_path = os.path.join(output_folders['models'], "ranking_model.joblib")
-    train_ranking_model(df, save_path=model_path, output_folders=output_folders)
+    train_ranking_model(df, save_path=model_path, output_folders=output_folders, training_mode=args.training_mode)
 
+    wait_for_plots()
     print("✅ Training complete. Reports saved in:", output_folders['reports'])
 
 